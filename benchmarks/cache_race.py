@@ -0,0 +1,71 @@
+"""
+Cache race check: reads racing the writes that invalidate them
+
+Creates a throwaway database and, round after round, starts a cache-miss
+get_event() and a join_event() on the same event together (likewise
+get_user_setting() against set_user_setting()).  The read is in flight
+while the write commits and invalidates the key, so if the read's
+pre-write row were cached afterwards, later reads would serve it for the
+whole CACHE_TTL.  After each round the cached value must match the
+database.  Exits non-zero on any stale read.
+
+Usage: python benchmarks/cache_race.py [--rounds 200]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Allow running from a checkout without installing anything
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.database import DatabaseManager
+from utils.timeutil import now_epoch
+
+async def run(rounds: int) -> bool:
+    directory = tempfile.mkdtemp(prefix="cache_race_")
+    db = DatabaseManager(os.path.join(directory, "cache_race.db"), maintenance=False)
+    try:
+        await db.init_database()
+        event_id = await db.create_event("Race", "", 1, 1, 1, now_epoch() + 86400)
+
+        stale_events = 0
+        for user_id in range(rounds):
+            db._invalidate_event(event_id)
+            await asyncio.gather(db.get_event(event_id), db.join_event(event_id, user_id))
+            if (await db.get_event(event_id)).participant_count != user_id + 1:
+                stale_events += 1
+
+        stale_settings = 0
+        await db.set_user_setting(1, "round", -1, username="race")
+        for value in range(rounds):
+            db._invalidate_settings(1)
+            await asyncio.gather(db.get_user_setting(1, "round"), db.set_user_setting(1, "round", value))
+            if await db.get_user_setting(1, "round") != value:
+                stale_settings += 1
+
+        stats = db.get_cache_stats()
+        print(f"{rounds} rounds: {stale_events} stale events, {stale_settings} stale settings "
+              f"(reads discarded: events {stats['events']['stale_sets']}, "
+              f"settings {stats['settings']['stale_sets']})")
+        ok = stale_events == 0 and stale_settings == 0
+        print("OK" if ok else "FAILED")
+        return ok
+    finally:
+        await db.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.rounds))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
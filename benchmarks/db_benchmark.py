@@ -0,0 +1,391 @@
+"""
+Load test for DatabaseManager against a realistically sized SQLite file
+
+Seeds a temporary database (by default 1M reminders, 100k events and 10M
+log rows; scale it down with --scale), then drives each workload with
+--concurrency concurrent callers for --duration seconds, followed by a
+mixed run where all workloads hit the database at once.  Reports ops/sec,
+completed ops and p50/p99 latency per workload and writes the results as
+JSON so runs can be compared with --compare.  A workload whose callers
+were starved (fewer completed ops than callers, or an op that waited more
+than half the run) is flagged, since its numbers then measure the wait
+rather than the operation.  Needs nothing beyond the bot's own
+requirements and a local disk.
+
+Usage:
+    python benchmarks/db_benchmark.py --scale 0.01 --duration 5
+    python benchmarks/db_benchmark.py --output before.json
+    python benchmarks/db_benchmark.py --output after.json --compare before.json
+    python benchmarks/db_benchmark.py --db /tmp/seeded.db --keep   # reuse a seeded file
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List
+
+# Allow running from a checkout without installing anything
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from utils.database import DatabaseManager
+from utils.timeutil import now_epoch
+
+GUILDS = 100
+CHANNELS_PER_GUILD = 10
+LOG_LEVELS = ('DEBUG', 'INFO', 'INFO', 'INFO', 'WARNING', 'ERROR')
+LOG_MODULES = ('commands', 'music', 'events', 'reminders', 'media', 'errors')
+PATTERNS = ('hourly', 'daily', 'weekly', 'monthly')
+# Vocabulary for seeded titles/messages so the full-text indexes see real variety
+WORDS = ('họp', 'nhóm', 'giải', 'đấu', 'cờ', 'vua', 'học', 'bài', 'uống', 'thuốc', 'sinh', 'nhật',
+         'game', 'raid', 'stream', 'music', 'movie', 'deadline', 'project', 'review', 'gym', 'chạy',
+         'bộ', 'đi', 'chợ', 'mua', 'sữa', 'gọi', 'điện', 'mẹ', 'trả', 'tiền', 'nhà', 'lớp', 'thi')
+
+def phrase(rng: random.Random, words: int = 4) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+def chunked_insert(conn: sqlite3.Connection, sql: str, rows, chunk: int = 50_000):
+    """executemany in chunks so a 10M-row seed never sits in memory at once"""
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= chunk:
+            conn.executemany(sql, batch)
+            batch.clear()
+    if batch:
+        conn.executemany(sql, batch)
+
+def seed(path: str, telemetry_path: str, users: int, events: int, reminders: int, logs: int,
+         participants_per_event: int, active_fraction: float, rng: random.Random) -> Dict[str, float]:
+    """Bulk-load the schema created by the migrations; returns seconds per table"""
+    now = now_epoch()
+    timings = {}
+    conn = sqlite3.connect(path, isolation_level=None)
+    # Logs live in the separate telemetry database
+    conn.execute("ATTACH DATABASE ? AS telemetry", (telemetry_path,))
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA telemetry.synchronous = OFF")
+    conn.execute("BEGIN")
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        fn()
+        timings[name] = round(time.perf_counter() - start, 2)
+        print(f"  seeded {name:<19} in {timings[name]:.1f}s", flush=True)
+
+    timed("users", lambda: chunked_insert(conn, """
+        INSERT INTO users (user_id, username, display_name, join_date, last_seen, message_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (user_id, f"user{user_id}", f"User {user_id}", now - rng.randrange(365 * 86400),
+         now - rng.randrange(7 * 86400), rng.randrange(5000))
+        for user_id in range(1, users + 1)
+    )))
+
+    def seed_events():
+        chunked_insert(conn, """
+            INSERT INTO events (id, title, description, creator_id, guild_id, channel_id,
+                                event_date, created_at, max_participants, status, participant_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            (event_id, phrase(rng, 3), phrase(rng, 8), rng.randrange(1, users + 1),
+             event_id % GUILDS, event_id % (GUILDS * CHANNELS_PER_GUILD),
+             now + rng.randrange(-30 * 86400, 60 * 86400), now - rng.randrange(30 * 86400),
+             rng.choice((-1, -1, 50, 200, 1000)),
+             'active' if rng.random() < 0.7 else 'completed',
+             participants_per_event)
+            for event_id in range(1, events + 1)
+        ))
+        chunked_insert(conn, """
+            INSERT INTO event_participants (event_id, user_id, joined_at) VALUES (?, ?, ?)
+        """, (
+            (event_id, user_id, now - rng.randrange(30 * 86400))
+            for event_id in range(1, events + 1)
+            for user_id in rng.sample(range(1, users + 1), min(participants_per_event, users))
+        ))
+    timed("events+participants", seed_events)
+
+    timed("reminders", lambda: chunked_insert(conn, """
+        INSERT INTO reminders (user_id, guild_id, channel_id, message, remind_time, created_at,
+                               is_recurring, recurring_pattern, status)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    """, (
+        (rng.randrange(1, users + 1), guild_id, guild_id * CHANNELS_PER_GUILD,
+         phrase(rng), now + rng.randrange(-20 * 86400, 30 * 86400), now - rng.randrange(20 * 86400),
+         recurring, rng.choice(PATTERNS) if recurring else None,
+         'active' if rng.random() < active_fraction else 'completed')
+        for i in range(reminders)
+        for guild_id, recurring in [(rng.randrange(GUILDS), rng.random() < 0.1)]
+    )))
+
+    # Kept inside the retention window so the background job leaves them alone
+    timed("bot_logs", lambda: chunked_insert(conn, """
+        INSERT INTO telemetry.bot_logs (level, message, module, user_id, guild_id, timestamp)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, (
+        (rng.choice(LOG_LEVELS), f"Command executed by user {i % users}", rng.choice(LOG_MODULES),
+         i % users, i % GUILDS, now - (logs - i) * 7 * 86400 // max(logs, 1))
+        for i in range(logs)
+    )))
+
+    conn.execute("COMMIT")
+    conn.execute("ANALYZE")
+    conn.execute("DETACH DATABASE telemetry")
+    conn.close()
+    return timings
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(fraction * len(sorted_values)))
+    return sorted_values[index]
+
+def summarize(latencies: List[float], elapsed: float, errors: int) -> Dict[str, Any]:
+    ordered = sorted(latencies)
+    return {
+        'ops': len(ordered),
+        'errors': errors,
+        'seconds': round(elapsed, 3),
+        'ops_per_sec': round(len(ordered) / elapsed, 1) if elapsed else 0.0,
+        'p50_ms': round(percentile(ordered, 0.50) * 1000, 3),
+        'p99_ms': round(percentile(ordered, 0.99) * 1000, 3),
+        'mean_ms': round(sum(ordered) / len(ordered) * 1000, 3) if ordered else 0.0,
+        'max_ms': round(ordered[-1] * 1000, 3) if ordered else 0.0
+    }
+
+def make_workloads(db: DatabaseManager, counts: Dict[str, int],
+                   rng: random.Random) -> Dict[str, Callable[[], Awaitable[Any]]]:
+    """One coroutine factory per workload; each call is one timed operation"""
+    users, events = max(1, counts['users']), max(1, counts['events'])
+    next_user = iter(range(users + 1, 10**12))
+
+    async def create_reminder():
+        guild_id = rng.randrange(GUILDS)
+        await db.create_reminder(rng.randrange(1, users + 1), guild_id, guild_id * CHANNELS_PER_GUILD,
+                                 "Benchmark reminder", now_epoch() + rng.randrange(86400 * 30))
+
+    async def get_active_reminders():
+        await db.get_active_reminders()
+
+    async def get_due_reminders():
+        await db.get_due_reminders()
+
+    async def join_event():
+        # Fresh user ids so most joins do real work instead of hitting ALREADY_JOINED
+        await db.join_event(rng.randrange(1, events + 1), next(next_user))
+
+    async def log_event():
+        await db.log_event(rng.choice(LOG_LEVELS), "Benchmark log line", rng.choice(LOG_MODULES),
+                           rng.randrange(1, users + 1), rng.randrange(GUILDS))
+
+    async def get_guild_events():
+        await db.get_guild_events(rng.randrange(GUILDS))
+
+    async def search_reminders():
+        await db.search_user_reminders(rng.randrange(1, users + 1), rng.choice(WORDS))
+
+    async def search_events():
+        await db.search_guild_events(rng.randrange(GUILDS), rng.choice(WORDS))
+
+    return {
+        'create_reminder': create_reminder,
+        'get_active_reminders': get_active_reminders,
+        'get_due_reminders': get_due_reminders,
+        'join_event': join_event,
+        'log_event': log_event,
+        'get_guild_events': get_guild_events,
+        'search_reminders': search_reminders,
+        'search_events': search_events
+    }
+
+async def drive(operations: Dict[str, Callable[[], Awaitable[Any]]], concurrency: int,
+                duration: float, drain: Callable[[], Awaitable[Any]]) -> Dict[str, Dict[str, Any]]:
+    """Run concurrency callers per operation until duration elapses
+
+    drain() runs before the clock stops so queued writes (log_event goes
+    through the write-behind queue) are counted against ops/sec.  Each
+    workload's stats get starved=True if its callers couldn't get through.
+    """
+    latencies = {name: [] for name in operations}
+    errors = {name: 0 for name in operations}
+    deadline = time.perf_counter() + duration
+
+    async def worker(name: str, op: Callable[[], Awaitable[Any]]):
+        samples = latencies[name]
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                await op()
+            except Exception:
+                errors[name] += 1
+            else:
+                samples.append(time.perf_counter() - start)
+            # Let the other callers run; an op that never suspends would hog the loop
+            await asyncio.sleep(0)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(name, op) for name, op in operations.items() for _ in range(concurrency)
+    ))
+    await drain()
+    elapsed = time.perf_counter() - start
+    results = {}
+    for name in operations:
+        stats = summarize(latencies[name], elapsed, errors[name])
+        stats['starved'] = stats['ops'] < concurrency or stats['max_ms'] > duration * 500
+        results[name] = stats
+    return results
+
+async def run(args, path: str, counts: Dict[str, int]) -> Dict[str, Any]:
+    rng = random.Random(args.seed + 1)
+    db = DatabaseManager(path, args.read_pool_size, maintenance=False)
+    results: Dict[str, Any] = {}
+    try:
+        await db.init_database()
+        workloads = make_workloads(db, counts, rng)
+        selected = {name: op for name, op in workloads.items() if name in args.workloads}
+
+        for name, op in selected.items():
+            print(f"  {name} ...", flush=True)
+            results[name] = (await drive({name: op}, args.concurrency, args.duration,
+                                         db.flush_writes))[name]
+        if args.mixed and len(selected) > 1:
+            print("  mixed ...", flush=True)
+            results['mixed'] = await drive(selected, args.concurrency, args.duration,
+                                           db.flush_writes)
+        query_stats = db.get_query_stats(limit=15)
+    finally:
+        await db.close()
+    return {'workloads': results, 'query_stats': query_stats}
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+def print_table(workloads: Dict[str, Any], baseline: Dict[str, Any] = None):
+    def rows(results, prefix=""):
+        for name, stats in results.items():
+            if 'ops_per_sec' in stats:
+                yield prefix + name, stats
+            else:
+                yield from rows(stats, prefix=f"{name}/")
+
+    base = dict(rows(baseline)) if baseline else {}
+    starved = []
+    print(f"\n  {'workload':<32}{'ops/s':>10}{'ops':>9}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for name, stats in rows(workloads):
+        line = (f"  {name:<32}{stats['ops_per_sec']:>10.0f}{stats['ops']:>9}{stats['p50_ms']:>10.2f}"
+                f"{stats['p99_ms']:>10.2f}{stats['errors']:>8}")
+        if stats.get('starved'):
+            line += "  STARVED"
+            starved.append(name)
+        old = base.get(name)
+        if old and old['ops_per_sec']:
+            change = (stats['ops_per_sec'] / old['ops_per_sec'] - 1) * 100
+            line += f"   {change:+6.1f}% ops/s vs baseline (p99 {old['p99_ms']:.2f} ms)"
+        print(line)
+    if starved:
+        print(f"\n  WARNING: starved workloads ({', '.join(starved)}): their callers mostly "
+              f"waited, so their figures don't reflect the operation's cost")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--scale", type=float, default=1.0,
+                        help="multiply every seed volume (e.g. 0.01 for a quick run)")
+    parser.add_argument("--users", type=int, default=100_000)
+    parser.add_argument("--events", type=int, default=100_000)
+    parser.add_argument("--reminders", type=int, default=1_000_000)
+    parser.add_argument("--logs", type=int, default=10_000_000)
+    parser.add_argument("--participants-per-event", type=int, default=5)
+    parser.add_argument("--active-fraction", type=float, default=0.05,
+                        help="share of seeded reminders that are still active")
+    parser.add_argument("--workloads", nargs="+",
+                        default=['create_reminder', 'get_active_reminders', 'get_due_reminders',
+                                 'join_event', 'log_event', 'get_guild_events',
+                                 'search_reminders', 'search_events'])
+    parser.add_argument("--no-mixed", dest="mixed", action="store_false",
+                        help="skip the run with every workload at once")
+    parser.add_argument("--concurrency", type=int, default=8, help="callers per workload")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per run")
+    parser.add_argument("--read-pool-size", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1234)
+    parser.add_argument("--db", help="database file (seeded only if it does not exist yet)")
+    parser.add_argument("--keep", action="store_true", help="keep the database file afterwards")
+    parser.add_argument("--output", help="write results as JSON to this file")
+    parser.add_argument("--compare", help="JSON results of an earlier run to compare against")
+    args = parser.parse_args()
+
+    # Slow statements are expected under load and show up in query_stats instead
+    logging.getLogger('bot.database').setLevel(logging.ERROR)
+
+    counts = {
+        name: int(getattr(args, name) * args.scale)
+        for name in ('users', 'events', 'reminders', 'logs')
+    }
+    # Without --db everything lives in a scratch directory that is removed afterwards
+    scratch = None if args.db else tempfile.mkdtemp(prefix="db_benchmark_")
+    path = args.db or os.path.join(scratch, "bench.db")
+    telemetry_path = DatabaseManager(path).telemetry_path
+    seed_timings = {}
+    try:
+        if not os.path.exists(path):
+            print(f"Seeding {path}: " + ", ".join(f"{v:,} {k}" for k, v in counts.items()), flush=True)
+            # Let the migrations create the schema, then bulk-load with plain sqlite3
+            async def create_schema():
+                db = DatabaseManager(path, maintenance=False)
+                try:
+                    await db.init_database()
+                finally:
+                    await db.close()
+            asyncio.run(create_schema())
+            seed_timings = seed(path, telemetry_path, counts['users'], counts['events'], counts['reminders'],
+                                counts['logs'], args.participants_per_event, args.active_fraction,
+                                random.Random(args.seed))
+        db_bytes = os.path.getsize(path) + os.path.getsize(telemetry_path)
+
+        print(f"Running {args.concurrency} callers per workload for {args.duration:g}s each", flush=True)
+        outcome = asyncio.run(run(args, path, counts))
+    finally:
+        if scratch and not args.keep:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'git_commit': git_commit(),
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'args': vars(args),
+        'counts': counts,
+        'db_bytes': db_bytes,
+        'seed_seconds': seed_timings,
+        **outcome
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            baseline = json.load(f)['workloads']
+    print_table(report['workloads'], baseline)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+if __name__ == "__main__":
+    main()
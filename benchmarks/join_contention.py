@@ -0,0 +1,83 @@
+"""
+Join contention check: thousands of simultaneous joins on a capped event
+
+Creates a throwaway database, then fires every join at once through
+several independent DatabaseManagers (separate writer connections, so the
+joins really contend for SQLite's write lock, like several bot processes
+would).  Verifies that exactly max_participants users got in, that
+participant_count matches event_participants, and that repeat clicks are
+reported as already joined.  Exits non-zero on any mismatch.
+
+Usage: python benchmarks/join_contention.py [--joins 5000] [--capacity 100] [--managers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from collections import Counter
+from pathlib import Path
+
+# Allow running from a checkout without installing anything
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.database import DatabaseManager
+from utils.records import JoinResult
+from utils.timeutil import now_epoch
+
+async def run(joins: int, capacity: int, managers: int) -> bool:
+    path = os.path.join(tempfile.mkdtemp(), "join_contention.db")
+    dbs = [DatabaseManager(path, maintenance=False) for _ in range(managers)]
+    try:
+        for db in dbs:
+            await db.init_database()
+        event_id = await dbs[0].create_event(
+            "Contention", "", 1, 1, 1, now_epoch() + 86400, max_participants=capacity
+        )
+
+        # Every tenth user clicks twice
+        users = list(range(joins)) + list(range(0, joins, 10))
+        start = time.perf_counter()
+        results = await asyncio.gather(*(
+            dbs[i % managers].join_event(event_id, user_id) for i, user_id in enumerate(users)
+        ))
+        elapsed = time.perf_counter() - start
+
+        counts = Counter(results)
+        event = await dbs[0].get_event(event_id)
+        participants = await dbs[0].get_event_participants(event_id)
+
+        print(f"{len(users)} joins ({joins} users, capacity {capacity}, {managers} writers) "
+              f"in {elapsed:.2f}s, {len(users) / elapsed:.0f} joins/s")
+        for result in JoinResult:
+            print(f"  {result.value:<15} {counts[result]}")
+        print(f"  participant_count {event.participant_count}, rows {len(participants)}")
+
+        expected = min(joins, capacity) if capacity > 0 else joins
+        ok = (
+            counts[JoinResult.JOINED] == expected
+            and event.participant_count == expected
+            and len(participants) == expected == len(set(participants))
+            and counts[JoinResult.JOINED] + counts[JoinResult.ALREADY_JOINED]
+                + counts[JoinResult.FULL] == len(users)
+        )
+        print("OK" if ok else "FAILED")
+        return ok
+    finally:
+        for db in dbs:
+            await db.close()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--joins", type=int, default=5000)
+    parser.add_argument("--capacity", type=int, default=100)
+    parser.add_argument("--managers", type=int, default=4)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.joins, args.capacity, args.managers))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Reader pool fairness check: many tasks looping on reads through a small pool
+
+Creates a throwaway database and runs more reader tasks than the pool has
+connections, each one reading in a tight loop for a few seconds.  Half the
+tasks release and immediately re-borrow a reader; the other half are the
+occasional readers they would starve if the pool let a returning task
+take a connection back ahead of the ones already waiting.  Prints reads
+and worst wait per task and exits non-zero if any task falls far behind.
+
+Usage: python benchmarks/reader_fairness.py [--tasks 16] [--readers 4] [--seconds 2]
+"""
+
+import argparse
+import asyncio
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Allow running from a checkout without installing anything
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.database import ConnectionPool
+
+async def reader_task(pool: ConnectionPool, deadline: float, yield_between: bool):
+    reads, worst_wait = 0, 0.0
+    while time.perf_counter() < deadline:
+        asked = time.perf_counter()
+        async with pool.reader() as db:
+            worst_wait = max(worst_wait, time.perf_counter() - asked)
+            async with db.execute("SELECT COUNT(*) FROM items") as cursor:
+                await cursor.fetchone()
+        reads += 1
+        if yield_between:
+            await asyncio.sleep(0)
+    return reads, worst_wait
+
+async def run(tasks: int, readers: int, seconds: float) -> bool:
+    directory = tempfile.mkdtemp(prefix="reader_fairness_")
+    pool = ConnectionPool(os.path.join(directory, "fairness.db"), read_pool_size=readers)
+    try:
+        await pool.open()
+        async with pool.writer() as db:
+            await db.execute("CREATE TABLE items (id INTEGER PRIMARY KEY)")
+            await db.executemany("INSERT INTO items DEFAULT VALUES", [()] * 1000)
+
+        deadline = time.perf_counter() + seconds
+        # Even tasks re-borrow straight away, odd ones yield to the loop in between
+        results = await asyncio.gather(*(
+            reader_task(pool, deadline, yield_between=i % 2 == 1) for i in range(tasks)
+        ))
+
+        counts = [reads for reads, _ in results]
+        worst = max(wait for _, wait in results)
+        greedy, polite = sum(counts[0::2]), sum(counts[1::2])
+        print(f"{tasks} tasks on {readers} readers for {seconds}s: "
+              f"{sum(counts)} reads (re-borrowing {greedy}, yielding {polite})")
+        print(f"  per task min {min(counts)}, max {max(counts)}; worst wait {worst * 1000:.1f}ms")
+
+        # FIFO hand-off keeps every task within a small factor of the busiest
+        ok = min(counts) * 4 >= max(counts) and worst < seconds / 4
+        print("OK" if ok else "FAILED")
+        return ok
+    finally:
+        await pool.close()
+        shutil.rmtree(directory, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    ok = asyncio.run(run(args.tasks, args.readers, args.seconds))
+    sys.exit(0 if ok else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Row materialization benchmark: dict(aiosqlite.Row) vs slotted records
+
+Seeds an in-memory reminders table and times the reminder scan both ways,
+reporting wall time and peak traced memory for the materialized list.
+
+Usage: python benchmarks/records_benchmark.py [--rows 100000] [--repeat 5]
+"""
+
+import argparse
+import sqlite3
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Allow running from a checkout without installing anything
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.records import Reminder
+
+def seed(rows: int) -> sqlite3.Connection:
+    conn = sqlite3.connect(":memory:")
+    conn.execute(f"""
+        CREATE TABLE reminders (
+            id INTEGER PRIMARY KEY, user_id INTEGER, guild_id INTEGER, channel_id INTEGER,
+            message TEXT, remind_time INTEGER, created_at INTEGER, is_recurring BOOLEAN,
+            recurring_pattern TEXT, status TEXT
+        )
+    """)
+    conn.executemany(
+        "INSERT INTO reminders VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (
+            (i, 1000 + i % 5000, 42, 7, f"Reminder message number {i}",
+             1893499200, 1735732800, i % 7 == 0,
+             "daily" if i % 7 == 0 else None, "active")
+            for i in range(1, rows + 1)
+        )
+    )
+    return conn
+
+def scan_dicts(conn: sqlite3.Connection):
+    conn.row_factory = sqlite3.Row
+    rows = conn.execute("SELECT * FROM reminders WHERE status = 'active' ORDER BY id").fetchall()
+    return [dict(row) for row in rows]
+
+def scan_records(conn: sqlite3.Connection):
+    conn.row_factory = None
+    rows = conn.execute(
+        f"SELECT {Reminder.COLUMNS} FROM reminders WHERE status = 'active' ORDER BY id"
+    ).fetchall()
+    return [Reminder.from_row(row) for row in rows]
+
+def measure(fn, conn, repeat: int):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(conn)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    result = fn(conn)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return best, peak
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    conn = seed(args.rows)
+    print(f"{args.rows} active reminders, best of {args.repeat}")
+    results = {}
+    for name, fn in (("dict(Row)", scan_dicts), ("Reminder", scan_records)):
+        elapsed, peak = measure(fn, conn, args.repeat)
+        results[name] = (elapsed, peak)
+        print(f"  {name:<10} {elapsed * 1000:8.1f} ms  peak {peak / 1024 / 1024:7.1f} MiB")
+
+    (dict_time, dict_mem), (rec_time, rec_mem) = results.values()
+    print(f"  speedup {dict_time / rec_time:.2f}x, memory {dict_mem / rec_mem:.2f}x smaller")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,225 @@
+import discord
+from discord.ext import commands
+from discord import app_commands
+from datetime import datetime
+from typing import Optional
+
+from utils.database import db_manager
+from utils.logging_config import get_database_log_stats, get_log_rate_stats, get_logger, log_command, log_error
+from bot.config import Colors, Emojis
+
+STATEMENTS_PER_EMBED = 10
+
+SORT_CHOICES = [
+    app_commands.Choice(name="Tổng thời gian", value="total_ms"),
+    app_commands.Choice(name="Số lần gọi", value="count"),
+    app_commands.Choice(name="p99", value="p99_ms"),
+    app_commands.Choice(name="Chậm nhất", value="max_ms"),
+    app_commands.Choice(name="Số truy vấn chậm", value="slow"),
+]
+
+def format_bytes(size: int) -> str:
+    """Human-readable byte count"""
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.1f} {unit}" if unit != 'B' else f"{size} B"
+        size /= 1024
+
+class Admin(commands.Cog):
+    """Administrator-only diagnostics for the bot's database"""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.logger = get_logger('admin')
+
+    async def cog_load(self):
+        """Called when the cog is loaded"""
+        self.logger.info("Admin cog loaded successfully")
+
+    def build_stats_embed(self, sort_by: str) -> discord.Embed:
+        """Busiest statements plus cache, WAL and background job counters"""
+        embed = discord.Embed(
+            title="🗄️ Thống kê cơ sở dữ liệu",
+            color=Colors.INFO,
+            timestamp=datetime.utcnow()
+        )
+
+        query_stats = db_manager.get_query_stats(limit=STATEMENTS_PER_EMBED, sort_by=sort_by)
+        if query_stats is None:
+            embed.description = "Đo truy vấn đang tắt (DATABASE_QUERY_STATS=false)."
+        else:
+            summary = query_stats['summary']
+            since = datetime.fromtimestamp(summary['since']).strftime('%d/%m/%Y %H:%M')
+            embed.description = (
+                f"**{summary['queries']}** truy vấn, **{summary['statements']}** câu lệnh, "
+                f"tổng **{summary['total_ms']:.0f} ms** từ {since}\n"
+                f"Chậm (≥ {summary['slow_query_ms']:.0f} ms): **{summary['slow']}**, "
+                f"lỗi: **{summary['errors']}**"
+            )
+            lines = [
+                f"`{s['name']}` ×{s['count']} · {s['total_ms']:.0f} ms · "
+                f"p50 {s['p50_ms']} · p99 {s['p99_ms']} · max {s['max_ms']:.1f}"
+                for s in query_stats['statements']
+            ]
+            if lines:
+                embed.add_field(name="📊 Câu lệnh", value="\n".join(lines)[:1024], inline=False)
+
+        cache_lines = [
+            f"{name}: {stats['hit_rate'] * 100:.1f}% hit ({stats['size']}/{stats['max_entries']})"
+            for name, stats in db_manager.get_cache_stats().items()
+        ]
+        embed.add_field(name="💾 Cache", value="\n".join(cache_lines), inline=True)
+
+        wal = db_manager.get_wal_stats()
+        embed.add_field(name="📝 WAL", value=format_bytes(wal['wal_bytes']), inline=True)
+
+        activity = db_manager.get_activity_stats()
+        embed.add_field(
+            name="💬 Hoạt động",
+            value=f"{activity['messages']} tin nhắn, {activity['pending_users']} chờ ghi",
+            inline=True
+        )
+
+        log_stats = get_database_log_stats()
+        if log_stats:
+            embed.add_field(
+                name="📜 Log vào DB",
+                value=(
+                    f"{log_stats['written']} đã ghi, {log_stats['pending']} đang chờ\n"
+                    f"Bỏ {log_stats['dropped']} (đầy hàng đợi), lỗi {log_stats['failed']}"
+                ),
+                inline=True
+            )
+        
+        rate_stats = get_log_rate_stats()
+        if rate_stats:
+            embed.add_field(
+                name="🔇 Log lặp lại",
+                value=(
+                    f"Bỏ {rate_stats['suppressed']}, lấy mẫu {rate_stats['sampled']}\n"
+                    f"{rate_stats['keys']} loại hành động"
+                ),
+                inline=True
+            )
+        
+        retention = db_manager.get_retention_stats()
+        if retention:
+            deleted = ", ".join(f"{table}: {count}" for table, count in retention['deleted'].items())
+            embed.add_field(
+                name="🧹 Dọn dữ liệu gần nhất",
+                value=f"{deleted}\nGiải phóng {format_bytes(retention['bytes_reclaimed'])}",
+                inline=False
+            )
+        
+        partitions = db_manager.get_partition_stats()
+        if partitions:
+            embed.add_field(
+                name="🗂️ Phân vùng",
+                value=(
+                    f"{partitions['files']}/{partitions['partitions']} file, "
+                    f"{partitions['open']}/{partitions['max_open']} đang mở\n"
+                    f"Mở {partitions['opens']} lần, đóng bớt {partitions['evictions']} lần"
+                ),
+                inline=True
+            )
+        
+        backup = db_manager.get_backup_stats()
+        if backup:
+            embed.add_field(
+                name="💾 Sao lưu gần nhất",
+                value=f"{format_bytes(backup['bytes'])} · {backup['seconds']}s\n`{backup['path']}`",
+                inline=False
+            )
+        return embed
+
+    @app_commands.command(name="db_stats", description="Thống kê truy vấn cơ sở dữ liệu (admin)")
+    @app_commands.default_permissions(administrator=True)
+    @app_commands.choices(sort=SORT_CHOICES)
+    async def db_stats(self, interaction: discord.Interaction,
+                       sort: Optional[app_commands.Choice[str]] = None,
+                       reset: bool = False):
+        """Show per-statement timings and database health"""
+        try:
+            embed = self.build_stats_embed(sort.value if sort else "total_ms")
+            if reset:
+                db_manager.reset_query_stats()
+                embed.set_footer(text="Đã đặt lại thống kê truy vấn")
+            await interaction.response.send_message(embed=embed, ephemeral=True)
+            log_command("db_stats", interaction.user.id, interaction.guild.id if interaction.guild else None, True)
+        except Exception as e:
+            log_error(e, "db_stats", interaction.user.id, interaction.guild.id if interaction.guild else None)
+            await interaction.response.send_message(
+                f"{Emojis.ERROR} Không thể tải thống kê cơ sở dữ liệu!",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="db_backup", description="Sao lưu cơ sở dữ liệu ngay (admin)")
+    @app_commands.default_permissions(administrator=True)
+    async def db_backup(self, interaction: discord.Interaction):
+        """Take an online backup now"""
+        await interaction.response.defer(ephemeral=True)
+        try:
+            report = await db_manager.backup()
+            await interaction.followup.send(
+                f"{Emojis.SUCCESS} Đã sao lưu {format_bytes(report['bytes'])} "
+                f"trong {report['seconds']}s vào `{report['path']}`",
+                ephemeral=True
+            )
+            log_command("db_backup", interaction.user.id, interaction.guild.id if interaction.guild else None, True)
+        except Exception as e:
+            log_error(e, "db_backup", interaction.user.id, interaction.guild.id if interaction.guild else None)
+            await interaction.followup.send(
+                f"{Emojis.ERROR} Sao lưu cơ sở dữ liệu thất bại!",
+                ephemeral=True
+            )
+
+    @app_commands.command(name="db_query", description="Chi tiết một câu lệnh SQL (admin)")
+    @app_commands.default_permissions(administrator=True)
+    async def db_query(self, interaction: discord.Interaction, name: str):
+        """Show SQL, latency histogram and captured plan for one statement"""
+        query_stats = db_manager.get_query_stats()
+        statement = next(
+            (s for s in (query_stats or {}).get('statements', []) if s['name'] == name),
+            None
+        )
+        if statement is None:
+            await interaction.response.send_message(
+                f"{Emojis.ERROR} Không tìm thấy câu lệnh `{name}`!",
+                ephemeral=True
+            )
+            return
+
+        embed = discord.Embed(
+            title=f"🔍 {statement['name']}",
+            description=f"```sql\n{statement['sql'][:3900]}\n```",
+            color=Colors.INFO
+        )
+        embed.add_field(
+            name="⏱️ Thời gian",
+            value=(
+                f"×{statement['count']} · tổng {statement['total_ms']:.1f} ms · "
+                f"TB {statement['mean_ms']:.2f} ms\n"
+                f"p50 {statement['p50_ms']} · p95 {statement['p95_ms']} · "
+                f"p99 {statement['p99_ms']} · max {statement['max_ms']:.1f} ms"
+            ),
+            inline=False
+        )
+        histogram = "\n".join(
+            f"{bucket:>9} {hits}" for bucket, hits in statement['histogram'].items() if hits
+        )
+        embed.add_field(name="📊 Phân bố", value=f"```\n{histogram or '-'}\n```", inline=False)
+        if statement['plan'] is not None:
+            plan = "\n".join(statement['plan']) or "(không có bước nào)"
+            embed.add_field(name="🧭 Query plan", value=f"```\n{plan[:1000]}\n```", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    @db_query.autocomplete('name')
+    async def db_query_autocomplete(self, interaction: discord.Interaction, current: str):
+        query_stats = db_manager.get_query_stats() or {'statements': []}
+        return [
+            app_commands.Choice(name=s['name'], value=s['name'])
+            for s in query_stats['statements'] if current.lower() in s['name'].lower()
+        ][:25]
+
+async def setup(bot: commands.Bot):
+    await bot.add_cog(Admin(bot))
@@ -6,9 +6,16 @@ from typing import Optional, List
 import asyncio
 
 from utils.database import db_manager
-from utils.logging_config import get_logger, log_command, log_error, log_user_action
+from utils.logging_config import (
+    get_logger, log_command, log_error, log_user_action, bind_interaction_context
+)
+from utils.pagination import PaginatedView
+from utils.records import JoinResult, Page
+from utils.timeutil import format_epoch, to_epoch
 from bot.config import Colors, Emojis
 
+EVENTS_PER_PAGE = 10
+
 class EventView(discord.ui.View):
     """View for event interaction buttons"""
     
@@ -16,13 +23,18 @@ class EventView(discord.ui.View):
         super().__init__(timeout=None)
         self.event_id = event_id
     
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Button clicks log with the clicking user's context"""
+        bind_interaction_context(interaction)
+        return True
+    
     @discord.ui.button(label="Tham gia", style=discord.ButtonStyle.green, emoji="✅")
     async def join_event(self, interaction: discord.Interaction, button: discord.ui.Button):
         """Join an event"""
         try:
-            success = await db_manager.join_event(self.event_id, interaction.user.id)
+            result = await db_manager.join_event(self.event_id, interaction.user.id)
             
-            if success:
+            if result is JoinResult.JOINED:
                 await interaction.response.send_message(
                     "✅ Bạn đã tham gia sự kiện thành công!",
                     ephemeral=True
@@ -33,11 +45,21 @@ class EventView(discord.ui.View):
                     interaction.guild.id,
                     f"Joined event {self.event_id}"
                 )
-            else:
+            elif result is JoinResult.ALREADY_JOINED:
                 await interaction.response.send_message(
                     "❌ Bạn đã tham gia sự kiện này rồi!",
                     ephemeral=True
                 )
+            elif result is JoinResult.FULL:
+                await interaction.response.send_message(
+                    "❌ Sự kiện đã đủ số người tham gia!",
+                    ephemeral=True
+                )
+            else:
+                await interaction.response.send_message(
+                    "❌ Sự kiện không tồn tại!",
+                    ephemeral=True
+                )
         except Exception as e:
             log_error(e, "join_event", interaction.user.id, interaction.guild.id)
             await interaction.response.send_message(
@@ -89,7 +111,7 @@ class EventView(discord.ui.View):
                 return
             
             embed = discord.Embed(
-                title=f"👥 Thành viên tham gia: {event['title']}",
+                title=f"👥 Thành viên tham gia: {event.title}",
                 color=0x0099ff,
                 timestamp=datetime.utcnow()
             )
@@ -184,7 +206,7 @@ class EventManagement(commands.Cog):
                 creator_id=interaction.user.id,
                 guild_id=interaction.guild.id,
                 channel_id=interaction.channel.id,
-                event_date=event_date.isoformat(),
+                event_date=to_epoch(event_date),
                 max_participants=max_participants or -1
             )
             
@@ -244,15 +266,49 @@ class EventManagement(commands.Cog):
                 ephemeral=True
             )
     
+    def build_events_embed(self, page: Page, page_number: int, total_events: Optional[int] = None,
+                           title: str = "📅 Danh sách sự kiện") -> discord.Embed:
+        """Render one page of events"""
+        embed = discord.Embed(
+            title=title,
+            color=0x0099ff,
+            timestamp=datetime.utcnow()
+        )
+        
+        for event in page.items:
+            field_value = f"📝 {event.description}\n"
+            field_value += f"📅 {format_epoch(event.event_date)}\n"
+            field_value += f"👥 {event.participant_count} người tham gia"
+            
+            if event.max_participants > 0:
+                field_value += f"/{event.max_participants}"
+            
+            embed.add_field(
+                name=f"🎉 {event.title} (ID: {event.id})",
+                value=field_value,
+                inline=False
+            )
+        
+        if total_events is None:
+            embed.set_footer(text=f"Trang {page_number}")
+        else:
+            embed.set_footer(text=f"Trang {page_number} • Tổng cộng {total_events} sự kiện")
+        return embed
+    
     @app_commands.command(name="list_events", description="Xem danh sách sự kiện")
     async def list_events(self, interaction: discord.Interaction):
         """List all active events in the guild"""
         try:
             await interaction.response.defer()
             
-            events = await db_manager.get_guild_events(interaction.guild.id)
+            guild_id = interaction.guild.id
             
-            if not events:
+            async def fetch_page(**cursor) -> Page:
+                return await db_manager.get_guild_events_page(guild_id, limit=EVENTS_PER_PAGE, **cursor)
+            
+            page = await fetch_page()
+            
+            if not page.items:
                 embed = discord.Embed(
                     title="📅 Danh sách sự kiện",
                     description="Hiện tại không có sự kiện nào.",
@@ -261,38 +317,63 @@ class EventManagement(commands.Cog):
                 await interaction.followup.send(embed=embed)
                 return
             
-            embed = discord.Embed(
-                title="📅 Danh sách sự kiện",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
+            if page.next_cursor is None:
+                await interaction.followup.send(embed=self.build_events_embed(page, 1, len(page.items)))
+                return
+            
+            total_events = await db_manager.count_guild_events(guild_id)
+            view = PaginatedView(
+                fetch_page,
+                lambda page, number: self.build_events_embed(page, number, total_events),
+                page,
+                interaction.user.id
             )
+            await interaction.followup.send(embed=self.build_events_embed(page, 1, total_events), view=view)
             
-            for event in events[:10]:  # Limit to 10 events
-                event_date = datetime.fromisoformat(event['event_date'])
-                participants = await db_manager.get_event_participants(event['id'])
-                
-                field_value = f"📝 {event['description']}\n"
-                field_value += f"📅 {event_date.strftime('%d/%m/%Y %H:%M')}\n"
-                field_value += f"👥 {len(participants)} người tham gia"
-                
-                if event['max_participants'] > 0:
-                    field_value += f"/{event['max_participants']}"
-                
-                embed.add_field(
-                    name=f"🎉 {event['title']} (ID: {event['id']})",
-                    value=field_value,
-                    inline=False
+        except Exception as e:
+            log_error(e, "list_events", interaction.user.id, interaction.guild.id)
+            await interaction.followup.send(
+                "❌ Có lỗi xảy ra khi tải danh sách sự kiện!",
+                ephemeral=True
+            )
+    
+    @app_commands.command(name="search_events", description="Tìm kiếm sự kiện theo tên hoặc mô tả")
+    async def search_events(self, interaction: discord.Interaction, query: str):
+        """Full-text search over the guild's active events, best match first"""
+        try:
+            await interaction.response.defer()
+            
+            guild_id = interaction.guild.id
+            title = f"🔍 Sự kiện khớp với \"{query[:100]}\""
+            
+            async def fetch_page(**cursor) -> Page:
+                return await db_manager.search_guild_events(guild_id, query, limit=EVENTS_PER_PAGE, **cursor)
+            
+            def render(page: Page, page_number: int) -> discord.Embed:
+                return self.build_events_embed(page, page_number, title=title)
+            
+            page = await fetch_page()
+            
+            if not page.items:
+                embed = discord.Embed(
+                    title=title,
+                    description="Không tìm thấy sự kiện nào.",
+                    color=0xffa500
                 )
+                await interaction.followup.send(embed=embed)
+                return
             
-            if len(events) > 10:
-                embed.set_footer(text=f"Hiển thị 10/{len(events)} sự kiện")
+            if page.next_cursor is None:
+                await interaction.followup.send(embed=render(page, 1))
+                return
             
-            await interaction.followup.send(embed=embed)
+            view = PaginatedView(fetch_page, render, page, interaction.user.id)
+            await interaction.followup.send(embed=render(page, 1), view=view)
             
         except Exception as e:
-            log_error(e, "list_events", interaction.user.id, interaction.guild.id)
+            log_error(e, "search_events", interaction.user.id, interaction.guild.id)
             await interaction.followup.send(
-                "❌ Có lỗi xảy ra khi tải danh sách sự kiện!",
+                "❌ Có lỗi xảy ra khi tìm kiếm sự kiện!",
                 ephemeral=True
             )
     
@@ -310,50 +391,46 @@ class EventManagement(commands.Cog):
                 )
                 return
             
-            participants = await db_manager.get_event_participants(event_id)
-            event_date = datetime.fromisoformat(event['event_date'])
-            created_date = datetime.fromisoformat(event['created_at'])
-            
             embed = discord.Embed(
-                title=f"🎉 {event['title']}",
-                description=event['description'],
+                title=f"🎉 {event.title}",
+                description=event.description,
                 color=0x0099ff,
                 timestamp=datetime.utcnow()
             )
             
             embed.add_field(
                 name="📅 Thời gian sự kiện",
-                value=event_date.strftime("%d/%m/%Y %H:%M"),
+                value=format_epoch(event.event_date),
                 inline=True
             )
             
             embed.add_field(
                 name="📝 Ngày tạo",
-                value=created_date.strftime("%d/%m/%Y %H:%M"),
+                value=format_epoch(event.created_at),
                 inline=True
             )
             
             embed.add_field(
                 name="🆔 Event ID",
-                value=str(event['id']),
+                value=str(event.id),
                 inline=True
             )
             
             embed.add_field(
                 name="👥 Số người tham gia",
-                value=f"{len(participants)}" + (f"/{event['max_participants']}" if event['max_participants'] > 0 else ""),
+                value=f"{event.participant_count}" + (f"/{event.max_participants}" if event.max_participants > 0 else ""),
                 inline=True
             )
             
             embed.add_field(
                 name="📊 Trạng thái",
-                value=event['status'].title(),
+                value=event.status.title(),
                 inline=True
             )
             
             # Add creator info
             try:
-                creator = await self.bot.fetch_user(event['creator_id'])
+                creator = await self.bot.fetch_user(event.creator_id)
                 embed.add_field(
                     name="👤 Người tạo",
                     value=creator.mention,
@@ -362,7 +439,7 @@ class EventManagement(commands.Cog):
             except:
                 embed.add_field(
                     name="👤 Người tạo",
-                    value=f"User ID: {event['creator_id']}",
+                    value=f"User ID: {event.creator_id}",
                     inline=True
                 )
             
@@ -402,7 +479,7 @@ class EventManagement(commands.Cog):
                 creator_id=ctx.author.id,
                 guild_id=ctx.guild.id,
                 channel_id=ctx.channel.id,
-                event_date=event_date.isoformat()
+                event_date=to_epoch(event_date)
             )
             
             embed = discord.Embed(
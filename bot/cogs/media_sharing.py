@@ -10,8 +10,13 @@ import asyncio
 
 from utils.database import db_manager
 from utils.logging_config import get_logger, log_command, log_error, log_user_action
+from utils.pagination import PaginatedView
+from utils.records import Page
+from utils.timeutil import format_epoch
 from bot.config import Colors, Emojis
 
+MEDIA_PER_PAGE = 10
+
 class MediaSharing(commands.Cog):
     """Cog for media sharing functionality with Discord SDK integration"""
     
@@ -268,6 +273,65 @@ class MediaSharing(commands.Cog):
                 ephemeral=True
             )
     
+    def build_media_embed(self, page: Page, page_number: int, query: str) -> discord.Embed:
+        """Render one page of media search results"""
+        embed = discord.Embed(
+            title=f"🔍 Media khớp với \"{query[:100]}\"",
+            color=0x0099ff,
+            timestamp=datetime.utcnow()
+        )
+        
+        for share in page.items:
+            field_value = f"📝 {share.description}\n"
+            field_value += f"🌐 {share.media_url}\n"
+            field_value += f"👤 <@{share.user_id}> • 📅 {format_epoch(share.shared_at)}"
+            
+            embed.add_field(
+                name=f"🎭 {share.media_type.title()} #{share.id}",
+                value=field_value[:1024],
+                inline=False
+            )
+        
+        embed.set_footer(text=f"Trang {page_number}")
+        return embed
+    
+    @app_commands.command(name="search_media", description="Tìm kiếm media đã chia sẻ theo mô tả")
+    async def search_media(self, interaction: discord.Interaction, query: str):
+        """Full-text search over descriptions of media shared in this server"""
+        try:
+            await interaction.response.defer()
+            
+            guild_id = interaction.guild.id
+            
+            async def fetch_page(**cursor) -> Page:
+                return await db_manager.search_media_shares(guild_id, query, limit=MEDIA_PER_PAGE, **cursor)
+            
+            def render(page: Page, page_number: int) -> discord.Embed:
+                return self.build_media_embed(page, page_number, query)
+            
+            page = await fetch_page()
+            
+            if not page.items:
+                await interaction.followup.send(
+                    f"🔍 Không tìm thấy media nào khớp với \"{query[:100]}\".",
+                    ephemeral=True
+                )
+                return
+            
+            if page.next_cursor is None:
+                await interaction.followup.send(embed=render(page, 1))
+                return
+            
+            view = PaginatedView(fetch_page, render, page, interaction.user.id)
+            await interaction.followup.send(embed=render(page, 1), view=view)
+            
+        except Exception as e:
+            log_error(e, "search_media", interaction.user.id, interaction.guild.id)
+            await interaction.followup.send(
+                "❌ Có lỗi xảy ra khi tìm kiếm media!",
+                ephemeral=True
+            )
+    
     @commands.command(name="upload", help="Upload và chia sẻ file")
     async def upload_file(self, ctx: commands.Context, *, description: str = None):
         """Upload file via message attachment"""
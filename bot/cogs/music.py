@@ -10,7 +10,7 @@ from collections import deque
 
 from utils.database import db_manager
 from utils.logging_config import get_logger, log_command, log_error, log_user_action
-from bot.config import Colors, Emojis
+from bot.config import Colors, Config, Emojis
 
 class MusicQueue:
     """Enhanced music queue with additional features"""
@@ -84,7 +84,13 @@ class Music(commands.Cog):
             channel = ctx.author.voice.channel
             if ctx.guild.id not in self.voice_clients:
                 self.voice_clients[ctx.guild.id] = await channel.connect()
-                self.volumes[ctx.guild.id] = 0.5  # Default volume
+                # Bắt đầu với âm lượng người dùng đã chọn lần trước
+                volume = int(Config.DEFAULT_VOLUME * 100)
+                try:
+                    volume = await db_manager.get_user_setting(ctx.author.id, 'music_volume', volume)
+                except Exception:
+                    self.logger.exception("Failed to load music volume for user %s", ctx.author.id)
+                self.volumes[ctx.guild.id] = volume / 100.0
                 await ctx.send(f"{Emojis.MUSIC} Đã kết nối với kênh thoại: **{channel.name}**")
             else:
                 await ctx.send("Bot đã có mặt trong kênh thoại.")
@@ -139,7 +145,7 @@ class Music(commands.Cog):
                     'thumbnail': info.get('thumbnail', '')
                 }
             except Exception as e:
-                self.logger.error(f"Error searching YouTube: {e}")
+                self.logger.error("Error searching YouTube: %s", e)
                 return None
 
     def create_audio_source(self, url: str, volume: float = 0.5):
@@ -204,7 +210,7 @@ class Music(commands.Cog):
                     self.bot.loop
                 )
         except Exception as e:
-            self.logger.error(f"Error in play_next_sync: {e}")
+            self.logger.error("Error in play_next_sync: %s", e)
     
     async def send_queue_finished_message(self, guild_id: int):
         """Gửi thông báo hết queue"""
@@ -356,6 +362,13 @@ class Music(commands.Cog):
             await ctx.send(f"{Emojis.ERROR} Âm lượng phải từ 0 đến 100.")
             return
 
+        # Ghi nhớ làm âm lượng mặc định của người dùng; lỗi database không
+        # được chặn việc đổi âm lượng cho lần phát này
+        try:
+            await db_manager.set_user_setting(ctx.author.id, 'music_volume', volume, ctx.author.name)
+        except Exception:
+            self.logger.exception("Failed to save music volume for user %s", ctx.author.id)
+
         voice_client = self.voice_clients.get(ctx.guild.id)
         if voice_client and voice_client.source:
             # Lưu volume setting
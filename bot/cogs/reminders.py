@@ -9,9 +9,14 @@ import threading
 import time
 
 from utils.database import db_manager
+from utils.records import Page, Reminder
 from utils.logging_config import get_logger, log_command, log_error, log_user_action
+from utils.pagination import PaginatedView
+from utils.timeutil import format_epoch, from_epoch, to_epoch
 from bot.config import Colors, Emojis
 
+REMINDERS_PER_PAGE = 10
+
 class ReminderSystem(commands.Cog):
     """Advanced reminder system with scheduling capabilities"""
     
@@ -46,47 +51,42 @@ class ReminderSystem(commands.Cog):
     async def reminder_check_task(self):
         """Check for due reminders every minute"""
         try:
-            reminders = await db_manager.get_active_reminders()
-            current_time = datetime.now()
-            
-            for reminder in reminders:
-                remind_time = datetime.fromisoformat(reminder['remind_time'])
+            # Only due rows come back; the time filter runs in SQL on the index
+            for reminder in await db_manager.get_due_reminders():
+                await self.send_reminder(reminder)
                 
-                if remind_time <= current_time:
-                    await self.send_reminder(reminder)
-                    
-                    if reminder['is_recurring'] and reminder['recurring_pattern']:
-                        await self.schedule_next_occurrence(reminder)
-                    else:
-                        await db_manager.complete_reminder(reminder['id'])
+                if reminder.is_recurring and reminder.recurring_pattern:
+                    await self.schedule_next_occurrence(reminder)
+                else:
+                    await db_manager.complete_reminder(reminder.id)
                         
         except Exception as e:
-            self.logger.error(f"Error in reminder check task: {e}")
+            self.logger.error("Error in reminder check task: %s", e)
     
     @reminder_check_task.before_loop
     async def before_reminder_check(self):
         """Wait until the bot is ready before starting the task"""
         await self.bot.wait_until_ready()
     
-    async def send_reminder(self, reminder: dict):
+    async def send_reminder(self, reminder: Reminder):
         """Send a reminder to the user"""
         try:
-            channel = self.bot.get_channel(reminder['channel_id'])
+            channel = self.bot.get_channel(reminder.channel_id)
             if not channel:
-                self.logger.warning(f"Channel {reminder['channel_id']} not found for reminder {reminder['id']}")
+                self.logger.warning("Channel %s not found for reminder %s", reminder.channel_id, reminder.id)
                 return
             
-            user = self.bot.get_user(reminder['user_id'])
+            user = self.bot.get_user(reminder.user_id)
             if not user:
                 try:
-                    user = await self.bot.fetch_user(reminder['user_id'])
+                    user = await self.bot.fetch_user(reminder.user_id)
                 except:
-                    self.logger.warning(f"User {reminder['user_id']} not found for reminder {reminder['id']}")
+                    self.logger.warning("User %s not found for reminder %s", reminder.user_id, reminder.id)
                     return
             
             embed = discord.Embed(
                 title="🔔 Nhắc nhở!",
-                description=reminder['message'],
+                description=reminder.message,
                 color=0xff6b6b,
                 timestamp=datetime.utcnow()
             )
@@ -97,32 +97,32 @@ class ReminderSystem(commands.Cog):
                 inline=True
             )
             
-            if reminder['is_recurring']:
+            if reminder.is_recurring:
                 embed.add_field(
                     name="🔄 Loại",
                     value="Nhắc nhở định kỳ",
                     inline=True
                 )
             
-            embed.set_footer(text=f"Reminder ID: {reminder['id']}")
+            embed.set_footer(text=f"Reminder ID: {reminder.id}")
             
             await channel.send(content=user.mention, embed=embed)
             
             log_user_action(
                 "reminder_sent",
-                reminder['user_id'],
-                reminder['guild_id'],
-                f"Reminder sent: {reminder['message'][:50]}..."
+                reminder.user_id,
+                reminder.guild_id,
+                f"Reminder sent: {reminder.message[:50]}..."
             )
             
         except Exception as e:
-            log_error(e, "send_reminder", reminder['user_id'], reminder['guild_id'])
+            log_error(e, "send_reminder", reminder.user_id, reminder.guild_id)
     
-    async def schedule_next_occurrence(self, reminder: dict):
+    async def schedule_next_occurrence(self, reminder: Reminder):
         """Schedule the next occurrence of a recurring reminder"""
         try:
-            current_time = datetime.fromisoformat(reminder['remind_time'])
-            pattern = reminder['recurring_pattern']
+            current_time = from_epoch(reminder.remind_time)
+            pattern = reminder.recurring_pattern
             
             # Calculate next occurrence based on pattern
             if pattern == 'daily':
@@ -135,23 +135,12 @@ class ReminderSystem(commands.Cog):
                 next_time = current_time + timedelta(hours=1)
             else:
                 # Invalid pattern, mark as completed
-                await db_manager.complete_reminder(reminder['id'])
+                await db_manager.complete_reminder(reminder.id)
                 return
             
-            # Update the reminder time in database
-            await db_manager.create_reminder(
-                user_id=reminder['user_id'],
-                guild_id=reminder['guild_id'],
-                channel_id=reminder['channel_id'],
-                message=reminder['message'],
-                remind_time=next_time.isoformat(),
-                is_recurring=True,
-                recurring_pattern=pattern
-            )
-            
-            # Mark current reminder as completed
-            await db_manager.complete_reminder(reminder['id'])
-            
+            # Move the same row forward instead of adding a new one each time
+            await db_manager.reschedule_reminder(reminder.id, to_epoch(next_time))
+
         except Exception as e:
             log_error(e, "schedule_next_occurrence")
     
@@ -204,6 +193,31 @@ class ReminderSystem(commands.Cog):
         
         return None
     
+    async def get_reminder_channel_id(self, user_id: int, guild_id: int, fallback: int) -> int:
+        """Channel the user chose for reminders in this guild, else the current one"""
+        return await db_manager.get_user_setting(user_id, f"reminder_channel.{guild_id}", fallback)
+    
+    @app_commands.command(name="reminder_channel", description="Chọn kênh nhận nhắc nhở của bạn trong server này")
+    async def set_reminder_channel(self, interaction: discord.Interaction,
+                                   channel: Optional[discord.TextChannel] = None):
+        """Set (or clear, without a channel) where the user's new reminders are sent"""
+        try:
+            key = f"reminder_channel.{interaction.guild.id}"
+            if channel:
+                await db_manager.set_user_setting(interaction.user.id, key, channel.id, interaction.user.name)
+                message = f"✅ Nhắc nhở mới của bạn sẽ được gửi tới {channel.mention}."
+            else:
+                await db_manager.delete_user_setting(interaction.user.id, key)
+                message = "✅ Nhắc nhở mới sẽ được gửi tới kênh bạn tạo nhắc nhở."
+            await interaction.response.send_message(message, ephemeral=True)
+            
+        except Exception as e:
+            log_error(e, "set_reminder_channel", interaction.user.id, interaction.guild.id)
+            await interaction.response.send_message(
+                "❌ Có lỗi xảy ra khi lưu cài đặt!",
+                ephemeral=True
+            )
+    
     @app_commands.command(name="remind", description="Tạo nhắc nhở")
     async def create_reminder(self, interaction: discord.Interaction,
                             time: str,
@@ -248,9 +262,11 @@ class ReminderSystem(commands.Cog):
             reminder_id = await db_manager.create_reminder(
                 user_id=interaction.user.id,
                 guild_id=interaction.guild.id,
-                channel_id=interaction.channel.id,
+                channel_id=await self.get_reminder_channel_id(
+                    interaction.user.id, interaction.guild.id, interaction.channel.id
+                ),
                 message=message,
-                remind_time=remind_time.isoformat(),
+                remind_time=to_epoch(remind_time),
                 is_recurring=is_recurring,
                 recurring_pattern=recurring
             )
@@ -303,15 +319,45 @@ class ReminderSystem(commands.Cog):
                 ephemeral=True
             )
     
+    def build_reminders_embed(self, page: Page, page_number: int) -> discord.Embed:
+        """Render one page of the user's reminders"""
+        embed = discord.Embed(
+            title="⏰ Nhắc nhở của bạn",
+            color=0x0099ff,
+            timestamp=datetime.utcnow()
+        )
+        
+        for reminder in page.items:
+            field_value = f"📝 {reminder.message}\n"
+            field_value += f"📅 {format_epoch(reminder.remind_time)}"
+            
+            if reminder.is_recurring:
+                field_value += f"\n🔄 Lặp lại: {reminder.recurring_pattern}"
+            
+            embed.add_field(
+                name=f"🔔 Reminder #{reminder.id}",
+                value=field_value,
+                inline=False
+            )
+        
+        if page_number > 1 or page.next_cursor is not None:
+            embed.set_footer(text=f"Trang {page_number}")
+        return embed
+    
     @app_commands.command(name="my_reminders", description="Xem danh sách nhắc nhở của bạn")
     async def list_user_reminders(self, interaction: discord.Interaction):
         """List user's active reminders"""
         try:
             await interaction.response.defer()
             
-            reminders = await db_manager.get_user_reminders(interaction.user.id)
+            user_id = interaction.user.id
+            
+            async def fetch_page(**cursor) -> Page:
+                return await db_manager.get_user_reminders_page(user_id, limit=REMINDERS_PER_PAGE, **cursor)
             
-            if not reminders:
+            page = await fetch_page()
+            
+            if not page.items:
                 embed = discord.Embed(
                     title="⏰ Nhắc nhở của bạn",
                     description="Bạn không có nhắc nhở nào.",
@@ -320,36 +366,57 @@ class ReminderSystem(commands.Cog):
                 await interaction.followup.send(embed=embed, ephemeral=True)
                 return
             
-            embed = discord.Embed(
-                title="⏰ Nhắc nhở của bạn",
-                color=0x0099ff,
-                timestamp=datetime.utcnow()
+            embed = self.build_reminders_embed(page, 1)
+            if page.next_cursor is None:
+                await interaction.followup.send(embed=embed, ephemeral=True)
+                return
+            
+            view = PaginatedView(fetch_page, self.build_reminders_embed, page, user_id)
+            await interaction.followup.send(embed=embed, view=view, ephemeral=True)
+            
+        except Exception as e:
+            log_error(e, "list_user_reminders", interaction.user.id, interaction.guild.id)
+            await interaction.followup.send(
+                "❌ Có lỗi xảy ra khi tải danh sách nhắc nhở!",
+                ephemeral=True
             )
+    
+    @app_commands.command(name="search_reminders", description="Tìm kiếm trong nhắc nhở của bạn")
+    async def search_reminders(self, interaction: discord.Interaction, query: str):
+        """Full-text search over the user's active reminders, best match first"""
+        try:
+            await interaction.response.defer(ephemeral=True)
             
-            for reminder in reminders[:10]:  # Limit to 10 reminders
-                remind_time = datetime.fromisoformat(reminder['remind_time'])
-                
-                field_value = f"📝 {reminder['message']}\n"
-                field_value += f"📅 {remind_time.strftime('%d/%m/%Y %H:%M')}"
-                
-                if reminder['is_recurring']:
-                    field_value += f"\n🔄 Lặp lại: {reminder['recurring_pattern']}"
-                
-                embed.add_field(
-                    name=f"🔔 Reminder #{reminder['id']}",
-                    value=field_value,
-                    inline=False
+            user_id = interaction.user.id
+            
+            async def fetch_page(**cursor) -> Page:
+                return await db_manager.search_user_reminders(user_id, query, limit=REMINDERS_PER_PAGE, **cursor)
+            
+            def render(page: Page, page_number: int) -> discord.Embed:
+                embed = self.build_reminders_embed(page, page_number)
+                embed.title = f"🔍 Nhắc nhở khớp với \"{query[:100]}\""
+                return embed
+            
+            page = await fetch_page()
+            
+            if not page.items:
+                await interaction.followup.send(
+                    f"🔍 Không tìm thấy nhắc nhở nào khớp với \"{query[:100]}\".",
+                    ephemeral=True
                 )
+                return
             
-            if len(reminders) > 10:
-                embed.set_footer(text=f"Hiển thị 10/{len(reminders)} nhắc nhở")
+            if page.next_cursor is None:
+                await interaction.followup.send(embed=render(page, 1), ephemeral=True)
+                return
             
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            view = PaginatedView(fetch_page, render, page, user_id)
+            await interaction.followup.send(embed=render(page, 1), view=view, ephemeral=True)
             
         except Exception as e:
-            log_error(e, "list_user_reminders", interaction.user.id, interaction.guild.id)
+            log_error(e, "search_reminders", interaction.user.id, interaction.guild.id)
             await interaction.followup.send(
-                "❌ Có lỗi xảy ra khi tải danh sách nhắc nhở!",
+                "❌ Có lỗi xảy ra khi tìm kiếm nhắc nhở!",
                 ephemeral=True
             )
     
@@ -412,9 +479,9 @@ class ReminderSystem(commands.Cog):
             reminder_id = await db_manager.create_reminder(
                 user_id=ctx.author.id,
                 guild_id=ctx.guild.id,
-                channel_id=ctx.channel.id,
+                channel_id=await self.get_reminder_channel_id(ctx.author.id, ctx.guild.id, ctx.channel.id),
                 message=message,
-                remind_time=remind_time.isoformat()
+                remind_time=to_epoch(remind_time)
             )
             
             embed = discord.Embed(
@@ -7,6 +7,7 @@ import asyncio
 
 from utils.database import db_manager
 from utils.logging_config import get_logger, log_command, log_error, log_user_action
+from utils.timeutil import format_epoch
 from bot.config import Colors, Emojis
 
 class UserInfo(commands.Cog):
@@ -19,7 +20,22 @@ class UserInfo(commands.Cog):
     async def cog_load(self):
         """Called when the cog is loaded"""
         self.logger.info("User Info cog loaded successfully")
-    
+
+    async def cog_unload(self):
+        """Write out counted message activity before the cog goes away"""
+        await db_manager.flush_writes()
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        """Count messages for /userinfo (batched in memory, no write per message)"""
+        if message.author.bot:
+            return
+        db_manager.update_user_activity(
+            message.author.id,
+            message.author.name,
+            message.author.display_name
+        )
+
     def get_user_status_emoji(self, status: discord.Status) -> str:
         """Get emoji for user status"""
         status_emojis = {
@@ -163,15 +179,14 @@ class UserInfo(commands.Cog):
             if user_data:
                 embed.add_field(
                     name="💬 Số tin nhắn",
-                    value=str(user_data.get('message_count', 0)),
+                    value=str(user_data.message_count or 0),
                     inline=True
                 )
                 
-                if user_data.get('last_seen'):
-                    last_seen = datetime.fromisoformat(user_data['last_seen'])
+                if user_data.last_seen:
                     embed.add_field(
                         name="👁️ Lần cuối hoạt động",
-                        value=last_seen.strftime('%d/%m/%Y %H:%M'),
+                        value=format_epoch(user_data.last_seen),
                         inline=True
                     )
             
@@ -29,7 +29,7 @@ class Utilities(commands.Cog):
             try:
                 self.openai_client = openai.OpenAI(api_key=Config.OPENAI_API_KEY)
             except Exception as e:
-                self.logger.error(f"OpenAI initialization failed: {e}")
+                self.logger.error("OpenAI initialization failed: %s", e)
                 OPENAI_AVAILABLE = False
                 self.openai_client = None
         else:
@@ -79,7 +79,7 @@ class Utilities(commands.Cog):
                 if "photos" in data and len(data["photos"]) > 0:
                     return data["photos"][0]["src"]["medium"]
         except Exception as e:
-            self.logger.error(f"Error fetching random image: {e}")
+            self.logger.error("Error fetching random image: %s", e)
         return None
 
     def get_images_by_topic(self, query: str):
@@ -97,7 +97,7 @@ class Utilities(commands.Cog):
                 if "photos" in data and len(data["photos"]) > 0:
                     return [photo["src"]["original"] for photo in data["photos"]]
         except Exception as e:
-            self.logger.error(f"Error fetching images by topic: {e}")
+            self.logger.error("Error fetching images by topic: %s", e)
         return None
 
     def get_birthday_image(self):
@@ -115,7 +115,7 @@ class Utilities(commands.Cog):
                 if "photos" in data and len(data["photos"]) > 0:
                     return data["photos"][0]["src"]["original"]
         except Exception as e:
-            self.logger.error(f"Error fetching birthday image: {e}")
+            self.logger.error("Error fetching birthday image: %s", e)
         return None
 
     # ChatGPT Commands
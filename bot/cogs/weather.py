@@ -33,7 +33,7 @@ class Weather(commands.Cog):
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
-            self.logger.error(f"Error fetching weather data: {e}")
+            self.logger.error("Error fetching weather data: %s", e)
         return None
 
     def get_forecast_data(self, city: str, days: int = 3):
@@ -47,7 +47,7 @@ class Weather(commands.Cog):
             if response.status_code == 200:
                 return response.json()
         except Exception as e:
-            self.logger.error(f"Error fetching forecast data: {e}")
+            self.logger.error("Error fetching forecast data: %s", e)
         return None
 
     @app_commands.command(name="weather", description="Lấy thông tin thời tiết hiện tại của một thành phố")
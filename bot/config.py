@@ -30,10 +30,71 @@ class Config:
     
     # Database Configuration
     DATABASE_PATH: Final[str] = os.getenv('DATABASE_PATH', 'data/bot_database.db')
+    DATABASE_READ_POOL_SIZE: Final[int] = int(os.getenv('DATABASE_READ_POOL_SIZE', '4'))
+    # Logs and media shares are kept in a separate file with its own writer
+    TELEMETRY_DATABASE_PATH: Final[str] = os.getenv('TELEMETRY_DATABASE_PATH', 'data/bot_telemetry.db')
+    # Hash-bucketed files for events and reminders (0 keeps everything in DATABASE_PATH)
+    DATABASE_PARTITIONS: Final[int] = int(os.getenv('DATABASE_PARTITIONS', '0'))
+    DATABASE_PARTITION_DIR: Final[str] = os.getenv('DATABASE_PARTITION_DIR', 'data/partitions')
+    DATABASE_PARTITION_MAX_OPEN: Final[int] = int(os.getenv('DATABASE_PARTITION_MAX_OPEN', '32'))
+    DATABASE_PARTITION_READ_POOL_SIZE: Final[int] = int(os.getenv('DATABASE_PARTITION_READ_POOL_SIZE', '1'))
+    DATABASE_BUSY_TIMEOUT_MS: Final[int] = int(os.getenv('DATABASE_BUSY_TIMEOUT_MS', '5000'))
+    DATABASE_CACHE_SIZE_KB: Final[int] = int(os.getenv('DATABASE_CACHE_SIZE_KB', '16384'))  # 16MB
+    DATABASE_MMAP_SIZE: Final[int] = int(os.getenv('DATABASE_MMAP_SIZE', '268435456'))  # 256MB
+    DATABASE_CHECKPOINT_INTERVAL: Final[int] = int(os.getenv('DATABASE_CHECKPOINT_INTERVAL', '300'))  # seconds
+    DATABASE_WAL_TRUNCATE_BYTES: Final[int] = int(os.getenv('DATABASE_WAL_TRUNCATE_BYTES', '67108864'))  # 64MB
+    DATABASE_WRITE_BATCH_SIZE: Final[int] = int(os.getenv('DATABASE_WRITE_BATCH_SIZE', '500'))
+    DATABASE_WRITE_FLUSH_INTERVAL: Final[float] = float(os.getenv('DATABASE_WRITE_FLUSH_INTERVAL', '1.0'))  # seconds
+    DATABASE_WRITE_MAX_PENDING: Final[int] = int(os.getenv('DATABASE_WRITE_MAX_PENDING', '10000'))
+    DATABASE_ACTIVITY_FLUSH_INTERVAL: Final[float] = float(os.getenv('DATABASE_ACTIVITY_FLUSH_INTERVAL', '30'))  # seconds
+    DATABASE_QUERY_STATS: Final[bool] = os.getenv('DATABASE_QUERY_STATS', 'true').lower() == 'true'
+    DATABASE_SLOW_QUERY_MS: Final[float] = float(os.getenv('DATABASE_SLOW_QUERY_MS', '100'))
+    DATABASE_CAPTURE_QUERY_PLANS: Final[bool] = os.getenv('DATABASE_CAPTURE_QUERY_PLANS', 'false').lower() == 'true'
+    
+    # In-process cache for hot rows (events, users)
+    CACHE_MAX_ENTRIES: Final[int] = int(os.getenv('CACHE_MAX_ENTRIES', '2048'))
+    CACHE_TTL: Final[float] = float(os.getenv('CACHE_TTL', '300'))  # seconds
+    
+    # Retention for tables that only grow (0 days keeps rows forever)
+    RETENTION_LOG_DAYS: Final[int] = int(os.getenv('RETENTION_LOG_DAYS', '30'))
+    RETENTION_MEDIA_DAYS: Final[int] = int(os.getenv('RETENTION_MEDIA_DAYS', '180'))
+    RETENTION_REMINDER_DAYS: Final[int] = int(os.getenv('RETENTION_REMINDER_DAYS', '30'))  # completed only
+    RETENTION_BATCH_SIZE: Final[int] = int(os.getenv('RETENTION_BATCH_SIZE', '1000'))
+    RETENTION_BATCH_PAUSE: Final[float] = float(os.getenv('RETENTION_BATCH_PAUSE', '0.05'))  # seconds
+    RETENTION_INTERVAL: Final[int] = int(os.getenv('RETENTION_INTERVAL', '21600'))  # 6 hours
+    RETENTION_INITIAL_DELAY: Final[int] = int(os.getenv('RETENTION_INITIAL_DELAY', '600'))  # first run after startup
+    RETENTION_VACUUM_PAGES: Final[int] = int(os.getenv('RETENTION_VACUUM_PAGES', '1024'))
+    
+    # Online backups (0 interval disables the scheduled backup)
+    BACKUP_DIR: Final[str] = os.getenv('BACKUP_DIR', 'data/backups')
+    BACKUP_INTERVAL: Final[int] = int(os.getenv('BACKUP_INTERVAL', '86400'))  # daily
+    BACKUP_KEEP: Final[int] = int(os.getenv('BACKUP_KEEP', '7'))
+    BACKUP_PAGES_PER_STEP: Final[int] = int(os.getenv('BACKUP_PAGES_PER_STEP', '256'))
+    BACKUP_STEP_PAUSE: Final[float] = float(os.getenv('BACKUP_STEP_PAUSE', '0.005'))  # seconds
     
     # Logging Configuration
     LOG_LEVEL: Final[str] = os.getenv('LOG_LEVEL', 'INFO')
     LOG_DIR: Final[str] = os.getenv('LOG_DIR', 'logs')
+    # 'text' or 'json' (one object per line, with guild/user/command context)
+    LOG_FORMAT: Final[str] = os.getenv('LOG_FORMAT', 'text').lower()
+    # bot.log / errors.log roll at this size or interval, then are gzipped in the
+    # background; the oldest archives are deleted to stay under the total (0 = off)
+    LOG_FILE_MAX_BYTES: Final[int] = int(os.getenv('LOG_FILE_MAX_BYTES', '10485760'))  # 10MB
+    LOG_ERROR_FILE_MAX_BYTES: Final[int] = int(os.getenv('LOG_ERROR_FILE_MAX_BYTES', '5242880'))  # 5MB
+    LOG_ROTATE_INTERVAL: Final[float] = float(os.getenv('LOG_ROTATE_INTERVAL', '86400'))  # seconds
+    LOG_MAX_TOTAL_BYTES: Final[int] = int(os.getenv('LOG_MAX_TOTAL_BYTES', '268435456'))  # 256MB
+    LOG_ERROR_MAX_TOTAL_BYTES: Final[int] = int(os.getenv('LOG_ERROR_MAX_TOTAL_BYTES', '67108864'))  # 64MB
+    # Per module 'first/window:every': after `first` INFO records of one action per
+    # `window` seconds only 1 in `every` is kept (0 = none); empty disables
+    LOG_RATE_LIMITS: Final[str] = os.getenv(
+        'LOG_RATE_LIMITS', 'events=20/60:10,music=20/60:10,reminders=20/60:10,media=20/60:10'
+    )
+    # WARNING+ records copied to bot_logs: buffer size, rows per insert, flush period,
+    # and what a full buffer discards ('drop_new' or 'drop_oldest')
+    LOG_DB_QUEUE_SIZE: Final[int] = int(os.getenv('LOG_DB_QUEUE_SIZE', '10000'))
+    LOG_DB_BATCH_SIZE: Final[int] = int(os.getenv('LOG_DB_BATCH_SIZE', '500'))
+    LOG_DB_FLUSH_INTERVAL: Final[float] = float(os.getenv('LOG_DB_FLUSH_INTERVAL', '1.0'))  # seconds
+    LOG_DB_OVERFLOW: Final[str] = os.getenv('LOG_DB_OVERFLOW', 'drop_new')
     
     # Music Configuration
     MAX_QUEUE_SIZE: Final[int] = int(os.getenv('MAX_QUEUE_SIZE', '100'))
@@ -102,7 +163,8 @@ COGS = [
     'bot.cogs.media_sharing',
     'bot.cogs.user_info',
     'bot.cogs.search',
-    'bot.cogs.video'
+    'bot.cogs.video',
+    'bot.cogs.admin'
 ]
 
 # Embed colors
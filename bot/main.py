@@ -15,11 +15,22 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 import discord
+from discord import app_commands
 from discord.ext import commands
 
 from bot.config import Config, get_bot_intents, COGS, Colors, Emojis
 from utils.database import db_manager
-from utils.logging_config import setup_logging, get_logger
+from utils.logging_config import (
+    setup_logging, get_logger, start_database_logging, stop_database_logging, stop_logging,
+    bind_interaction_context, bind_command_context
+)
+
+class BotCommandTree(app_commands.CommandTree):
+    """Command tree that binds the log context of every slash command"""
+    
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        bind_interaction_context(interaction)
+        return True
 
 class DiscordBot(commands.Bot):
     """Enhanced Discord Bot class"""
@@ -29,11 +40,17 @@ class DiscordBot(commands.Bot):
             command_prefix=Config.COMMAND_PREFIX,
             intents=get_bot_intents(),
             application_id=Config.DISCORD_APPLICATION_ID,
-            help_command=None  # We'll create custom help
+            help_command=None,  # We'll create custom help
+            tree_cls=BotCommandTree
         )
         
         self.logger = get_logger('main')
         self.config = Config
+        self.before_invoke(self.bind_log_context)
+        
+    async def bind_log_context(self, ctx: commands.Context):
+        """Attach guild, user and command to everything a prefix command logs"""
+        bind_command_context(ctx)
         
     async def setup_hook(self):
         """Setup hook called when bot is starting"""
@@ -41,29 +58,38 @@ class DiscordBot(commands.Bot):
         
         # Initialize database
         await db_manager.init_database()
+        start_database_logging()
         self.logger.info("Database initialized")
         
         # Load all cogs
         for cog in COGS:
             try:
                 await self.load_extension(cog)
-                self.logger.info(f"Loaded cog: {cog}")
+                self.logger.info("Loaded cog: %s", cog)
             except Exception as e:
-                self.logger.error(f"Failed to load cog {cog}: {e}")
+                self.logger.error("Failed to load cog %s: %s", cog, e)
         
         # Sync slash commands
         try:
             synced = await self.tree.sync()
-            self.logger.info(f"Synced {len(synced)} slash commands")
+            self.logger.info("Synced %s slash commands", len(synced))
         except Exception as e:
-            self.logger.error(f"Failed to sync commands: {e}")
-    
+            self.logger.error("Failed to sync commands: %s", e)
+
+    async def close(self):
+        """Shut down the bot, then release the database connection"""
+        await super().close()
+        # Write out buffered log records while the database is still open
+        await stop_database_logging()
+        await db_manager.close()
+        self.logger.info("Database connection closed")
+
     async def on_ready(self):
         """Called when bot is ready"""
-        self.logger.info(f"{self.user} đã sẵn sàng hoạt động!")
-        self.logger.info(f"Bot ID: {self.user.id}")
-        self.logger.info(f"Servers: {len(self.guilds)}")
-        self.logger.info(f"Users: {len(set(self.get_all_members()))}")
+        self.logger.info("%s đã sẵn sàng hoạt động!", self.user)
+        self.logger.info("Bot ID: %s", self.user.id)
+        self.logger.info("Servers: %s", len(self.guilds))
+        self.logger.info("Users: %s", len(set(self.get_all_members())))
         
         # Set bot status
         activity = discord.Activity(
@@ -77,16 +103,16 @@ class DiscordBot(commands.Bot):
         self.logger.info("Optional features:")
         for feature, enabled in features.items():
             status = "✅" if enabled else "❌"
-            self.logger.info(f"  {feature}: {status}")
+            self.logger.info("  %s: %s", feature, status)
             
         # Kiểm tra FFmpeg
         try:
             result = subprocess.run(['ffmpeg', '-version'], capture_output=True, text=True)
-            self.logger.info(f"FFmpeg check: SUCCESS")
-            self.logger.info(f"FFmpeg version: {result.stdout.split('\\n')[0]}")
+            self.logger.info("FFmpeg check: SUCCESS")
+            self.logger.info("FFmpeg version: %s", result.stdout.partition('\n')[0])
         except Exception as e:
-            self.logger.error(f"FFmpeg check: FAILED")
-            self.logger.error(f"Error: {e}")
+            self.logger.error("FFmpeg check: FAILED")
+            self.logger.error("Error: %s", e)
             
         # Khởi động web server cho health check
         await self.setup_webserver()
@@ -107,13 +133,13 @@ class DiscordBot(commands.Bot):
             port = int(os.environ.get('PORT', 8080))
             site = web.TCPSite(runner, '0.0.0.0', port)
             await site.start()
-            self.logger.info(f"Health check web server running on port {port}")
+            self.logger.info("Health check web server running on port %s", port)
         except Exception as e:
-            self.logger.error(f"Failed to start web server: {e}")
+            self.logger.error("Failed to start web server: %s", e)
     
     async def on_guild_join(self, guild):
         """Called when bot joins a guild"""
-        self.logger.info(f"Joined guild: {guild.name} (ID: {guild.id})")
+        self.logger.info("Joined guild: %s (ID: %s)", guild.name, guild.id)
         
         # Send welcome message to general channel
         for channel in guild.text_channels:
@@ -136,7 +162,7 @@ class DiscordBot(commands.Bot):
     
     async def on_guild_remove(self, guild):
         """Called when bot leaves a guild"""
-        self.logger.info(f"Left guild: {guild.name} (ID: {guild.id})")
+        self.logger.info("Left guild: %s (ID: %s)", guild.name, guild.id)
     
     async def on_command_error(self, ctx, error):
         """Global error handler"""
@@ -162,7 +188,7 @@ class DiscordBot(commands.Bot):
             return
 
         # Log unexpected errors
-        self.logger.error(f"Unexpected error in {ctx.command}: {error}", exc_info=True)
+        self.logger.error("Unexpected error in %s: %s", ctx.command, error, exc_info=True)
 
         embed = discord.Embed(
             title=f"{Emojis.ERROR} Có lỗi xảy ra",
@@ -223,7 +249,7 @@ async def main():
     setup_logging()
     logger = get_logger('main')
     
-    logger.info(f"Starting {Config.BOT_NAME} v{Config.BOT_VERSION}")
+    logger.info("Starting %s v%s", Config.BOT_NAME, Config.BOT_VERSION)
     
     # Validate configuration
     if not Config.validate():
@@ -238,11 +264,12 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Bot stopped by user")
     except Exception as e:
-        logger.error(f"Bot crashed: {e}", exc_info=True)
+        logger.error("Bot crashed: %s", e, exc_info=True)
     finally:
         if not bot.is_closed():
             await bot.close()
         logger.info("Bot shutdown complete")
+        stop_logging()
 
 if __name__ == "__main__":
     try:
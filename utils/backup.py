@@ -0,0 +1,460 @@
+"""
+Online backups and NDJSON export/import for the bot database
+
+Backups use SQLite's online backup API a few pages at a time, from a
+read-only connection that holds one read transaction for the whole copy.
+In WAL mode readers never block the writer, and the open transaction pins a
+consistent snapshot, so the copy doesn't restart every time the bot writes
+(which a plain step-wise backup would do under steady traffic).  The copy
+is written to a .partial file, checked, then renamed into place.
+
+Exports stream every table to newline-delimited JSON through cursors, so
+memory use stays flat however big the tables are.  The file starts with a
+header line, then for each table a {"table": ..., "columns": [...]} line
+followed by one JSON array per row.  A path ending in .gz is compressed.
+The header names the schema the export came from (main, telemetry or
+partition), and an import creates or checks that schema in the target.
+
+The vacuum command rebuilds a file offline, e.g. a large database whose
+switch to incremental auto-vacuum was deferred by the migrations.
+
+Usage:
+    python -m utils.backup [--db PATH] backup [--dest FILE]
+    python -m utils.backup [--db PATH] export dump.ndjson.gz [--tables users events]
+    python -m utils.backup --db restored.db import dump.ndjson.gz [--replace]
+    python -m utils.backup --db data/bot_telemetry.db export logs.ndjson.gz
+    python -m utils.backup [--db PATH] vacuum
+"""
+
+import argparse
+import asyncio
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO
+
+from utils.migrations import SCHEMAS
+
+logger = logging.getLogger('bot.database')
+
+EXPORT_FORMAT = "discord-bot-ndjson"
+EXPORT_VERSION = 1
+
+def _connect_readonly(db_path: str) -> sqlite3.Connection:
+    """Read-only connection in autocommit mode (transactions are explicit)"""
+    return sqlite3.connect(f"{Path(db_path).resolve().as_uri()}?mode=ro", uri=True,
+                           isolation_level=None)
+
+def _begin_snapshot(conn: sqlite3.Connection):
+    """Start a read transaction; every later read sees this one snapshot"""
+    conn.execute("BEGIN")
+    conn.execute("SELECT COUNT(*) FROM sqlite_master").fetchone()
+
+def _open_text(path: str, mode: str) -> TextIO:
+    if path.endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8', newline='\n')
+
+def _schema_version(conn: sqlite3.Connection) -> int:
+    try:
+        return conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+
+def _schema_kind(conn: sqlite3.Connection) -> Optional[str]:
+    """Which of SCHEMAS the file has (None for a file without migrations)"""
+    try:
+        row = conn.execute("SELECT name FROM schema_version WHERE version = 1").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    if row is None:
+        return None
+    return next((kind for kind, migrations in SCHEMAS.items() if migrations[0].name == row[0]), None)
+
+def _data_tables(conn: sqlite3.Connection) -> List[str]:
+    """Ordinary tables holding bot data, skipping SQLite internals, the
+    migration bookkeeping and FTS indexes (rebuilt by their triggers)"""
+    rows = conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY rowid").fetchall()
+    virtual = [name for name, sql in rows if sql and sql.upper().startswith('CREATE VIRTUAL TABLE')]
+    return [
+        name for name, sql in rows
+        if not name.startswith('sqlite_') and name != 'schema_version'
+        and name not in virtual and not any(name.startswith(f"{v}_") for v in virtual)
+    ]
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row[1] for row in conn.execute(f'PRAGMA table_info("{table}")')]
+
+def backup_database(db_path: str, dest_path: str, pages_per_step: int = 256,
+                    step_pause: float = 0.005) -> Dict[str, Any]:
+    """Copy db_path to dest_path with the online backup API (blocking; run in a thread)"""
+    started = time.perf_counter()
+    partial = f"{dest_path}.partial"
+    Path(dest_path).parent.mkdir(parents=True, exist_ok=True)
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    src = _connect_readonly(db_path)
+    steps = 0
+    try:
+        _begin_snapshot(src)
+        dst = sqlite3.connect(partial)
+        try:
+            def progress(status, remaining, total):
+                nonlocal steps
+                steps += 1
+                # Leave the disk to the bot for a moment between steps
+                if remaining and step_pause > 0:
+                    time.sleep(step_pause)
+
+            src.backup(dst, pages=max(1, pages_per_step), progress=progress)
+            (check,) = dst.execute("PRAGMA quick_check").fetchone()
+            if check != 'ok':
+                raise sqlite3.DatabaseError(f"Backup of {db_path} failed quick_check: {check}")
+            page_count = dst.execute("PRAGMA page_count").fetchone()[0]
+        finally:
+            dst.close()
+        src.execute("COMMIT")
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+    finally:
+        src.close()
+
+    os.replace(partial, dest_path)
+    return {
+        'path': dest_path,
+        'bytes': os.path.getsize(dest_path),
+        'pages': page_count,
+        'steps': steps,
+        'seconds': round(time.perf_counter() - started, 3),
+        'timestamp': datetime.now().isoformat()
+    }
+
+def rotate_backups(backup_dir: str, stem: str, keep: int) -> List[str]:
+    """Delete all but the newest keep backups named stem-*.db; returns removed paths"""
+    backups = sorted(Path(backup_dir).glob(f"{stem}-*.db"))
+    removed = [str(path) for path in backups[:max(0, len(backups) - keep)]]
+    for path in removed:
+        os.remove(path)
+    return removed
+
+def export_ndjson(db_path: str, out_path: str, tables: Optional[Sequence[str]] = None) -> Dict[str, int]:
+    """Stream tables (default: all bot data) to an NDJSON file; returns rows per table"""
+    conn = _connect_readonly(db_path)
+    counts = {}
+    try:
+        _begin_snapshot(conn)
+        available = _data_tables(conn)
+        unknown = set(tables or ()) - set(available)
+        if unknown:
+            raise ValueError(f"Unknown tables: {', '.join(sorted(unknown))}")
+
+        with _open_text(out_path, 'w') as out:
+            out.write(json.dumps({
+                'format': EXPORT_FORMAT,
+                'version': EXPORT_VERSION,
+                'schema': _schema_kind(conn) or 'main',
+                'schema_version': _schema_version(conn),
+                'exported_at': datetime.now().isoformat()
+            }) + "\n")
+            for table in (t for t in available if not tables or t in tables):
+                columns = _columns(conn, table)
+                out.write(json.dumps({'table': table, 'columns': columns}, ensure_ascii=False) + "\n")
+                count = 0
+                # Iterating the cursor fetches rows one at a time, never all of them
+                cursor = conn.execute(f'SELECT {", ".join(columns)} FROM "{table}"')
+                for row in cursor:
+                    out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                    count += 1
+                counts[table] = count
+        conn.execute("COMMIT")
+    finally:
+        conn.close()
+    return counts
+
+def read_export_header(in_path: str) -> Dict[str, Any]:
+    """The header line of an export, with its schema kind filled in.
+
+    Exports written before the header named a schema are main-database
+    exports, unless their first table is a telemetry one.
+    """
+    with _open_text(in_path, 'r') as source:
+        header = json.loads(next(source, 'null') or 'null')
+        if not isinstance(header, dict) or header.get('format') != EXPORT_FORMAT:
+            raise ValueError(f"{in_path} is not a {EXPORT_FORMAT} export")
+        if 'schema' not in header:
+            section = json.loads(next(source, 'null') or 'null')
+            table = section.get('table') if isinstance(section, dict) else None
+            header['schema'] = 'telemetry' if table in ('bot_logs', 'media_shares') else 'main'
+    if header['schema'] not in SCHEMAS:
+        raise ValueError(f"{in_path} has unknown schema {header['schema']!r}")
+    return header
+
+def _batches(lines: Iterator[str], size: int) -> Iterator[List[list]]:
+    """Parse row lines into lists of at most size rows"""
+    batch = []
+    for line in lines:
+        batch.append(json.loads(line))
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def import_ndjson(db_path: str, in_path: str, replace: bool = False,
+                  batch_size: int = 1000) -> Dict[str, int]:
+    """Load an export into db_path in one transaction; returns rows per table.
+
+    The target must already have the export's schema (see the CLI, which
+    runs the matching migrations) at the same version.  Tables that already hold
+    rows are refused unless replace=True, which empties them first.  This
+    holds the write lock for the whole import, so restore while the bot is
+    stopped or into a fresh file.
+    """
+    header = read_export_header(in_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    counts = {}
+    try:
+        target = _schema_kind(conn)
+        if target is not None and target != header['schema']:
+            raise ValueError(
+                f"Export is of a {header['schema']} database but {db_path} is a {target} database"
+            )
+        with _open_text(in_path, 'r') as source:
+            next(source)  # header, read above
+            if header['schema_version'] != _schema_version(conn):
+                raise ValueError(
+                    f"Export has schema version {header['schema_version']} but {db_path} "
+                    f"is at {_schema_version(conn)}; migrate to the same version first"
+                )
+
+            tables = set(_data_tables(conn))
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                pending = None
+                while True:
+                    line = pending if pending is not None else next(source, None)
+                    pending = None
+                    if line is None:
+                        break
+                    section = json.loads(line)
+                    table, columns = section['table'], section['columns']
+                    if table not in tables:
+                        raise ValueError(f"{db_path} has no table {table}")
+                    missing = set(columns) - set(_columns(conn, table))
+                    if missing:
+                        raise ValueError(f"{table} has no columns {', '.join(sorted(missing))}")
+                    if replace:
+                        conn.execute(f'DELETE FROM "{table}"')
+                    elif conn.execute(f'SELECT 1 FROM "{table}" LIMIT 1').fetchone():
+                        raise ValueError(f"{table} already has rows; use replace to overwrite")
+
+                    sql = (f'INSERT INTO "{table}" ({", ".join(columns)}) '
+                           f'VALUES ({", ".join("?" for _ in columns)})')
+
+                    def rows() -> Iterator[str]:
+                        # Row lines are arrays; the next object line starts a new table
+                        nonlocal pending
+                        for row_line in source:
+                            if row_line.startswith('{'):
+                                pending = row_line
+                                return
+                            yield row_line
+
+                    count = 0
+                    for batch in _batches(rows(), batch_size):
+                        conn.executemany(sql, batch)
+                        count += len(batch)
+                    counts[table] = counts.get(table, 0) + count
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    finally:
+        conn.close()
+    return counts
+
+def vacuum_database(db_path: str) -> Dict[str, Any]:
+    """Rebuild db_path with VACUUM, switching it to incremental auto-vacuum.
+
+    Takes an exclusive lock for the whole rewrite and needs free space for a
+    full copy of the file, so run it while the bot is stopped.
+    """
+    started = time.perf_counter()
+    before = os.path.getsize(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        conn.execute("VACUUM")
+        # In WAL mode the rebuilt pages land in the WAL first
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    finally:
+        conn.close()
+    return {
+        'path': db_path,
+        'bytes_before': before,
+        'bytes_after': os.path.getsize(db_path),
+        'seconds': round(time.perf_counter() - started, 3),
+    }
+
+class BackupJob:
+    """Periodically writes timestamped online backups and prunes old ones.
+
+    Each run copies db_path and any extra_paths registered alongside it
+    (e.g. the telemetry database); every file keeps its own newest `keep`
+    copies, named after its stem.
+    """
+
+    def __init__(self, db_path: str, backup_dir: str, keep: int = 7,
+                 pages_per_step: int = 256, step_pause: float = 0.005,
+                 extra_paths: Sequence[str] = ()):
+        self.db_path = db_path
+        self.extra_paths = list(extra_paths)
+        self.backup_dir = backup_dir
+        self.keep = max(1, keep)
+        self.pages_per_step = pages_per_step
+        self.step_pause = step_pause
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def paths(self) -> List[str]:
+        """Files a run backs up, the main database first"""
+        return [self.db_path, *self.extra_paths]
+
+    def start(self, interval: float):
+        """Back up every interval seconds in the background (0 disables)"""
+        if interval <= 0:
+            return
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Database backup failed: %s", e)
+
+    async def _backup_file(self, db_path: str) -> Dict[str, Any]:
+        stem = Path(db_path).stem
+        dest = os.path.join(self.backup_dir, f"{stem}-{datetime.now():%Y%m%d-%H%M%S}.db")
+        report = await asyncio.to_thread(
+            backup_database, db_path, dest, self.pages_per_step, self.step_pause
+        )
+        report['removed'] = rotate_backups(self.backup_dir, stem, self.keep)
+        logger.info("Database backup written to %s: %s bytes in %ss (%s steps)",
+                    dest, report['bytes'], report['seconds'], report['steps'])
+        return report
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Back up every file now, drop the oldest copies beyond keep, and return a combined report.
+
+        path is the main database's copy; the sizes and timings cover every file.
+        """
+        reports = [await self._backup_file(path) for path in self.paths()]
+        report = {
+            **reports[0],
+            'bytes': sum(r['bytes'] for r in reports),
+            'pages': sum(r['pages'] for r in reports),
+            'steps': sum(r['steps'] for r in reports),
+            'seconds': round(sum(r['seconds'] for r in reports), 3),
+            'removed': [path for r in reports for path in r['removed']],
+            'files': len(reports)
+        }
+        self.last_report = report
+        return report
+
+async def _create_schema(db_path: str, schema: str):
+    """Bring db_path up to the current version of schema so an export can be imported into it"""
+    from utils.database import ConnectionPool
+    from utils.migrations import apply_migrations
+
+    pool = ConnectionPool(db_path)
+    await pool.open()
+    try:
+        await apply_migrations(pool, SCHEMAS[schema])
+    finally:
+        await pool.close()
+
+def main():
+    from bot.config import Config
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--db", default=Config.DATABASE_PATH, help="database file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    backup = commands.add_parser("backup", help="online backup to a SQLite file")
+    backup.add_argument("--dest", help=f"output file (default: timestamped in {Config.BACKUP_DIR})")
+    backup.add_argument("--keep", type=int, default=Config.BACKUP_KEEP,
+                        help="timestamped backups to keep when --dest is not given")
+
+    export = commands.add_parser("export", help="stream tables to NDJSON (.gz to compress)")
+    export.add_argument("output")
+    export.add_argument("--tables", nargs="+", help="only these tables")
+
+    restore = commands.add_parser("import", help="load an NDJSON export")
+    restore.add_argument("input")
+    restore.add_argument("--replace", action="store_true", help="empty tables that already have rows")
+
+    commands.add_parser("vacuum", help="rebuild the file offline (stop the bot first)")
+
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.command == "backup":
+        if args.dest:
+            report = backup_database(args.db, args.dest, Config.BACKUP_PAGES_PER_STEP, Config.BACKUP_STEP_PAUSE)
+        else:
+            job = BackupJob(args.db, Config.BACKUP_DIR, args.keep,
+                            Config.BACKUP_PAGES_PER_STEP, Config.BACKUP_STEP_PAUSE)
+            report = asyncio.run(job.run_once())
+        print(f"Backed up {args.db} to {report['path']} ({report['bytes']} bytes, {report['seconds']}s)")
+    elif args.command == "export":
+        try:
+            counts = export_ndjson(args.db, args.output, args.tables)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Exported {sum(counts.values())} rows to {args.output}: {counts}")
+    elif args.command == "vacuum":
+        report = vacuum_database(args.db)
+        print(f"Vacuumed {args.db}: {report['bytes_before']} -> {report['bytes_after']} bytes "
+              f"({report['seconds']}s)")
+    else:
+        try:
+            header = read_export_header(args.input)
+            # Checked before migrating, so a mismatch never adds the wrong tables to the target
+            target = None
+            if os.path.exists(args.db):
+                conn = sqlite3.connect(args.db)
+                try:
+                    target = _schema_kind(conn)
+                finally:
+                    conn.close()
+            if target is not None and target != header['schema']:
+                parser.error(f"{args.input} is a {header['schema']} export but {args.db} "
+                             f"is a {target} database")
+            asyncio.run(_create_schema(args.db, header['schema']))
+            counts = import_ndjson(args.db, args.input, replace=args.replace)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Imported {sum(counts.values())} rows into {args.db}: {counts}")
+
+if __name__ == "__main__":
+    main()
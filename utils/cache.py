@@ -0,0 +1,119 @@
+"""
+In-process LRU cache with per-entry TTL
+
+Used by DatabaseManager to keep hot, rarely-changing rows (events, users)
+off SQLite.  Not thread-safe: it is only touched from the event loop.
+
+A read-through caller takes version(key) before its awaited read and
+passes it to set(); if the key was invalidated in between (a write landed
+while the read was in flight), the set is skipped, so the row read
+before the write can't replace the invalidation.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+_MISSING = object()
+
+class TTLCache:
+    """Least-recently-used cache whose entries also expire after ttl seconds"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60.0):
+        self.max_entries = max(1, max_entries)
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        # Bumped by every invalidation; key -> generation of its last one,
+        # oldest first.  Bounded: once entries are forgotten, tokens older
+        # than _floor can't be checked and are treated as stale.
+        self._generation = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+        self._floor = 0
+        self._max_invalidated = max(1024, self.max_entries)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.stale_sets = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING, count=False) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None, count: bool = True) -> Any:
+        """Return the cached value, or default if it is absent or expired"""
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return value
+            del self._data[key]
+            self.expirations += 1
+        if count:
+            self.misses += 1
+        return default
+
+    def version(self, key: Hashable) -> int:
+        """Token for set(): take it before reading the value from the database"""
+        return self._generation
+
+    def set(self, key: Hashable, value: Any, version: Optional[int] = None) -> bool:
+        """Store a value, evicting the least recently used entry if full.
+
+        With a version from version(), nothing is stored if the key was
+        invalidated since; returns whether the value was stored.
+        """
+        if version is not None and (version < self._floor or self._invalidated.get(key, -1) > version):
+            self.stale_sets += 1
+            return False
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+        return True
+
+    def _bump(self, key: Hashable):
+        self._generation += 1
+        self._invalidated[key] = self._generation
+        self._invalidated.move_to_end(key)
+        while len(self._invalidated) > self._max_invalidated:
+            _, generation = self._invalidated.popitem(last=False)
+            self._floor = generation
+
+    def invalidate(self, key: Hashable) -> bool:
+        """Drop one entry; returns True if it was cached"""
+        self._bump(key)
+        if self._data.pop(key, None) is not None:
+            self.invalidations += 1
+            return True
+        return False
+
+    def clear(self):
+        """Drop every entry (statistics are kept); reads in flight won't be stored"""
+        self._data.clear()
+        self._generation += 1
+        self._invalidated.clear()
+        self._floor = self._generation
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'invalidations': self.invalidations,
+            'stale_sets': self.stale_sets
+        }
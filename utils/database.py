@@ -1,192 +1,1187 @@
 import aiosqlite
 import asyncio
+import heapq
+import itertools
 import json
+import logging
+import os
+import re
+from collections import deque
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, AsyncIterator, Callable, Sequence, Tuple
 from pathlib import Path
 
+from bot.config import Config
+from utils.backup import BackupJob
+from utils.cache import TTLCache
+from utils.migrations import MIGRATIONS, PARTITION_MIGRATIONS, TELEMETRY_MIGRATIONS, apply_migrations
+from utils.partitions import PartitionLayout, PartitionPools, PartitionedBackupJob, PartitionedRetentionJob
+from utils.query_stats import InstrumentedConnection, QueryStats, helper_caller, statement_name
+from utils.records import Event, JoinResult, LogEntry, MediaShare, Page, Reminder, User
+from utils.retention import RetentionJob, RetentionPolicy
+from utils.timeutil import now_epoch
+
+Cursor = Tuple[Any, int]
+
+# Cached marker for a settings key that is not set
+_MISSING = object()
+
+# Telemetry is read rarely (log pages, media search); a couple of readers is plenty
+TELEMETRY_READ_POOL_SIZE = 2
+
+def _keyset(sort_column: str, limit: int, after: Optional[Cursor], before: Optional[Cursor],
+            descending: bool = False) -> Tuple[str, str, tuple]:
+    """Build the WHERE fragment, ORDER BY/LIMIT clause and params for a keyset page.
+    
+    Rows are ordered by (sort_column, id).  One extra row is requested so the
+    caller can tell whether another page exists in the direction of travel.
+    """
+    backwards = before is not None
+    cursor = before if backwards else after
+    # Walking backwards flips both the comparison and the sort order
+    ascending = descending == backwards
+    op, direction = ('>', 'ASC') if ascending else ('<', 'DESC')
+    where = f" AND ({sort_column}, id) {op} (?, ?)" if cursor else ""
+    order = f" ORDER BY {sort_column} {direction}, id {direction}"
+    params = (*cursor, limit + 1) if cursor else (limit + 1,)
+    return where, order, params
+
+def _make_page(records: Sequence, limit: int, after: Optional[Cursor], before: Optional[Cursor],
+               key: Callable[[Any], Cursor]) -> Page:
+    """Trim the look-ahead row, restore display order and work out both cursors"""
+    has_more = len(records) > limit
+    items = list(records[:limit])
+    if before is not None:
+        items.reverse()
+        next_cursor = key(items[-1]) if items else None
+        prev_cursor = key(items[0]) if items and has_more else None
+    else:
+        next_cursor = key(items[-1]) if items and has_more else None
+        prev_cursor = key(items[0]) if items and after is not None else None
+    return Page(items, next_cursor, prev_cursor)
+
+_SEARCH_TERM = re.compile(r"\w+")
+
+def _fts_query(text: str, columns: Sequence[str], scope: str, scope_id: int) -> Optional[str]:
+    """Turn free text typed by a user into a safe FTS5 MATCH expression.
+    
+    Every word becomes a quoted prefix term ("hop"* matches "họp", "hopdong")
+    and all of them must appear in columns, so FTS5 operators and punctuation
+    in the input are never interpreted.  The scope column (indexed alongside,
+    see utils/migrations.py) restricts matches to one user or guild.  Returns
+    None when there is nothing to search.
+    """
+    terms = _SEARCH_TERM.findall(text)
+    if not terms:
+        return None
+    phrases = " ".join(f'"{term}"*' for term in terms)
+    return f'{{{" ".join(columns)}}} : ({phrases}) AND {{{scope}}} : "{int(scope_id)}"'
+
+_SETTING_KEY = re.compile(r"\w+(\.\w+)*", re.ASCII)
+
+def _setting_path(key: str) -> str:
+    """JSON path for a dotted settings key: 'reminder_channel.123' -> $."reminder_channel"."123" """
+    if not _SETTING_KEY.fullmatch(key):
+        raise ValueError(f"Invalid setting key: {key!r}")
+    return "$" + "".join(f'."{part}"' for part in key.split("."))
+
+def _decode_setting(json_type: Optional[str], value: Any, default: Any) -> Any:
+    """Turn json_type()/json_extract() output back into the Python value that was stored"""
+    if json_type is None:
+        return default
+    if json_type in ('true', 'false'):
+        return json_type == 'true'
+    if json_type in ('object', 'array'):
+        # json_extract returns nested values as JSON text
+        return json.loads(value)
+    return value
+
+logger = logging.getLogger('bot.database')
+
+class ConnectionPool:
+    """Long-lived SQLite connections: a pool of read-only readers and one writer.
+
+    Readers are handed out first come, first served so independent SELECTs
+    run in parallel on separate connections.  Every INSERT/UPDATE/DELETE goes through the single
+    writer, serialised by a lock, which matches SQLite's one-writer model and
+    keeps transactions from interleaving.
+    
+    The database runs in WAL mode so readers never wait on the writer; a
+    background task checkpoints the WAL back into the main file.
+    """
+    
+    def __init__(self, db_path: str, read_pool_size: int = 4,
+                 busy_timeout_ms: int = 5000, cache_size_kb: int = 16384,
+                 mmap_size: int = 268435456, stats: Optional[QueryStats] = None):
+        self.db_path = db_path
+        self.read_pool_size = max(1, read_pool_size)
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        # When set, connections are handed out wrapped so every statement is timed
+        self.stats = stats
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._readers: List[aiosqlite.Connection] = []
+        self._idle_readers: deque = deque()
+        # Tasks waiting for a reader, oldest first; a released reader goes
+        # straight to the oldest, so a busy task can't take it back first
+        self._reader_waiters: deque = deque()
+        self._open_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._closed = False
+        self._checkpoint_task: Optional[asyncio.Task] = None
+        self.last_checkpoint: Optional[Dict[str, Any]] = None
+    
+    @property
+    def is_open(self) -> bool:
+        return self._writer is not None
+    
+    @property
+    def wal_path(self) -> str:
+        return f"{self.db_path}-wal"
+    
+    def wal_size(self) -> int:
+        """Current size of the WAL file in bytes (0 if there is none)"""
+        try:
+            return os.path.getsize(self.wal_path)
+        except OSError:
+            return 0
+    
+    async def _apply_pragmas(self, db: aiosqlite.Connection):
+        """Per-connection settings shared by the writer and the readers"""
+        await db.execute(f"PRAGMA busy_timeout = {int(self.busy_timeout_ms)}")
+        # Negative cache_size is in KiB rather than pages
+        await db.execute(f"PRAGMA cache_size = -{int(self.cache_size_kb)}")
+        await db.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+    
+    async def open(self):
+        """Open the writer and the reader pool (no-op if already open)"""
+        async with self._open_lock:
+            if self._closed:
+                raise RuntimeError(f"Connection pool for {self.db_path} is closed")
+            if self._writer is not None:
+                return
+            # The writer goes first: it creates the file the readers attach to.
+            # Transactions are managed explicitly, hence isolation_level=None.
+            writer = await aiosqlite.connect(self.db_path, isolation_level=None)
+            try:
+                # journal_mode is persistent; synchronous=NORMAL is safe under WAL
+                # and drops the fsync from every commit (only checkpoints sync).
+                # Only takes effect on a brand-new file; existing databases are
+                # converted by a migration (see utils/migrations.py)
+                await writer.execute("PRAGMA auto_vacuum = INCREMENTAL")
+                await writer.execute("PRAGMA journal_mode = WAL")
+                await writer.execute("PRAGMA synchronous = NORMAL")
+                await self._apply_pragmas(writer)
+            except Exception:
+                await writer.close()
+                raise
+            
+            read_uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+            readers = []
+            try:
+                for _ in range(self.read_pool_size):
+                    reader = await aiosqlite.connect(read_uri, uri=True, isolation_level=None)
+                    readers.append(reader)
+                    await self._apply_pragmas(reader)
+            except Exception:
+                for reader in readers:
+                    await reader.close()
+                await writer.close()
+                raise
+            
+            self._readers = readers
+            self._idle_readers.extend(readers)
+            self._writer = writer
+    
+    async def close(self):
+        """Close every connection in the pool"""
+        await self.stop_checkpointing()
+        async with self._open_lock:
+            self._closed = True
+            if self._writer is None:
+                return
+            # Take the write lock so an in-flight transaction finishes first
+            async with self._write_lock:
+                writer, self._writer = self._writer, None
+                await writer.close()
+            for reader in self._readers:
+                await reader.close()
+            self._readers = []
+            self._idle_readers.clear()
+            while self._reader_waiters:
+                waiter = self._reader_waiters.popleft()
+                if not waiter.done():
+                    waiter.set_exception(RuntimeError(f"Connection pool for {self.db_path} is closed"))
+    
+    def _wrap(self, db: aiosqlite.Connection):
+        return InstrumentedConnection(db, self.stats) if self.stats is not None else db
+    
+    @asynccontextmanager
+    async def reader(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection for the duration of the block"""
+        if self._writer is None:
+            await self.open()
+        db = await self._acquire_reader()
+        try:
+            yield self._wrap(db)
+        finally:
+            self._release_reader(db)
+    
+    async def _acquire_reader(self) -> aiosqlite.Connection:
+        # Only take an idle reader if nobody is queued ahead of us
+        if self._idle_readers and not self._reader_waiters:
+            return self._idle_readers.popleft()
+        waiter = asyncio.get_running_loop().create_future()
+        self._reader_waiters.append(waiter)
+        try:
+            return await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a reader just as we were cancelled; pass it on
+                self._release_reader(waiter.result())
+            elif waiter in self._reader_waiters:
+                self._reader_waiters.remove(waiter)
+            raise
+    
+    def _release_reader(self, db: aiosqlite.Connection):
+        if db not in self._readers:
+            return  # The pool was closed while the reader was borrowed
+        while self._reader_waiters:
+            waiter = self._reader_waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(db)
+                return
+        self._idle_readers.append(db)
+    
+    @asynccontextmanager
+    async def writer(self, transaction: bool = True) -> AsyncIterator[aiosqlite.Connection]:
+        """Run the block as one IMMEDIATE transaction on the writer connection.
+        
+        With transaction=False the block just holds the writer exclusively,
+        for statements that cannot run inside a transaction (e.g. VACUUM).
+        """
+        if self._writer is None:
+            await self.open()
+        async with self._write_lock:
+            db = self._writer
+            if not transaction:
+                yield self._wrap(db)
+                return
+            await db.execute("BEGIN IMMEDIATE")
+            try:
+                yield self._wrap(db)
+            except BaseException:
+                await db.rollback()
+                raise
+            await db.commit()
+    
+    async def checkpoint(self, mode: str = 'PASSIVE') -> Dict[str, Any]:
+        """Checkpoint the WAL into the main database file and report its size"""
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        if self._writer is None:
+            await self.open()
+        wal_before = self.wal_size()
+        async with self._write_lock:
+            async with self._writer.execute(f"PRAGMA wal_checkpoint({mode})") as cursor:
+                busy, wal_frames, checkpointed = await cursor.fetchone()
+        stats = {
+            'mode': mode,
+            'busy': bool(busy),
+            'wal_frames': wal_frames,
+            'checkpointed_frames': checkpointed,
+            'wal_bytes_before': wal_before,
+            'wal_bytes': self.wal_size(),
+            'timestamp': datetime.now().isoformat()
+        }
+        self.last_checkpoint = stats
+        return stats
+    
+    def start_checkpointing(self, interval: float, truncate_threshold: int):
+        """Start the background WAL checkpoint task (interval <= 0 disables it)"""
+        if interval <= 0:
+            return
+        if self._checkpoint_task is None or self._checkpoint_task.done():
+            self._checkpoint_task = asyncio.create_task(
+                self._checkpoint_loop(interval, truncate_threshold)
+            )
+    
+    async def stop_checkpointing(self):
+        """Stop the background checkpoint task"""
+        task, self._checkpoint_task = self._checkpoint_task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+    
+    async def _checkpoint_loop(self, interval: float, truncate_threshold: int):
+        """Periodically checkpoint; TRUNCATE once the WAL grows past the threshold"""
+        while True:
+            await asyncio.sleep(interval)
+            mode = 'TRUNCATE' if self.wal_size() > truncate_threshold else 'PASSIVE'
+            try:
+                stats = await self.checkpoint(mode)
+            except Exception as e:
+                logger.warning("WAL checkpoint failed on %s: %s", self.db_path, e)
+                continue
+            logger.debug(
+                "WAL checkpoint (%s) on %s: %s/%s frames, WAL %s -> %s bytes%s",
+                mode, self.db_path, stats['checkpointed_frames'], stats['wal_frames'],
+                stats['wal_bytes_before'], stats['wal_bytes'], " (busy)" if stats['busy'] else ""
+            )
+
+class WriteBehindQueue:
+    """Buffers high-frequency writes and group-commits them with executemany.
+    
+    Rows are grouped by statement and flushed in a single writer transaction
+    once batch_size rows are pending or flush_interval seconds have passed,
+    whichever comes first.  Callers block (instead of growing the buffer)
+    once max_pending rows are waiting, which keeps memory bounded.
+    """
+    
+    def __init__(self, pool: ConnectionPool, batch_size: int = 500,
+                 flush_interval: float = 1.0, max_pending: int = 10000):
+        self._pool = pool
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max(self.batch_size, max_pending)
+        self._pending: Dict[str, List[tuple]] = {}
+        self._pending_count = 0
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'queued': 0, 'flushed': 0, 'flushes': 0, 'failed': 0}
+    
+    @property
+    def pending(self) -> int:
+        return self._pending_count
+    
+    def start(self):
+        """Start the time-based flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+    
+    async def close(self):
+        """Stop the flush task and write out everything still buffered"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+    
+    async def put(self, sql: str, params: tuple):
+        """Queue one row for the given statement"""
+        while self._pending_count >= self.max_pending:
+            await self.flush(min_rows=self.max_pending)
+        self._pending.setdefault(sql, []).append(params)
+        self._pending_count += 1
+        self.stats['queued'] += 1
+        if self._pending_count >= self.batch_size:
+            await self.flush(min_rows=self.batch_size)
+    
+    async def flush(self, min_rows: int = 1) -> int:
+        """Write all buffered rows in one transaction; returns the row count.
+        
+        Skips the write if fewer than min_rows are pending by the time the
+        flush lock is acquired (another caller already drained the buffer).
+        """
+        async with self._flush_lock:
+            if not self._pending_count or self._pending_count < min_rows:
+                return 0
+            batch, count = self._pending, self._pending_count
+            self._pending, self._pending_count = {}, 0
+            try:
+                async with self._pool.writer() as db:
+                    for sql, rows in batch.items():
+                        await db.executemany(sql, rows)
+            except Exception as e:
+                self.stats['failed'] += count
+                logger.error("Write-behind flush of %s rows failed: %s", count, e)
+                return 0
+            self.stats['flushed'] += count
+            self.stats['flushes'] += 1
+            return count
+    
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+class ActivityCounter:
+    """Aggregates per-user message activity in memory between flushes.
+
+    Each message only bumps an in-memory counter; every flush_interval
+    seconds the accumulated deltas are written as one executemany upsert,
+    so a user who sends 100 messages costs one row write, not 100.
+    """
+
+    UPSERT = """
+        INSERT INTO users (user_id, username, display_name, join_date, last_seen, message_count)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET
+            username = excluded.username,
+            display_name = excluded.display_name,
+            last_seen = excluded.last_seen,
+            message_count = message_count + excluded.message_count
+    """
+
+    def __init__(self, pool: ConnectionPool, flush_interval: float = 30.0,
+                 on_flush: Optional[Callable[[List[int]], None]] = None):
+        self._pool = pool
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        # user_id -> [message_count, last_seen, username, display_name, first_seen]
+        self._pending: Dict[int, list] = {}
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {'messages': 0, 'flushed_users': 0, 'flushes': 0, 'failed': 0}
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def start(self):
+        """Start the periodic flush task"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        """Stop the flush task and write out the remaining counts"""
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+
+    def add(self, user_id: int, username: str, display_name: Optional[str] = None,
+            count: int = 1, seen_at: Optional[int] = None):
+        """Count messages for a user (no I/O)"""
+        seen_at = seen_at or now_epoch()
+        entry = self._pending.get(user_id)
+        if entry is None:
+            self._pending[user_id] = [count, seen_at, username, display_name, seen_at]
+        else:
+            entry[0] += count
+            entry[1:4] = seen_at, username, display_name
+        self.stats['messages'] += count
+
+    def pending_for(self, user_id: int) -> Optional[Tuple[int, int]]:
+        """Unflushed (message_count, last_seen) for a user, if any"""
+        entry = self._pending.get(user_id)
+        return (entry[0], entry[1]) if entry else None
+
+    async def flush(self) -> int:
+        """Upsert all pending deltas in one transaction; returns users written"""
+        async with self._flush_lock:
+            if not self._pending:
+                return 0
+            batch, self._pending = self._pending, {}
+            rows = [
+                (user_id, username, display_name, first_seen, last_seen, count)
+                for user_id, (count, last_seen, username, display_name, first_seen) in batch.items()
+            ]
+            try:
+                async with self._pool.writer() as db:
+                    await db.executemany(self.UPSERT, rows)
+            except Exception as e:
+                # Put the deltas back (merged with anything counted since) for the next flush
+                for user_id, old in batch.items():
+                    entry = self._pending.get(user_id)
+                    if entry is None:
+                        self._pending[user_id] = old
+                    else:
+                        entry[0] += old[0]
+                        entry[4] = old[4]
+                self.stats['failed'] += 1
+                logger.error("Activity flush of %s users failed: %s", len(rows), e)
+                return 0
+            self.stats['flushed_users'] += len(rows)
+            self.stats['flushes'] += 1
+            if self.on_flush:
+                self.on_flush(list(batch))
+            return len(rows)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
 class DatabaseManager:
-    def __init__(self, db_path: str = "data/bot_database.db"):
+    def __init__(self, db_path: str = "data/bot_database.db", read_pool_size: int = 4,
+                 telemetry_path: Optional[str] = None, partitions: int = 0,
+                 partition_dir: Optional[str] = None, maintenance: bool = True):
         self.db_path = db_path
-        # Ensure data directory exists
+        # Background checkpoints, retention and backups; benchmarks turn them
+        # off so housekeeping doesn't run inside their timed windows
+        self.maintenance = maintenance
+        # Logs and media shares go to their own file, by default next to the main one
+        main = Path(db_path)
+        self.telemetry_path = telemetry_path or str(main.with_name(f"{main.stem}_telemetry{main.suffix}"))
+        # Ensure data directories exist
         Path(db_path).parent.mkdir(exist_ok=True)
+        Path(self.telemetry_path).parent.mkdir(exist_ok=True)
+        # Per-statement timings, slow-query log and optional plan capture
+        self._query_stats = QueryStats(
+            slow_query_ms=Config.DATABASE_SLOW_QUERY_MS,
+            capture_plans=Config.DATABASE_CAPTURE_QUERY_PLANS
+        ) if Config.DATABASE_QUERY_STATS else None
+        # Long-lived connections, opened once in init_database
+        self._pool = ConnectionPool(
+            db_path, read_pool_size,
+            busy_timeout_ms=Config.DATABASE_BUSY_TIMEOUT_MS,
+            cache_size_kb=Config.DATABASE_CACHE_SIZE_KB,
+            mmap_size=Config.DATABASE_MMAP_SIZE,
+            stats=self._query_stats
+        )
+        # Separate file and writer for telemetry, so log floods never hold
+        # the main write lock that joins and reminders need
+        self._telemetry_pool = ConnectionPool(
+            self.telemetry_path, TELEMETRY_READ_POOL_SIZE,
+            busy_timeout_ms=Config.DATABASE_BUSY_TIMEOUT_MS,
+            cache_size_kb=Config.DATABASE_CACHE_SIZE_KB,
+            mmap_size=Config.DATABASE_MMAP_SIZE,
+            stats=self._query_stats
+        )
+        # Optional per-bucket files for events and reminders (see utils/partitions.py);
+        # the layout itself is read from the main database in init_database
+        self._partitions = PartitionPools(
+            partition_dir or str(main.parent / "partitions"),
+            main.stem,
+            partitions,
+            max_open=Config.DATABASE_PARTITION_MAX_OPEN,
+            pool_factory=lambda path: ConnectionPool(
+                path, Config.DATABASE_PARTITION_READ_POOL_SIZE,
+                busy_timeout_ms=Config.DATABASE_BUSY_TIMEOUT_MS,
+                cache_size_kb=Config.DATABASE_CACHE_SIZE_KB,
+                mmap_size=Config.DATABASE_MMAP_SIZE,
+                stats=self._query_stats
+            ),
+            migrations=PARTITION_MIGRATIONS,
+            checkpoint_interval=Config.DATABASE_CHECKPOINT_INTERVAL if maintenance else 0,
+            wal_truncate_bytes=Config.DATABASE_WAL_TRUNCATE_BYTES
+        ) if partitions > 0 else None
+        self._layout: Optional[PartitionLayout] = None
+        # Whether the main database still holds events/reminders from before partitioning
+        self._legacy_rows = False
+        # Group-commit buffer for logs and media shares (telemetry database)
+        self._write_queue = WriteBehindQueue(
+            self._telemetry_pool,
+            batch_size=Config.DATABASE_WRITE_BATCH_SIZE,
+            flush_interval=Config.DATABASE_WRITE_FLUSH_INTERVAL,
+            max_pending=Config.DATABASE_WRITE_MAX_PENDING
+        )
+        # Read-through caches; entries are invalidated by the writes that change them
+        self._event_cache = TTLCache(Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
+        self._user_cache = TTLCache(Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
+        # user_id -> {setting key: decoded value} for the keys read so far
+        self._settings_cache = TTLCache(Config.CACHE_MAX_ENTRIES, Config.CACHE_TTL)
+        # Per-user message counts, upserted in one batch per interval
+        self._activity = ActivityCounter(
+            self._pool,
+            flush_interval=Config.DATABASE_ACTIVITY_FLUSH_INTERVAL,
+            on_flush=self._invalidate_users
+        )
+        # Batched pruning of rows that would otherwise grow forever, one job per file
+        reminder_policies = [
+            RetentionPolicy('reminders', 'remind_time', Config.RETENTION_REMINDER_DAYS,
+                            condition="status = 'completed'")
+        ]
+        self._retention = RetentionJob(
+            self._pool,
+            reminder_policies,
+            batch_size=Config.RETENTION_BATCH_SIZE,
+            batch_pause=Config.RETENTION_BATCH_PAUSE,
+            vacuum_step_pages=Config.RETENTION_VACUUM_PAGES
+        )
+        self._partition_retention = PartitionedRetentionJob(
+            self._partitions,
+            reminder_policies,
+            batch_size=Config.RETENTION_BATCH_SIZE,
+            batch_pause=Config.RETENTION_BATCH_PAUSE,
+            vacuum_step_pages=Config.RETENTION_VACUUM_PAGES
+        ) if self._partitions is not None else None
+        self._telemetry_retention = RetentionJob(
+            self._telemetry_pool,
+            [
+                RetentionPolicy('bot_logs', 'timestamp', Config.RETENTION_LOG_DAYS),
+                RetentionPolicy('media_shares', 'shared_at', Config.RETENTION_MEDIA_DAYS)
+            ],
+            batch_size=Config.RETENTION_BATCH_SIZE,
+            batch_pause=Config.RETENTION_BATCH_PAUSE,
+            vacuum_step_pages=Config.RETENTION_VACUUM_PAGES
+        )
+        # Scheduled online backups into BACKUP_DIR (telemetry and bucket files included)
+        backup_options = dict(
+            keep=Config.BACKUP_KEEP,
+            pages_per_step=Config.BACKUP_PAGES_PER_STEP,
+            step_pause=Config.BACKUP_STEP_PAUSE,
+            extra_paths=[self.telemetry_path]
+        )
+        if self._partitions is not None:
+            self._backup = PartitionedBackupJob(db_path, self._partitions, Config.BACKUP_DIR, **backup_options)
+        else:
+            self._backup = BackupJob(db_path, Config.BACKUP_DIR, **backup_options)
+    
+    def _read(self):
+        """Borrow a pooled read-only connection"""
+        return self._pool.reader()
+    
+    def _write(self):
+        """Run a write transaction on the single writer connection"""
+        return self._pool.writer()
+    
+    def _read_telemetry(self):
+        """Borrow a read-only connection to the telemetry database"""
+        return self._telemetry_pool.reader()
+    
+    async def close(self):
+        """Flush buffered writes and close all pooled connections (called on bot shutdown)"""
+        await self._backup.stop()
+        await self._retention.stop()
+        await self._telemetry_retention.stop()
+        if self._partitions is not None:
+            await self._partition_retention.stop()
+        await self._activity.close()
+        await self._write_queue.close()
+        await self._telemetry_pool.close()
+        if self._partitions is not None:
+            await self._partitions.close()
+        await self._pool.close()
+    
+    async def flush_writes(self) -> int:
+        """Write out everything in the write-behind queue and activity counter now"""
+        return await self._activity.flush() + await self._write_queue.flush()
+    
+    async def checkpoint(self, mode: str = 'PASSIVE') -> Dict[str, Any]:
+        """Run a WAL checkpoint on the main database now and return its stats"""
+        return await self._pool.checkpoint(mode)
+    
+    def get_wal_stats(self) -> Dict[str, Any]:
+        """Current WAL sizes and the result of the last background checkpoint"""
+        return {
+            'wal_bytes': self._pool.wal_size(),
+            'telemetry_wal_bytes': self._telemetry_pool.wal_size(),
+            'last_checkpoint': self._pool.last_checkpoint
+        }
         
-    async def init_database(self):
-        """Initialize the database with required tables"""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Users table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT NOT NULL,
-                    display_name TEXT,
-                    join_date TEXT,
-                    last_seen TEXT,
-                    message_count INTEGER DEFAULT 0,
-                    settings TEXT DEFAULT '{}'
-                )
-            """)
-            
-            # Events table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS events (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    title TEXT NOT NULL,
-                    description TEXT,
-                    creator_id INTEGER NOT NULL,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    event_date TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    max_participants INTEGER DEFAULT -1,
-                    status TEXT DEFAULT 'active'
-                )
-            """)
-            
-            # Event participants table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS event_participants (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    event_id INTEGER NOT NULL,
-                    user_id INTEGER NOT NULL,
-                    joined_at TEXT NOT NULL,
-                    FOREIGN KEY (event_id) REFERENCES events (id),
-                    UNIQUE(event_id, user_id)
-                )
-            """)
-            
-            # Reminders table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS reminders (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    message TEXT NOT NULL,
-                    remind_time TEXT NOT NULL,
-                    created_at TEXT NOT NULL,
-                    is_recurring BOOLEAN DEFAULT FALSE,
-                    recurring_pattern TEXT,
-                    status TEXT DEFAULT 'active'
-                )
-            """)
-            
-            # Media shares table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS media_shares (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER NOT NULL,
-                    guild_id INTEGER NOT NULL,
-                    channel_id INTEGER NOT NULL,
-                    media_type TEXT NOT NULL,
-                    media_url TEXT NOT NULL,
-                    description TEXT,
-                    shared_at TEXT NOT NULL
-                )
-            """)
-            
-            # Bot logs table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS bot_logs (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    level TEXT NOT NULL,
-                    message TEXT NOT NULL,
-                    module TEXT,
-                    user_id INTEGER,
-                    guild_id INTEGER,
-                    timestamp TEXT NOT NULL
-                )
-            """)
+    def get_cache_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Hit/miss statistics for the read-through caches"""
+        return {
+            'events': self._event_cache.stats(),
+            'users': self._user_cache.stats(),
+            'settings': self._settings_cache.stats()
+        }
+    
+    async def run_retention(self) -> Dict[str, Any]:
+        """Prune expired rows and vacuum now; returns rows deleted per table and bytes reclaimed"""
+        await self._write_queue.flush()
+        await self._retention.run_once()
+        await self._telemetry_retention.run_once()
+        if self._partitions is not None:
+            await self._partition_retention.run_once()
+        return self.get_retention_stats()
+    
+    def get_retention_stats(self) -> Optional[Dict[str, Any]]:
+        """Combined report from the last retention runs on every database, if any"""
+        jobs = [self._retention, self._telemetry_retention, self._partition_retention]
+        reports = [job.last_report for job in jobs if job is not None and job.last_report]
+        if not reports:
+            return None
+        return {
+            'deleted': {table: count for r in reports for table, count in r['deleted'].items()},
+            'bytes_reclaimed': sum(r['bytes_reclaimed'] for r in reports),
+            'timestamp': max(r['timestamp'] for r in reports)
+        }
+    
+    async def backup(self) -> Dict[str, Any]:
+        """Take an online backup into BACKUP_DIR now; returns its path, size and timing"""
+        await self.flush_writes()
+        return await self._backup.run_once()
+    
+    def get_backup_stats(self) -> Optional[Dict[str, Any]]:
+        """Report from the last backup, if any"""
+        return self._backup.last_report
+    
+    def get_partition_stats(self) -> Optional[Dict[str, Any]]:
+        """Bucket files and open-handle counters, or None when partitioning is off"""
+        if self._partitions is None:
+            return None
+        return {**self._partitions.stats(), 'legacy_rows': self._legacy_rows}
+    
+    def _invalidate_event(self, event_id: int):
+        self._event_cache.invalidate(('event', event_id))
+    
+    def _invalidate_users(self, user_ids: List[int]):
+        for user_id in user_ids:
+            self._user_cache.invalidate(user_id)
+    
+    @asynccontextmanager
+    async def _guild_storage(self, guild_id: int) -> AsyncIterator[ConnectionPool]:
+        """Pool that new events/reminders of guild_id are written to"""
+        if self._layout is None:
+            yield self._pool
+            return
+        async with self._partitions.acquire(self._layout.bucket_for_guild(guild_id)) as pool:
+            yield pool
+    
+    @asynccontextmanager
+    async def _row_storage(self, row_id: int) -> AsyncIterator[ConnectionPool]:
+        """Pool holding the event/reminder with this id"""
+        bucket = self._layout.bucket_for_id(row_id) if self._layout is not None else None
+        if bucket is None:
+            yield self._pool
+            return
+        async with self._partitions.acquire(bucket) as pool:
+            yield pool
+    
+    def _new_id(self, table: str, guild_id: int) -> Tuple[str, tuple]:
+        """SQL expression and params for the id of a new events/reminders row.
+        
+        NULL (AUTOINCREMENT) without partitioning; otherwise the next id in
+        the guild's bucket sequence, continuing from the highest id that
+        bucket ever handed out.
+        """
+        if self._layout is None:
+            return "NULL", ()
+        start, step = self._layout.id_sequence(self._layout.bucket_for_guild(guild_id))
+        return (f"(SELECT COALESCE(MAX(seq), ?) + ? FROM sqlite_sequence WHERE name = '{table}')",
+                (start, step))
+    
+    async def _fetch_guild_scoped(self, sql: str, params: tuple = (), guild_id: Optional[int] = None,
+                                  key: Optional[Callable[[tuple], Any]] = None, reverse: bool = False,
+                                  limit: Optional[int] = None) -> List[tuple]:
+        """Run a SELECT on events/reminders wherever they are stored and merge the rows.
+        
+        Without partitioning that is just the main database.  Otherwise it
+        is the guild's bucket (or, with guild_id=None, every bucket) plus
+        the main file while it still holds pre-partitioning rows.  Each
+        source must return rows sorted by key (descending if reverse); the
+        merged result keeps that order and is cut to limit rows.  The
+        statement is recorded under the calling method's name, since the
+        one executing it is always the local fetch.
+        """
+        async def fetch(pool: ConnectionPool) -> List[tuple]:
+            async with pool.reader() as db:
+                async with db.execute(sql, params) as cursor:
+                    return await cursor.fetchall()
+        
+        with statement_name(helper_caller()):
+            if self._layout is None:
+                return await fetch(self._pool)
+            results = [await fetch(self._pool)] if self._legacy_rows else []
+            if guild_id is None:
+                results += await self._partitions.fan_out(fetch)
+            else:
+                bucket = self._layout.bucket_for_guild(guild_id)
+                if self._partitions.exists(bucket):
+                    async with self._partitions.acquire(bucket) as pool:
+                        results.append(await fetch(pool))
+        if key is None:
+            rows = list(itertools.chain.from_iterable(results))
+        else:
+            rows = list(heapq.merge(*results, key=key, reverse=reverse))
+        return rows[:limit] if limit is not None else rows
+    
+    async def _search_page(self, table: str, record_cls, columns: Sequence[str], scope: str,
+                           scope_id: int, query: str, where: str, params: tuple, limit: int,
+                           after: Optional[Cursor], before: Optional[Cursor],
+                           telemetry: bool = False, guild_id: Optional[int] = None) -> Page:
+        """One keyset page of rows in table whose columns match query, best match first.
+
+        Rows are ordered by (rank, id), where rank is the bm25 score of the
+        table's FTS5 index (lower is better).  scope/scope_id pick the user or
+        guild; where/params filter further on the table's own columns.
+        telemetry selects the telemetry database; otherwise the rows come
+        from guild_id's partition, or every partition when it is None (bm25
+        scores are per file, so across partitions the order is approximate).
+        The statement is recorded under the calling search method's name.
+        """
+        match = _fts_query(query, columns, scope, scope_id)
+        if match is None:
+            return Page()
+        keyset, order, page_params = _keyset('rank', limit, after, before)
+        # The FTS table shares column names with its table, so it is
+        # read in a CTE and only rowid/rank are joined back
+        sql = f"""
+            WITH hits AS (
+                SELECT rowid, rank FROM {table}_fts WHERE {table}_fts MATCH ?
+            )
+            SELECT {record_cls.COLUMNS}, hits.rank FROM hits
+            JOIN {table} ON {table}.id = hits.rowid
+            WHERE {where}{keyset}
+            {order} LIMIT ?
+        """
+        sql_params = (match, *params, *page_params)
+        key = lambda row: (row[-1], row[0])
+        with statement_name(helper_caller()):
+            if telemetry:
+                async with self._read_telemetry() as db:
+                    async with db.execute(sql, sql_params) as cursor:
+                        rows = await cursor.fetchall()
+            else:
+                rows = await self._fetch_guild_scoped(sql, sql_params, guild_id, key=key,
+                                                      reverse=before is not None, limit=limit + 1)
+        page = _make_page(rows, limit, after, before, key=key)
+        return Page([record_cls.from_row(row[:-1]) for row in page.items], page.next_cursor, page.prev_cursor)
+    
+    async def _move_telemetry_tables(self):
+        """Move bot_logs/media_shares rows out of the main database, once.
+        
+        Earlier versions kept them in the main file.  The rows are copied into
+        the attached telemetry database and the old tables dropped in one
+        transaction; INSERT OR IGNORE keeps a retry after a crash between the
+        two files' commits from duplicating anything.
+        """
+        async with self._pool.writer(transaction=False) as db:
+            async with db.execute("""
+                SELECT name FROM sqlite_master WHERE type = 'table' AND name IN ('bot_logs', 'media_shares')
+            """) as cursor:
+                tables = [row[0] for row in await cursor.fetchall()]
+            if not tables:
+                return
             
-            await db.commit()
+            columns = {'bot_logs': LogEntry.COLUMNS, 'media_shares': MediaShare.COLUMNS}
+            moved = {}
+            await db.execute("ATTACH DATABASE ? AS telemetry", (self.telemetry_path,))
+            try:
+                await db.execute("BEGIN IMMEDIATE")
+                try:
+                    for table in tables:
+                        cursor = await db.execute(f"""
+                            INSERT OR IGNORE INTO telemetry.{table} ({columns[table]})
+                            SELECT {columns[table]} FROM main.{table}
+                        """)
+                        moved[table] = cursor.rowcount
+                        await db.execute(f"DROP TABLE main.{table}")
+                    await db.execute("DROP TABLE IF EXISTS main.media_shares_fts")
+                    await db.execute("COMMIT")
+                except BaseException:
+                    await db.execute("ROLLBACK")
+                    raise
+            finally:
+                await db.execute("DETACH DATABASE telemetry")
+        logger.info("Moved telemetry tables to %s: %s", self.telemetry_path, moved)
+    
+    async def _load_partition_layout(self):
+        """Read (or, the first time partitioning is enabled, record) the bucket layout.
+        
+        Rows already in the main database keep their ids and stay there;
+        new ids start above the highest one used so far.  The bucket count
+        can't change afterwards without moving data, so a mismatch with the
+        configured count is refused rather than silently losing rows.
+        """
+        partitions = self._partitions.partitions if self._partitions is not None else 0
+        async with self._pool.writer() as db:
+            async with db.execute("SELECT partitions, id_floor FROM partition_layout") as cursor:
+                row = await cursor.fetchone()
+            if row is None and partitions:
+                async with db.execute("""
+                    SELECT COALESCE(MAX(seq), 0) + 1 FROM sqlite_sequence WHERE name IN ('events', 'reminders')
+                """) as cursor:
+                    (id_floor,) = await cursor.fetchone()
+                await db.execute("""
+                    INSERT INTO partition_layout (id, partitions, id_floor, created_at) VALUES (1, ?, ?, ?)
+                """, (partitions, id_floor, now_epoch()))
+                row = (partitions, id_floor)
+                logger.info("Partitioned events and reminders into %s files (new ids from %s)",
+                            partitions, id_floor)
+            async with db.execute("""
+                SELECT EXISTS (SELECT 1 FROM events) OR EXISTS (SELECT 1 FROM reminders)
+            """) as cursor:
+                (legacy,) = await cursor.fetchone()
+        if row is None:
+            return
+        if row[0] != partitions:
+            raise RuntimeError(
+                f"{self.db_path} stores events and reminders in {row[0]} partition files, "
+                f"but DATABASE_PARTITIONS is {partitions}"
+            )
+        self._layout = PartitionLayout(*row)
+        self._legacy_rows = bool(legacy)
+    
+    async def init_database(self):
+        """Open the connection pools and bring their schemas up to date"""
+        await self._pool.open()
+        await self._telemetry_pool.open()
+        await apply_migrations(self._pool, MIGRATIONS)
+        await apply_migrations(self._telemetry_pool, TELEMETRY_MIGRATIONS)
+        await self._move_telemetry_tables()
+        await self._load_partition_layout()
+        # Keep one-off migration statements out of the query stats
+        self.reset_query_stats()
+        
+        self._write_queue.start()
+        self._activity.start()
+        if not self.maintenance:
+            return
+        for pool in (self._pool, self._telemetry_pool):
+            pool.start_checkpointing(
+                Config.DATABASE_CHECKPOINT_INTERVAL,
+                Config.DATABASE_WAL_TRUNCATE_BYTES
+            )
+        self._retention.start(Config.RETENTION_INTERVAL, Config.RETENTION_INITIAL_DELAY)
+        self._telemetry_retention.start(Config.RETENTION_INTERVAL, Config.RETENTION_INITIAL_DELAY)
+        if self._partitions is not None:
+            self._partition_retention.start(Config.RETENTION_INTERVAL, Config.RETENTION_INITIAL_DELAY)
+        self._backup.start(Config.BACKUP_INTERVAL)
     
     # User management methods
     async def add_or_update_user(self, user_id: int, username: str, display_name: str = None):
-        """Add or update user information"""
-        async with aiosqlite.connect(self.db_path) as db:
+        """Add or update user information (message_count, join_date and settings are kept)"""
+        now = now_epoch()
+        async with self._write() as db:
             await db.execute("""
-                INSERT OR REPLACE INTO users (user_id, username, display_name, join_date, last_seen)
+                INSERT INTO users (user_id, username, display_name, join_date, last_seen)
                 VALUES (?, ?, ?, ?, ?)
-            """, (user_id, username, display_name, datetime.now().isoformat(), datetime.now().isoformat()))
-            await db.commit()
+                ON CONFLICT(user_id) DO UPDATE SET
+                    username = excluded.username,
+                    display_name = excluded.display_name,
+                    last_seen = excluded.last_seen
+            """, (user_id, username, display_name, now, now))
+        self._user_cache.invalidate(user_id)
+    
+    async def get_user(self, user_id: int) -> Optional[User]:
+        """Get user information (cached), including not yet flushed message activity"""
+        # The cache keeps raw rows, so every caller gets its own record
+        row = self._user_cache.get(user_id)
+        if row is None:
+            version = self._user_cache.version(user_id)
+            async with self._read() as db:
+                async with db.execute(f"""
+                    SELECT {User.COLUMNS} FROM users WHERE user_id = ?
+                """, (user_id,)) as cursor:
+                    row = await cursor.fetchone()
+            if not row:
+                return None
+            self._user_cache.set(user_id, row, version)
+        user = User.from_row(row)
+        pending = self._activity.pending_for(user_id)
+        if pending:
+            user.message_count = (user.message_count or 0) + pending[0]
+            user.last_seen = pending[1]
+        return user
+    
+    def update_user_activity(self, user_id: int, username: str, display_name: str = None):
+        """Count one message for a user and update last seen.
+        
+        Only touches an in-memory counter; the totals are upserted in one
+        batch every DATABASE_ACTIVITY_FLUSH_INTERVAL seconds.
+        """
+        self._activity.add(user_id, username, display_name)
     
-    async def get_user(self, user_id: int) -> Optional[Dict[str, Any]]:
-        """Get user information"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM users WHERE user_id = ?", (user_id,)) as cursor:
+    # User settings (users.settings JSON, one key at a time)
+    async def get_user_setting(self, user_id: int, key: str, default: Any = None) -> Any:
+        """Read one settings key (dotted for nested objects), cached per user.
+        
+        Only the requested value is extracted by SQLite; the rest of the
+        settings object is never parsed in Python.
+        """
+        cached = self._settings_cache.get(user_id, count=False)
+        if cached is not None and key in cached:
+            # Hits and misses are counted per key, not per user entry
+            self._settings_cache.hits += 1
+            value = cached[key]
+            return default if value is _MISSING else value
+        self._settings_cache.misses += 1
+        version = self._settings_cache.version(user_id)
+        path = _setting_path(key)
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT json_type(settings, ?), json_extract(settings, ?) FROM users WHERE user_id = ?
+            """, (path, path, user_id)) as cursor:
                 row = await cursor.fetchone()
-                return dict(row) if row else None
+        value = _decode_setting(row[0], row[1], _MISSING) if row else _MISSING
+        # A copy: if the read turns out stale, the cached entry must stay untouched
+        entry = {**(self._settings_cache.get(user_id, count=False) or {}), key: value}
+        self._settings_cache.set(user_id, entry, version)
+        return default if value is _MISSING else value
     
-    async def update_user_activity(self, user_id: int):
-        """Update user's last seen time and increment message count"""
-        async with aiosqlite.connect(self.db_path) as db:
+    async def get_user_settings(self, user_id: int) -> Dict[str, Any]:
+        """All of a user's settings as a dict (for display; use get_user_setting for lookups)"""
+        async with self._read() as db:
+            async with db.execute("""
+                SELECT settings FROM users WHERE user_id = ?
+            """, (user_id,)) as cursor:
+                row = await cursor.fetchone()
+        return json.loads(row[0] or '{}') if row else {}
+    
+    async def set_user_setting(self, user_id: int, key: str, value: Any, username: str = None):
+        """Set one settings key in place with json_set, creating the user row if needed.
+        
+        value must be JSON-serializable.  The rest of the row and the other
+        settings keys are left untouched.
+        """
+        path = _setting_path(key)
+        encoded = json.dumps(value)
+        async with self._write() as db:
             await db.execute("""
-                UPDATE users 
-                SET last_seen = ?, message_count = message_count + 1 
-                WHERE user_id = ?
-            """, (datetime.now().isoformat(), user_id))
-            await db.commit()
+                INSERT INTO users (user_id, username, join_date, settings)
+                VALUES (?, ?, ?, json_set('{}', ?, json(?)))
+                ON CONFLICT(user_id) DO UPDATE SET
+                    settings = json_set(COALESCE(settings, '{}'), ?, json(?))
+            """, (user_id, username or '', now_epoch(), path, encoded, path, encoded))
+        self._invalidate_settings(user_id)
+    
+    async def delete_user_setting(self, user_id: int, key: str) -> bool:
+        """Remove one settings key; returns False if the user has no settings row"""
+        path = _setting_path(key)
+        async with self._write() as db:
+            cursor = await db.execute("""
+                UPDATE users SET settings = json_remove(settings, ?) WHERE user_id = ?
+            """, (path, user_id))
+            updated = cursor.rowcount > 0
+        self._invalidate_settings(user_id)
+        return updated
+    
+    def _invalidate_settings(self, user_id: int):
+        # A dotted key can change cached parents or children, so drop the whole entry
+        self._settings_cache.invalidate(user_id)
+        self._user_cache.invalidate(user_id)
+    
+    def get_activity_stats(self) -> Dict[str, Any]:
+        """Counters for the message activity pipeline"""
+        return {**self._activity.stats, 'pending_users': self._activity.pending}
+    
+    def get_query_stats(self, limit: Optional[int] = None, sort_by: str = 'total_ms') -> Optional[Dict[str, Any]]:
+        """Per-statement timings (busiest first), or None if instrumentation is off"""
+        if self._query_stats is None:
+            return None
+        return {
+            'summary': self._query_stats.summary(),
+            'statements': self._query_stats.snapshot(sort_by=sort_by, limit=limit)
+        }
+    
+    def reset_query_stats(self):
+        """Start a fresh measurement window"""
+        if self._query_stats is not None:
+            self._query_stats.reset()
     
     # Event management methods
     async def create_event(self, title: str, description: str, creator_id: int, 
-                          guild_id: int, channel_id: int, event_date: str, 
+                          guild_id: int, channel_id: int, event_date: int, 
                           max_participants: int = -1) -> int:
-        """Create a new event and return its ID"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO events (title, description, creator_id, guild_id, channel_id, 
+        """Create a new event and return its ID (event_date in epoch seconds)"""
+        new_id, id_params = self._new_id('events', guild_id)
+        async with self._guild_storage(guild_id) as pool, pool.writer() as db:
+            cursor = await db.execute(f"""
+                INSERT INTO events (id, title, description, creator_id, guild_id, channel_id,
                                   event_date, created_at, max_participants)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (title, description, creator_id, guild_id, channel_id, 
-                  event_date, datetime.now().isoformat(), max_participants))
-            await db.commit()
-            return cursor.lastrowid
+                VALUES ({new_id}, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (*id_params, title, description, creator_id, guild_id, channel_id,
+                  event_date, now_epoch(), max_participants))
+            event_id = cursor.lastrowid
+        self._invalidate_event(event_id)
+        return event_id
     
-    async def get_event(self, event_id: int) -> Optional[Dict[str, Any]]:
-        """Get event information"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("SELECT * FROM events WHERE id = ?", (event_id,)) as cursor:
-                row = await cursor.fetchone()
-                return dict(row) if row else None
+    async def get_event(self, event_id: int) -> Optional[Event]:
+        """Get event information, including its participant_count (cached)"""
+        row = self._event_cache.get(('event', event_id))
+        if row is None:
+            version = self._event_cache.version(('event', event_id))
+            async with self._row_storage(event_id) as pool, pool.reader() as db:
+                async with db.execute(f"""
+                    SELECT {Event.COLUMNS} FROM events WHERE id = ?
+                """, (event_id,)) as cursor:
+                    row = await cursor.fetchone()
+            if not row:
+                return None
+            self._event_cache.set(('event', event_id), row, version)
+        return Event.from_row(row)
     
-    async def get_guild_events(self, guild_id: int, status: str = 'active') -> List[Dict[str, Any]]:
+    async def get_guild_events(self, guild_id: int, status: str = 'active') -> List[Event]:
         """Get all events for a guild"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM events WHERE guild_id = ? AND status = ? 
-                ORDER BY event_date ASC
-            """, (guild_id, status)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Event.COLUMNS} FROM events WHERE guild_id = ? AND status = ?
+            ORDER BY event_date ASC, id ASC
+        """, (guild_id, status), guild_id, key=lambda row: (row[6], row[0]))
+        return [Event.from_row(row) for row in rows]
+
+    async def get_guild_events_page(self, guild_id: int, status: str = 'active', limit: int = 10,
+                                    after: Optional[Cursor] = None,
+                                    before: Optional[Cursor] = None) -> Page:
+        """Get one keyset page of a guild's events"""
+        where, order, page_params = _keyset('event_date', limit, after, before)
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Event.COLUMNS} FROM events
+            WHERE guild_id = ? AND status = ?{where}
+            {order} LIMIT ?
+        """, (guild_id, status, *page_params), guild_id, key=lambda row: (row[6], row[0]),
+            reverse=before is not None, limit=limit + 1)
+        events = [Event.from_row(row) for row in rows]
+        return _make_page(events, limit, after, before, key=lambda e: (e.event_date, e.id))
     
-    async def join_event(self, event_id: int, user_id: int) -> bool:
-        """Add user to event participants"""
-        try:
-            async with aiosqlite.connect(self.db_path) as db:
-                await db.execute("""
-                    INSERT INTO event_participants (event_id, user_id, joined_at)
-                    VALUES (?, ?, ?)
-                """, (event_id, user_id, datetime.now().isoformat()))
-                await db.commit()
-                return True
-        except aiosqlite.IntegrityError:
-            return False  # User already joined
+    async def count_guild_events(self, guild_id: int, status: str = 'active') -> int:
+        """Count a guild's events with the given status"""
+        rows = await self._fetch_guild_scoped("""
+            SELECT COUNT(*) FROM events WHERE guild_id = ? AND status = ?
+        """, (guild_id, status), guild_id)
+        return sum(row[0] for row in rows)
+
+    async def search_guild_events(self, guild_id: int, query: str, status: str = 'active', limit: int = 10,
+                                  after: Optional[Cursor] = None,
+                                  before: Optional[Cursor] = None) -> Page:
+        """Full-text search over a guild's event titles and descriptions"""
+        return await self._search_page('events', Event, ('title', 'description'), 'guild_id', guild_id,
+                                       query, "status = ?", (status,), limit, after, before,
+                                       guild_id=guild_id)
+
+    async def join_event(self, event_id: int, user_id: int) -> JoinResult:
+        """Add user to event participants if the event still has room.
+        
+        The membership insert and the capacity check run in one BEGIN
+        IMMEDIATE transaction, so simultaneous joins can never overfill an
+        event: each one sees the participant_count left by the one before.
+        """
+        async with self._row_storage(event_id) as pool, pool.writer() as db:
+            cursor = await db.execute("""
+                INSERT OR IGNORE INTO event_participants (event_id, user_id, joined_at)
+                VALUES (?, ?, ?)
+            """, (event_id, user_id, now_epoch()))
+            if cursor.rowcount == 0:
+                return JoinResult.ALREADY_JOINED
+            participant_id = cursor.lastrowid
+            
+            cursor = await db.execute("""
+                UPDATE events SET participant_count = participant_count + 1
+                WHERE id = ? AND (max_participants <= 0 OR participant_count < max_participants)
+            """, (event_id,))
+            if cursor.rowcount == 0:
+                # Full (or no such event): undo the insert within the same transaction
+                await db.execute("DELETE FROM event_participants WHERE id = ?", (participant_id,))
+                async with db.execute("SELECT 1 FROM events WHERE id = ?", (event_id,)) as cursor:
+                    exists = await cursor.fetchone() is not None
+                return JoinResult.FULL if exists else JoinResult.NOT_FOUND
+        self._invalidate_event(event_id)
+        return JoinResult.JOINED
     
     async def leave_event(self, event_id: int, user_id: int) -> bool:
         """Remove user from event participants"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._row_storage(event_id) as pool, pool.writer() as db:
             cursor = await db.execute("""
                 DELETE FROM event_participants WHERE event_id = ? AND user_id = ?
             """, (event_id, user_id))
-            await db.commit()
-            return cursor.rowcount > 0
+            removed = cursor.rowcount > 0
+            if removed:
+                await db.execute("""
+                    UPDATE events SET participant_count = MAX(participant_count - 1, 0)
+                    WHERE id = ?
+                """, (event_id,))
+        if removed:
+            self._invalidate_event(event_id)
+        return removed
     
     async def get_event_participants(self, event_id: int) -> List[int]:
         """Get list of user IDs participating in an event"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._row_storage(event_id) as pool, pool.reader() as db:
             async with db.execute("""
                 SELECT user_id FROM event_participants WHERE event_id = ?
             """, (event_id,)) as cursor:
@@ -195,91 +1190,158 @@ class DatabaseManager:
     
     # Reminder management methods
     async def create_reminder(self, user_id: int, guild_id: int, channel_id: int,
-                            message: str, remind_time: str, is_recurring: bool = False,
+                            message: str, remind_time: int, is_recurring: bool = False,
                             recurring_pattern: str = None) -> int:
-        """Create a new reminder"""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO reminders (user_id, guild_id, channel_id, message, remind_time,
+        """Create a new reminder (remind_time in epoch seconds)"""
+        new_id, id_params = self._new_id('reminders', guild_id)
+        async with self._guild_storage(guild_id) as pool, pool.writer() as db:
+            cursor = await db.execute(f"""
+                INSERT INTO reminders (id, user_id, guild_id, channel_id, message, remind_time,
                                      created_at, is_recurring, recurring_pattern)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, guild_id, channel_id, message, remind_time,
-                  datetime.now().isoformat(), is_recurring, recurring_pattern))
-            await db.commit()
+                VALUES ({new_id}, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (*id_params, user_id, guild_id, channel_id, message, remind_time,
+                  now_epoch(), is_recurring, recurring_pattern))
             return cursor.lastrowid
     
-    async def get_active_reminders(self) -> List[Dict[str, Any]]:
-        """Get all active reminders"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM reminders WHERE status = 'active'
-                ORDER BY remind_time ASC
-            """) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
-    
-    async def get_user_reminders(self, user_id: int) -> List[Dict[str, Any]]:
+    async def get_active_reminders(self) -> List[Reminder]:
+        """Get all active reminders (from every partition)"""
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Reminder.COLUMNS} FROM reminders WHERE status = 'active'
+            ORDER BY remind_time ASC, id ASC
+        """, key=lambda row: (row[5], row[0]))
+        return [Reminder.from_row(row) for row in rows]
+
+    async def get_due_reminders(self, now: Optional[int] = None) -> List[Reminder]:
+        """Get active reminders whose remind_time has passed (index range scan per partition)"""
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Reminder.COLUMNS} FROM reminders
+            WHERE status = 'active' AND remind_time <= ?
+            ORDER BY remind_time ASC, id ASC
+        """, (now_epoch() if now is None else now,), key=lambda row: (row[5], row[0]))
+        return [Reminder.from_row(row) for row in rows]
+
+    async def get_user_reminders(self, user_id: int) -> List[Reminder]:
         """Get all reminders for a specific user"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM reminders WHERE user_id = ? AND status = 'active'
-                ORDER BY remind_time ASC
-            """, (user_id,)) as cursor:
-                rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Reminder.COLUMNS} FROM reminders WHERE user_id = ? AND status = 'active'
+            ORDER BY remind_time ASC, id ASC
+        """, (user_id,), key=lambda row: (row[5], row[0]))
+        return [Reminder.from_row(row) for row in rows]
+
+    async def get_user_reminders_page(self, user_id: int, limit: int = 10,
+                                      after: Optional[Cursor] = None,
+                                      before: Optional[Cursor] = None) -> Page:
+        """Get one keyset page of a user's active reminders, soonest first"""
+        where, order, page_params = _keyset('remind_time', limit, after, before)
+        # A user's reminders can be in any guild, so this reads every partition
+        rows = await self._fetch_guild_scoped(f"""
+            SELECT {Reminder.COLUMNS} FROM reminders
+            WHERE user_id = ? AND status = 'active'{where}
+            {order} LIMIT ?
+        """, (user_id, *page_params), key=lambda row: (row[5], row[0]),
+            reverse=before is not None, limit=limit + 1)
+        reminders = [Reminder.from_row(row) for row in rows]
+        return _make_page(reminders, limit, after, before, key=lambda r: (r.remind_time, r.id))
+    
+    async def search_user_reminders(self, user_id: int, query: str, limit: int = 10,
+                                    after: Optional[Cursor] = None,
+                                    before: Optional[Cursor] = None) -> Page:
+        """Full-text search over a user's active reminders"""
+        return await self._search_page('reminders', Reminder, ('message',), 'user_id', user_id,
+                                       query, "status = 'active'", (), limit, after, before)
     
     async def complete_reminder(self, reminder_id: int):
         """Mark a reminder as completed"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._row_storage(reminder_id) as pool, pool.writer() as db:
             await db.execute("""
                 UPDATE reminders SET status = 'completed' WHERE id = ?
             """, (reminder_id,))
-            await db.commit()
+    
+    async def reschedule_reminder(self, reminder_id: int, remind_time: int):
+        """Move a recurring reminder to its next occurrence in place"""
+        async with self._row_storage(reminder_id) as pool, pool.writer() as db:
+            await db.execute("""
+                UPDATE reminders SET remind_time = ? WHERE id = ?
+            """, (remind_time, reminder_id))
     
     async def delete_reminder(self, reminder_id: int, user_id: int) -> bool:
         """Delete a reminder (only by its creator)"""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._row_storage(reminder_id) as pool, pool.writer() as db:
             cursor = await db.execute("""
                 DELETE FROM reminders WHERE id = ? AND user_id = ?
             """, (reminder_id, user_id))
-            await db.commit()
             return cursor.rowcount > 0
     
     # Media sharing methods
     async def log_media_share(self, user_id: int, guild_id: int, channel_id: int,
                             media_type: str, media_url: str, description: str = None):
-        """Log a media share"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
-                INSERT INTO media_shares (user_id, guild_id, channel_id, media_type,
-                                        media_url, description, shared_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (user_id, guild_id, channel_id, media_type, media_url, 
-                  description, datetime.now().isoformat()))
-            await db.commit()
+        """Log a media share (write-behind)"""
+        await self._write_queue.put("""
+            INSERT INTO media_shares (user_id, guild_id, channel_id, media_type,
+                                    media_url, description, shared_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        """, (user_id, guild_id, channel_id, media_type, media_url, 
+              description, now_epoch()))
+    
+    async def search_media_shares(self, guild_id: int, query: str, limit: int = 10,
+                                  after: Optional[Cursor] = None,
+                                  before: Optional[Cursor] = None) -> Page:
+        """Full-text search over the descriptions of media shared in a guild"""
+        # Include shares still sitting in the write-behind queue
+        await self._write_queue.flush()
+        return await self._search_page('media_shares', MediaShare, ('description',), 'guild_id', guild_id,
+                                       query, "1 = 1", (), limit, after, before, telemetry=True)
     
     # Logging methods
     async def log_event(self, level: str, message: str, module: str = None,
                        user_id: int = None, guild_id: int = None):
-        """Log a bot event"""
-        async with aiosqlite.connect(self.db_path) as db:
-            await db.execute("""
+        """Log a bot event (write-behind)"""
+        await self._write_queue.put("""
+            INSERT INTO bot_logs (level, message, module, user_id, guild_id, timestamp)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, (level, message, module, user_id, guild_id, now_epoch()))
+    
+    async def log_events(self, entries: Sequence[tuple]) -> int:
+        """Insert many log rows in one transaction; returns the row count.
+        
+        Each entry is (level, message, module, user_id, guild_id, timestamp).
+        Used by the logging handler, which does its own batching.
+        """
+        if not entries:
+            return 0
+        async with self._telemetry_pool.writer() as db:
+            await db.executemany("""
                 INSERT INTO bot_logs (level, message, module, user_id, guild_id, timestamp)
                 VALUES (?, ?, ?, ?, ?, ?)
-            """, (level, message, module, user_id, guild_id, datetime.now().isoformat()))
-            await db.commit()
+            """, entries)
+        return len(entries)
     
-    async def get_recent_logs(self, limit: int = 100) -> List[Dict[str, Any]]:
+    async def get_recent_logs(self, limit: int = 100) -> List[LogEntry]:
         """Get recent bot logs"""
-        async with aiosqlite.connect(self.db_path) as db:
-            db.row_factory = aiosqlite.Row
-            async with db.execute("""
-                SELECT * FROM bot_logs ORDER BY timestamp DESC LIMIT ?
-            """, (limit,)) as cursor:
+        page = await self.get_logs_page(limit)
+        return page.items
+    
+    async def get_logs_page(self, limit: int = 50, after: Optional[Cursor] = None,
+                            before: Optional[Cursor] = None) -> Page:
+        """Get one keyset page of bot logs, newest first"""
+        # Include entries still sitting in the write-behind queue
+        await self._write_queue.flush()
+        where, order, page_params = _keyset('timestamp', limit, after, before, descending=True)
+        async with self._read_telemetry() as db:
+            async with db.execute(f"""
+                SELECT {LogEntry.COLUMNS} FROM bot_logs
+                WHERE 1 = 1{where}
+                {order} LIMIT ?
+            """, page_params) as cursor:
                 rows = await cursor.fetchall()
-                return [dict(row) for row in rows]
+        logs = [LogEntry.from_row(row) for row in rows]
+        return _make_page(logs, limit, after, before, key=lambda l: (l.timestamp, l.id))
 
 # Global database instance
-db_manager = DatabaseManager()
+db_manager = DatabaseManager(
+    Config.DATABASE_PATH,
+    Config.DATABASE_READ_POOL_SIZE,
+    Config.TELEMETRY_DATABASE_PATH,
+    partitions=Config.DATABASE_PARTITIONS,
+    partition_dir=Config.DATABASE_PARTITION_DIR
+)
@@ -1,68 +1,519 @@
+import asyncio
+import atexit
+import gzip
+import json
 import logging
 import logging.handlers
 import os
-from datetime import datetime
-from typing import Optional
+import queue
+import re
+import shutil
+import sys
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from bot.config import Config
 from utils.database import db_manager
 
+# Fields bound once per command/interaction and attached to every record it logs
+CONTEXT_FIELDS = ('guild_id', 'channel_id', 'user_id', 'command', 'interaction_id')
+
+# Each command and interaction runs in its own task, which starts with a
+# copy of this; binding inside one invocation never leaks into another
+_log_context: ContextVar[Dict[str, Any]] = ContextVar('log_context', default={})
+
+def bind_log_context(**fields) -> Token:
+    """Add fields to the log context of the current task (None values are skipped)"""
+    context = {**_log_context.get(), **{k: v for k, v in fields.items() if v is not None}}
+    return _log_context.set(context)
+
+def reset_log_context(token: Token):
+    """Undo a bind_log_context() call"""
+    _log_context.reset(token)
+
+def get_log_context() -> Dict[str, Any]:
+    return dict(_log_context.get())
+
+def bind_interaction_context(interaction) -> Token:
+    """Bind guild, channel, user, command and interaction ids of a discord.Interaction"""
+    command = getattr(interaction, 'command', None)
+    if command is not None:
+        name = command.qualified_name
+    else:
+        # Component interactions (buttons, selects) have no command; use the custom_id
+        name = (getattr(interaction, 'data', None) or {}).get('custom_id')
+    return bind_log_context(
+        guild_id=interaction.guild_id,
+        channel_id=interaction.channel_id,
+        user_id=interaction.user.id,
+        command=name,
+        interaction_id=interaction.id
+    )
+
+def bind_command_context(ctx) -> Token:
+    """Bind guild, channel, user and command of a prefix commands.Context"""
+    return bind_log_context(
+        guild_id=ctx.guild.id if ctx.guild else None,
+        channel_id=ctx.channel.id,
+        user_id=ctx.author.id,
+        command=ctx.command.qualified_name if ctx.command else None
+    )
+
+class ContextFilter(logging.Filter):
+    """Copies the bound log context onto each record.
+    
+    Runs in the handler on the caller's side of the queue, since the
+    context belongs to the calling task.  Values passed explicitly through
+    extra= win over bound ones; an explicit None (the helpers' defaults)
+    does not.
+    """
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in _log_context.get().items():
+            if getattr(record, key, None) is None:
+                setattr(record, key, value)
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, for LOG_FORMAT=json.
+    
+    Always has time (UTC, ISO 8601), level, logger and message; module,
+    the context fields and the exception are added when present.
+    """
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage()
+        }
+        module = getattr(record, 'bot_module', None)
+        if module is not None:
+            entry['module'] = module
+        for key in CONTEXT_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                entry[key] = value
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
 class DatabaseLogHandler(logging.Handler):
-    """Custom log handler that writes logs to the database"""
+    """Copies log records into the bot_logs table without blocking the caller.
+    
+    emit() only formats the record and appends it to a bounded buffer, so it
+    is cheap and safe from any thread.  A single consumer task on the bot's
+    event loop drains the buffer in batches, one executemany per batch, so
+    an error storm costs a handful of inserts instead of one task and
+    connection per record.  When the buffer is full, overflow decides what
+    is lost: 'drop_new' discards the incoming record, 'drop_oldest' the
+    oldest buffered one.  Drops are counted, never raised.
+    
+    Records emitted before start() (e.g. during startup) are kept in the
+    buffer; stop() writes out whatever is left.
+    """
     
-    def __init__(self, db_manager):
+    OVERFLOW_POLICIES = ('drop_new', 'drop_oldest')
+    
+    def __init__(self, db_manager, max_queue: int = 10000, batch_size: int = 500,
+                 flush_interval: float = 1.0, overflow: str = 'drop_new'):
         super().__init__()
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy: {overflow}")
         self.db_manager = db_manager
+        self.max_queue = max(1, max_queue)
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.overflow = overflow
+        # emit() may run on any thread; the consumer runs on the event loop
+        self._buffer: deque = deque()
+        self._buffer_lock = threading.Lock()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        self.counters = {'queued': 0, 'written': 0, 'dropped': 0, 'failed': 0, 'batches': 0}
     
-    def emit(self, record):
-        """Emit a log record to the database"""
+    def emit(self, record: logging.LogRecord):
+        """Buffer a log record for the database (never blocks)"""
         try:
-            # Extract additional information from the record
-            user_id = getattr(record, 'user_id', None)
-            guild_id = getattr(record, 'guild_id', None)
-            module = getattr(record, 'module', record.name)
-            
-            # Format the message
-            message = self.format(record)
-            
-            # Use asyncio to run the async database operation
-            import asyncio
+            entry = (
+                record.levelname,
+                self.format(record),
+                getattr(record, 'bot_module', record.module),
+                getattr(record, 'user_id', None),
+                getattr(record, 'guild_id', None),
+                int(record.created)
+            )
+        except Exception:
+            self.handleError(record)
+            return
+        
+        with self._buffer_lock:
+            if len(self._buffer) >= self.max_queue:
+                self.counters['dropped'] += 1
+                if self.overflow == 'drop_new':
+                    return
+                self._buffer.popleft()
+            self._buffer.append(entry)
+            self.counters['queued'] += 1
+            full_batch = len(self._buffer) == self.batch_size
+        
+        # Wake the consumer early once a full batch is waiting
+        if full_batch and self._loop is not None:
             try:
-                loop = asyncio.get_event_loop()
-                if loop.is_running():
-                    # If we're in an async context, schedule the coroutine
-                    asyncio.create_task(self.db_manager.log_event(
-                        level=record.levelname,
-                        message=message,
-                        module=module,
-                        user_id=user_id,
-                        guild_id=guild_id
-                    ))
-                else:
-                    # If we're not in an async context, run it
-                    loop.run_until_complete(self.db_manager.log_event(
-                        level=record.levelname,
-                        message=message,
-                        module=module,
-                        user_id=user_id,
-                        guild_id=guild_id
-                    ))
+                self._loop.call_soon_threadsafe(self._wakeup.set)
             except RuntimeError:
-                # If no event loop is running, create a new one
-                asyncio.run(self.db_manager.log_event(
-                    level=record.levelname,
-                    message=message,
-                    module=module,
-                    user_id=user_id,
-                    guild_id=guild_id
-                ))
-        except Exception as e:
-            # Don't let logging errors crash the application
-            print(f"Error logging to database: {e}")
+                # Event loop already closed; stop() has drained or will never run
+                pass
+    
+    @property
+    def pending(self) -> int:
+        return len(self._buffer)
+    
+    def start(self):
+        """Start the consumer task (call from the running event loop)"""
+        if self._task is not None and not self._task.done():
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._write_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._consume())
+    
+    async def stop(self):
+        """Stop the consumer and write out everything still buffered"""
+        task, self._task = self._task, None
+        self._loop = None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await self.drain()
+    
+    def _take_batch(self) -> list:
+        with self._buffer_lock:
+            count = min(self.batch_size, len(self._buffer))
+            return [self._buffer.popleft() for _ in range(count)]
+    
+    async def drain(self) -> int:
+        """Write every buffered record now; returns how many were written"""
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        written = 0
+        async with self._write_lock:
+            # Only what is buffered now, so a steady stream of new records
+            # (or the inserts' own warnings) can't keep this going forever
+            remaining = len(self._buffer)
+            while remaining > 0:
+                batch = self._take_batch()
+                if not batch:
+                    break
+                remaining -= len(batch)
+                try:
+                    await self.db_manager.log_events(batch)
+                except Exception as e:
+                    # Not logged: the record would come straight back here
+                    self.counters['failed'] += len(batch)
+                    print(f"Error logging to database ({len(batch)} records lost): {e}", file=sys.stderr)
+                    continue
+                self.counters['written'] += len(batch)
+                self.counters['batches'] += 1
+                written += len(batch)
+        return written
+    
+    async def _consume(self):
+        while True:
+            # Don't wait while a full batch is already buffered (a storm)
+            if len(self._buffer) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            await self.drain()
+    
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, 'pending': self.pending, 'max_queue': self.max_queue}
+
+class RateLimit(NamedTuple):
+    """Per key: the first `first` records of each `window` seconds pass, then 1 in `every` (0 = none)"""
+    first: int
+    window: float
+    every: int
+
+def parse_rate_limits(spec: str) -> Dict[str, RateLimit]:
+    """Parse 'module=first/window:every,...' (e.g. 'events=20/60:10') into RateLimits"""
+    limits = {}
+    for item in filter(None, (part.strip() for part in spec.split(','))):
+        try:
+            module, rule = item.split('=', 1)
+            burst, _, every = rule.partition(':')
+            first, window = burst.split('/', 1)
+            limits[module.strip()] = RateLimit(int(first), float(window), int(every or 0))
+        except ValueError:
+            raise ValueError(f"Invalid rate limit {item!r}, expected module=first/window:every")
+    return limits
+
+class RateLimitFilter(logging.Filter):
+    """Thins out repetitive INFO/DEBUG records per (logger, key).
+    
+    The key is the record's log_key extra (the helpers below pass the
+    action) or else its unformatted message, so one noisy action doesn't
+    hide the others.  Limits are looked up by bot_module, falling back to
+    the last part of the logger name; modules without a limit, warnings
+    and errors always pass.  When a key's window ends with records
+    suppressed, a summary record saying how many is logged: before the
+    next record of that key goes through, or by the flusher thread
+    (start()) if none comes, and for every open window at stop().
+    
+    Attached to the queue handler, so suppressed records are never queued.
+    """
+    
+    MAX_KEYS = 4096
+    
+    def __init__(self, limits: Dict[str, RateLimit]):
+        super().__init__()
+        self.limits = limits
+        # key -> [window start, seen, suppressed, window length, level, bot_module] for the current window
+        self._windows: Dict[Any, list] = {}
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self.counters = {'passed': 0, 'sampled': 0, 'suppressed': 0}
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, 'rate_limit_summary', False):
+            return True
+        module = getattr(record, 'bot_module', None) or record.name.rpartition('.')[2]
+        limit = self.limits.get(module)
+        if limit is None:
+            return True
+        
+        key = (record.name, getattr(record, 'log_key', record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            summary = None
+            if window is None or now - window[0] >= limit.window:
+                if window is not None and window[2]:
+                    summary = (key, window, now)
+                if window is None and len(self._windows) >= self.MAX_KEYS:
+                    self._prune(now)
+                window = self._windows[key] = [now, 0, 0, limit.window, record.levelno,
+                                               getattr(record, 'bot_module', None)]
+            window[1] += 1
+            extra = window[1] - limit.first
+            if extra <= 0:
+                self.counters['passed'] += 1
+                allow = True
+            elif limit.every and extra % limit.every == 0:
+                self.counters['sampled'] += 1
+                allow = True
+            else:
+                self.counters['suppressed'] += 1
+                window[2] += 1
+                allow = False
+        
+        if summary is not None:
+            self._log_summary(*summary)
+        return allow
+    
+    def _prune(self, now: float):
+        """Forget keys whose window has ended with nothing left to report (lock held)"""
+        for key in [k for k, w in self._windows.items() if now - w[0] >= w[3] and not w[2]]:
+            del self._windows[key]
+    
+    def flush(self, all_windows: bool = False):
+        """Log summaries for windows that have ended (every window if all_windows) and forget them"""
+        now = time.monotonic()
+        with self._lock:
+            ended = [(key, window) for key, window in self._windows.items()
+                     if all_windows or now - window[0] >= window[3]]
+            for key, _ in ended:
+                del self._windows[key]
+        for key, window in ended:
+            if window[2]:
+                self._log_summary(key, window, now)
+    
+    def start(self, interval: Optional[float] = None):
+        """Flush ended windows every interval seconds (default: the shortest window) on a thread"""
+        if self._flusher is not None:
+            return
+        if interval is None:
+            interval = min((limit.window for limit in self.limits.values()), default=60.0)
+        self._stopping.clear()
+        self._flusher = threading.Thread(target=self._run_flusher, args=(max(1.0, interval),),
+                                         name='log-rate-limit', daemon=True)
+        self._flusher.start()
+    
+    def _run_flusher(self, interval: float):
+        while not self._stopping.wait(interval):
+            self.flush()
+    
+    def stop(self):
+        """Stop the flusher and report every window that still has suppressed records"""
+        flusher, self._flusher = self._flusher, None
+        if flusher is not None:
+            self._stopping.set()
+            flusher.join()
+        self.flush(all_windows=True)
+    
+    @staticmethod
+    def _log_summary(key, window: list, now: float):
+        name, log_key = key
+        logging.getLogger(name).log(
+            window[4], "Suppressed %d similar records (%s) in the last %.0fs",
+            window[2], log_key, now - window[0],
+            extra={'rate_limit_summary': True, 'bot_module': window[5]}
+        )
+    
+    def stats(self) -> Dict[str, int]:
+        return {**self.counters, 'keys': len(self._windows)}
+
+class LocalQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler for a listener in the same process.
+    
+    The stock handler formats every record before enqueueing it so it can
+    be pickled to another process.  Here the listener thread shares our
+    memory, so records are passed as they are and all formatting happens
+    on that thread; the caller only pays for the put().
+    """
+    
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
+
+class CompressedRotatingFileHandler(logging.handlers.BaseRotatingHandler):
+    """File handler that rolls by size or time and gzips old segments.
+    
+    The file is rolled when it reaches max_bytes or crosses an interval
+    boundary (aligned to the epoch, so a daily interval rolls at midnight
+    UTC even across restarts); either can be 0 to disable it.  Rolling
+    only renames the file to name.YYYYmmdd-HHMMSS; a worker thread then
+    compresses the segment and deletes the oldest archives until the log
+    and its archives fit in max_total_bytes (0 = no cap).  Segments left
+    uncompressed by a crash are picked up again at startup.
+    """
+    
+    def __init__(self, filename: str, max_bytes: int = 0, interval: float = 0,
+                 max_total_bytes: int = 0, compress_level: int = 6, encoding: str = 'utf-8'):
+        super().__init__(filename, 'a', encoding=encoding)
+        self.max_bytes = max_bytes
+        self.interval = interval
+        self.max_total_bytes = max_total_bytes
+        self.compress_level = compress_level
+        directory, name = os.path.split(self.baseFilename)
+        self._directory = directory
+        self._segment_pattern = re.compile(re.escape(name) + r'\.\d{8}-\d{6}(?:-\d+)?(\.gz)?$')
+        started = os.stat(self.baseFilename).st_mtime if os.path.exists(self.baseFilename) else time.time()
+        self._rollover_at = self._next_boundary(started)
+        self._pending: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker = threading.Thread(target=self._compress_segments, name='log-compressor', daemon=True)
+        self._worker.start()
+        for segment in self._segments():
+            if not segment.endswith('.gz'):
+                self._pending.put(segment)
+    
+    def _next_boundary(self, after: float) -> float:
+        if not self.interval:
+            return float('inf')
+        return (after // self.interval + 1) * self.interval
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.stream is None:
+            self.stream = self._open()
+        now = time.time()
+        if now >= self._rollover_at:
+            if self.stream.tell() > 0:
+                return True
+            # Nothing written this interval; don't roll an empty file
+            self._rollover_at = self._next_boundary(now)
+        return bool(self.max_bytes) and self.stream.tell() >= self.max_bytes
+    
+    def doRollover(self):
+        if self.stream:
+            self.stream.close()
+            self.stream = None
+        now = time.time()
+        segment = f"{self.baseFilename}.{time.strftime('%Y%m%d-%H%M%S', time.gmtime(now))}"
+        candidate, n = segment, 1
+        while os.path.exists(candidate) or os.path.exists(candidate + '.gz'):
+            candidate, n = f"{segment}-{n}", n + 1
+        if os.path.exists(self.baseFilename):
+            os.rename(self.baseFilename, candidate)
+            self._pending.put(candidate)
+        self._rollover_at = self._next_boundary(now)
+        self.stream = self._open()
+    
+    def _segments(self) -> List[str]:
+        """Rotated segments of this log, oldest first"""
+        try:
+            names = [n for n in os.listdir(self._directory) if self._segment_pattern.match(n)]
+        except OSError:
+            return []
+        return sorted((os.path.join(self._directory, n) for n in names), key=os.path.getmtime)
+    
+    def _compress(self, path: str):
+        target = path + '.gz'
+        with open(path, 'rb') as src, gzip.open(target + '.tmp', 'wb', self.compress_level) as dst:
+            shutil.copyfileobj(src, dst, 1024 * 1024)
+        shutil.copystat(path, target + '.tmp')  # keep mtime so age order survives
+        os.replace(target + '.tmp', target)
+        os.remove(path)
+    
+    def _enforce_cap(self):
+        if not self.max_total_bytes:
+            return
+        segments = self._segments()
+        sizes = {path: os.path.getsize(path) for path in segments}
+        total = sum(sizes.values())
+        if os.path.exists(self.baseFilename):
+            total += os.path.getsize(self.baseFilename)
+        for path in segments:
+            if total <= self.max_total_bytes:
+                break
+            os.remove(path)
+            total -= sizes[path]
+    
+    def _compress_segments(self):
+        while True:
+            path = self._pending.get()
+            if path is None:
+                return
+            # Not logged: the record would come back to this handler
+            try:
+                if os.path.exists(path):
+                    self._compress(path)
+            except OSError as e:
+                print(f"Could not compress log segment {path}: {e}", file=sys.stderr)
+            try:
+                self._enforce_cap()
+            except OSError as e:
+                print(f"Could not prune log archives: {e}", file=sys.stderr)
+    
+    def close(self):
+        """Close the file and wait for queued segments to be compressed"""
+        if self._worker.is_alive():
+            self._pending.put(None)
+            self._worker.join()
+        super().close()
 
 class BotLogger:
     """Enhanced logging system for the Discord bot"""
     
     def __init__(self, log_dir: str = "logs"):
         self.log_dir = log_dir
+        self.db_handler: Optional[DatabaseLogHandler] = None
+        self.rate_limiter: Optional[RateLimitFilter] = None
+        self.listener: Optional[logging.handlers.QueueListener] = None
         self.ensure_log_directory()
         self.setup_logging()
     
@@ -72,7 +523,13 @@ class BotLogger:
             os.makedirs(self.log_dir)
     
     def setup_logging(self):
-        """Setup comprehensive logging configuration"""
+        """Setup comprehensive logging configuration.
+        
+        Loggers only put records on a queue; a QueueListener thread runs
+        every sink (console, rotating files, database), so disk writes and
+        log rotation never happen on the event loop.  With LOG_FORMAT=json
+        the console and files get one JSON object per line instead of text.
+        """
         # Create formatters
         detailed_formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(funcName)s:%(lineno)d - %(message)s'
@@ -80,6 +537,11 @@ class BotLogger:
         simple_formatter = logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         )
+        if Config.LOG_FORMAT == 'json':
+            # bot_logs keeps its own columns, so the database handler stays on text
+            console_formatter = file_formatter = JsonFormatter()
+        else:
+            console_formatter, file_formatter = simple_formatter, detailed_formatter
         
         # Root logger configuration
         root_logger = logging.getLogger()
@@ -88,40 +550,64 @@ class BotLogger:
         # Console handler
         console_handler = logging.StreamHandler()
         console_handler.setLevel(logging.INFO)
-        console_handler.setFormatter(simple_formatter)
-        root_logger.addHandler(console_handler)
+        console_handler.setFormatter(console_formatter)
+        sinks = [console_handler]
         
-        # File handler for general logs (with rotation)
-        file_handler = logging.handlers.RotatingFileHandler(
+        # File handler for general logs (rotated and gzipped in the background)
+        file_handler = CompressedRotatingFileHandler(
             filename=os.path.join(self.log_dir, 'bot.log'),
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'
+            max_bytes=Config.LOG_FILE_MAX_BYTES,
+            interval=Config.LOG_ROTATE_INTERVAL,
+            max_total_bytes=Config.LOG_MAX_TOTAL_BYTES
         )
         file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(file_handler)
+        file_handler.setFormatter(file_formatter)
+        sinks.append(file_handler)
         
         # Error file handler
-        error_handler = logging.handlers.RotatingFileHandler(
+        error_handler = CompressedRotatingFileHandler(
             filename=os.path.join(self.log_dir, 'errors.log'),
-            maxBytes=5*1024*1024,  # 5MB
-            backupCount=3,
-            encoding='utf-8'
+            max_bytes=Config.LOG_ERROR_FILE_MAX_BYTES,
+            interval=Config.LOG_ROTATE_INTERVAL,
+            max_total_bytes=Config.LOG_ERROR_MAX_TOTAL_BYTES
         )
         error_handler.setLevel(logging.ERROR)
-        error_handler.setFormatter(detailed_formatter)
-        root_logger.addHandler(error_handler)
+        error_handler.setFormatter(file_formatter)
+        sinks.append(error_handler)
         
-        # Database handler
+        # Database handler (buffered; the bot starts its consumer once the loop runs)
         try:
-            db_handler = DatabaseLogHandler(db_manager)
-            db_handler.setLevel(logging.WARNING)  # Only log warnings and above to DB
-            db_handler.setFormatter(simple_formatter)
-            root_logger.addHandler(db_handler)
+            self.db_handler = DatabaseLogHandler(
+                db_manager,
+                max_queue=Config.LOG_DB_QUEUE_SIZE,
+                batch_size=Config.LOG_DB_BATCH_SIZE,
+                flush_interval=Config.LOG_DB_FLUSH_INTERVAL,
+                overflow=Config.LOG_DB_OVERFLOW
+            )
+            self.db_handler.setLevel(logging.WARNING)  # Only log warnings and above to DB
+            self.db_handler.setFormatter(simple_formatter)
+            sinks.append(self.db_handler)
         except Exception as e:
             print(f"Could not setup database logging: {e}")
         
+        # The root logger only enqueues; each sink keeps its own level
+        log_queue = queue.SimpleQueue()
+        queue_handler = LocalQueueHandler(log_queue)
+        queue_handler.addFilter(ContextFilter())
+        try:
+            limits = parse_rate_limits(Config.LOG_RATE_LIMITS)
+            if limits:
+                self.rate_limiter = RateLimitFilter(limits)
+                queue_handler.addFilter(self.rate_limiter)
+                self.rate_limiter.start()
+        except ValueError as e:
+            print(f"Could not setup log rate limiting: {e}")
+        root_logger.addHandler(queue_handler)
+        self.listener = logging.handlers.QueueListener(log_queue, *sinks, respect_handler_level=True)
+        self.listener.start()
+        # Records still queued at exit are written out by stop()
+        atexit.register(self.stop)
+        
         # Discord.py specific logging
         discord_logger = logging.getLogger('discord')
         discord_logger.setLevel(logging.WARNING)
@@ -129,6 +615,15 @@ class BotLogger:
         # Bot specific loggers
         self.setup_module_loggers()
     
+    def stop(self):
+        """Write out queued records and stop the listener thread"""
+        if self.rate_limiter is not None:
+            # Summaries of what was suppressed go out before the listener stops
+            self.rate_limiter.stop()
+        listener, self.listener = self.listener, None
+        if listener is not None:
+            listener.stop()
+    
     def setup_module_loggers(self):
         """Setup loggers for specific bot modules"""
         modules = ['commands', 'events', 'music', 'reminders', 'database', 'media']
@@ -150,26 +645,27 @@ class BotLogger:
         
         if success:
             logger.info(
-                f"Command '{command_name}' executed successfully",
-                extra={'user_id': user_id, 'guild_id': guild_id, 'module': 'commands'}
+                "Command '%s' executed successfully", command_name,
+                extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'commands'}
             )
         else:
             logger.error(
-                f"Command '{command_name}' failed: {error}",
-                extra={'user_id': user_id, 'guild_id': guild_id, 'module': 'commands'}
+                "Command '%s' failed: %s", command_name, error,
+                extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'commands'}
             )
     
     @staticmethod
     def log_user_action(action: str, user_id: int, guild_id: int, details: str = None):
         """Log user actions"""
         logger = BotLogger.get_logger('events')
-        message = f"User action: {action}"
         if details:
-            message += f" - {details}"
+            args = ("User action: %s - %s", action, details)
+        else:
+            args = ("User action: %s", action)
 
         logger.info(
-            message,
-            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'events'}
+            *args,
+            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'events', 'log_key': action}
         )
     
     @staticmethod
@@ -177,10 +673,13 @@ class BotLogger:
                  guild_id: int = None):
         """Log errors with context"""
         logger = BotLogger.get_logger('errors')
-        message = f"Error in {context}: {str(error)}" if context else str(error)
+        if context:
+            args = ("Error in %s: %s", context, error)
+        else:
+            args = ("%s", error)
 
         logger.error(
-            message,
+            *args,
             exc_info=True,
             extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'errors'}
         )
@@ -189,13 +688,14 @@ class BotLogger:
     def log_music_action(action: str, guild_id: int, user_id: int, details: str = None):
         """Log music-related actions"""
         logger = BotLogger.get_logger('music')
-        message = f"Music action: {action}"
         if details:
-            message += f" - {details}"
+            args = ("Music action: %s - %s", action, details)
+        else:
+            args = ("Music action: %s", action)
 
         logger.info(
-            message,
-            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'music'}
+            *args,
+            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'music', 'log_key': action}
         )
     
     @staticmethod
@@ -205,22 +705,23 @@ class BotLogger:
         logger = BotLogger.get_logger('database')
         
         if success:
-            logger.debug(f"Database operation successful: {operation} on {table}")
+            logger.debug("Database operation successful: %s on %s", operation, table)
         else:
-            logger.error(f"Database operation failed: {operation} on {table} - {error}")
+            logger.error("Database operation failed: %s on %s - %s", operation, table, error)
     
     @staticmethod
     def log_reminder_action(action: str, reminder_id: int, user_id: int,
                            guild_id: int, details: str = None):
         """Log reminder-related actions"""
         logger = BotLogger.get_logger('reminders')
-        message = f"Reminder {action}: ID {reminder_id}"
         if details:
-            message += f" - {details}"
+            args = ("Reminder %s: ID %s - %s", action, reminder_id, details)
+        else:
+            args = ("Reminder %s: ID %s", action, reminder_id)
 
         logger.info(
-            message,
-            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'reminders'}
+            *args,
+            extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'reminders', 'log_key': action}
         )
     
     @staticmethod
@@ -231,12 +732,12 @@ class BotLogger:
 
         if success:
             logger.info(
-                f"Media shared successfully: {media_type}",
-                extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'media'}
+                "Media shared successfully: %s", media_type,
+                extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'media', 'log_key': media_type}
             )
         else:
             logger.error(
-                f"Media sharing failed: {media_type} - {error}",
+                "Media sharing failed: %s - %s", media_type, error,
                 extra={'user_id': user_id, 'guild_id': guild_id, 'bot_module': 'media'}
             )
 
@@ -253,6 +754,33 @@ def get_logger(name: str) -> logging.Logger:
     """Get a logger for a specific module"""
     return BotLogger.get_logger(name)
 
+def stop_logging():
+    """Flush queued records to every sink and stop the logging thread"""
+    if bot_logger is not None:
+        bot_logger.stop()
+
+def start_database_logging():
+    """Start writing buffered log records to the database (needs a running loop)"""
+    if bot_logger is not None and bot_logger.db_handler is not None:
+        bot_logger.db_handler.start()
+
+async def stop_database_logging():
+    """Write out buffered log records and stop the consumer (before closing the database)"""
+    if bot_logger is not None and bot_logger.db_handler is not None:
+        await bot_logger.db_handler.stop()
+
+def get_log_rate_stats() -> Optional[Dict[str, int]]:
+    """Passed/sampled/suppressed counters of the rate limiter, if enabled"""
+    if bot_logger is None or bot_logger.rate_limiter is None:
+        return None
+    return bot_logger.rate_limiter.stats()
+
+def get_database_log_stats() -> Optional[Dict[str, int]]:
+    """Queued/written/dropped counters of the database log handler, if set up"""
+    if bot_logger is None or bot_logger.db_handler is None:
+        return None
+    return bot_logger.db_handler.stats()
+
 def log_command(command_name: str, user_id: int, guild_id: int, 
                success: bool = True, error: str = None):
     """Log command usage"""
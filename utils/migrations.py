@@ -0,0 +1,524 @@
+"""
+Database schema migrations
+
+Each migration has a version number and a list of steps (SQL strings or
+async callables taking the writer connection).  Applied versions are
+recorded in the schema_version table, so every step runs exactly once per
+database file, in order, inside its own transaction (unless the migration
+is marked non-transactional, e.g. for VACUUM).
+"""
+
+import logging
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Sequence, Union
+
+import aiosqlite
+
+logger = logging.getLogger('bot.database')
+
+MigrationStep = Union[str, Callable[[aiosqlite.Connection], Awaitable[None]]]
+
+# Bigger files are not rebuilt at startup (see _enable_incremental_vacuum)
+INLINE_VACUUM_MAX_BYTES = 64 * 1024 * 1024
+
+class Migration(NamedTuple):
+    """A single, ordered schema change"""
+    version: int
+    name: str
+    steps: Sequence[MigrationStep]
+    transactional: bool = True
+
+async def get_schema_version(db: aiosqlite.Connection) -> int:
+    """Return the highest applied migration version (0 for a fresh database)"""
+    await db.execute("""
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT NOT NULL,
+            applied_at TEXT NOT NULL
+        )
+    """)
+    async with db.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version") as cursor:
+        row = await cursor.fetchone()
+        return row[0]
+
+async def apply_migrations(pool, migrations: Sequence[Migration]) -> List[int]:
+    """Apply every pending migration through the pool's writer.
+
+    Returns the versions that were applied by this call.
+    """
+    versions = [m.version for m in migrations]
+    if versions != sorted(set(versions)):
+        raise ValueError("Migration versions must be unique and in ascending order")
+
+    async with pool.writer() as db:
+        current = await get_schema_version(db)
+
+    applied = []
+    for migration in migrations:
+        if migration.version <= current:
+            continue
+
+        async with pool.writer(transaction=migration.transactional) as db:
+            for step in migration.steps:
+                if callable(step):
+                    await step(db)
+                else:
+                    await db.execute(step)
+            await db.execute(
+                "INSERT INTO schema_version (version, name, applied_at) VALUES (?, ?, ?)",
+                (migration.version, migration.name, datetime.now().isoformat())
+            )
+
+        logger.info("Applied database migration %s: %s", migration.version, migration.name)
+        applied.append(migration.version)
+
+    return applied
+
+async def _enable_incremental_vacuum(db: aiosqlite.Connection):
+    """Switch an existing database to auto_vacuum=INCREMENTAL.
+    
+    The setting only applies to a file created with it or rebuilt by VACUUM.
+    New databases already have it.  VACUUM rewrites the whole file, holding
+    the write lock throughout and needing free disk space for a full copy,
+    so only files up to INLINE_VACUUM_MAX_BYTES are rebuilt here.  Larger
+    ones keep working without incremental vacuum (retention still deletes,
+    the file just doesn't shrink) until rebuilt with
+    `python -m utils.backup --db PATH vacuum` while the bot is stopped.
+    """
+    async with db.execute("PRAGMA auto_vacuum") as cursor:
+        (mode,) = await cursor.fetchone()
+    if mode == 2:  # INCREMENTAL
+        return
+    async with db.execute("PRAGMA page_count") as cursor:
+        (page_count,) = await cursor.fetchone()
+    async with db.execute("PRAGMA page_size") as cursor:
+        (page_size,) = await cursor.fetchone()
+    size = page_count * page_size
+    if size > INLINE_VACUUM_MAX_BYTES:
+        async with db.execute("PRAGMA database_list") as cursor:
+            path = next((row[2] for row in await cursor.fetchall() if row[1] == 'main'), '')
+        logger.warning(
+            "Database is %.0f MiB, skipping the one-time VACUUM that enables incremental vacuum; "
+            "stop the bot and run: python -m utils.backup --db %s vacuum", size / 2**20, path
+        )
+        return
+    logger.info("Rebuilding database to enable incremental vacuum (one-time)")
+    await db.execute("PRAGMA auto_vacuum = INCREMENTAL")
+    await db.execute("VACUUM")
+
+def _epoch(column: str, not_null: bool = False) -> str:
+    """SQL converting a naive local-time ISO string column to UTC epoch seconds"""
+    expr = f"CAST(strftime('%s', {column}, 'utc') AS INTEGER)"
+    # Unparseable values in NOT NULL columns become 0 rather than aborting the upgrade
+    return f"COALESCE({expr}, 0)" if not_null else expr
+
+def _rebuild_table(table: str, definition: str, select: str) -> List[str]:
+    """Steps that recreate a table with a new column layout (SQLite can't
+    change a column's type in place): copy into table_new, swap it in and
+    carry over the AUTOINCREMENT counter."""
+    return [
+        f"CREATE TABLE {table}_new ({definition})",
+        f"INSERT INTO {table}_new SELECT {select} FROM {table}",
+        f"DELETE FROM sqlite_sequence WHERE name = '{table}_new'",
+        f"INSERT INTO sqlite_sequence (name, seq) SELECT '{table}_new', seq FROM sqlite_sequence WHERE name = '{table}'",
+        f"DROP TABLE {table}",
+        f"ALTER TABLE {table}_new RENAME TO {table}",
+    ]
+
+def _if_table(table: str, steps: Sequence[str]) -> MigrationStep:
+    """Step that runs steps only if table exists in the file.
+
+    bot_logs and media_shares belong to the telemetry database.  A main
+    database only has them if it was created before that split; there they
+    are still upgraded so DatabaseManager can move their rows across.
+    """
+    async def step(db: aiosqlite.Connection):
+        async with db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,)
+        ) as cursor:
+            if await cursor.fetchone() is None:
+                return
+        for sql in steps:
+            await db.execute(sql)
+    return step
+
+def _fts_index(table: str, columns: Sequence[str], scope: str, weights: Sequence[float]) -> List[str]:
+    """Steps creating an external-content FTS5 index over table.columns.
+
+    The index stores only tokens; column values are read back from the table
+    itself.  The scope column (user_id/guild_id) is indexed as well so a
+    scoped search intersects two doclists inside FTS5 instead of ranking
+    every match in the table; it gets weight 0 in the bm25 ranking.
+
+    Triggers keep the index in sync, and the UPDATE trigger only fires when
+    an indexed column changes, so status and counter updates cost nothing.
+    """
+    fts = f"{table}_fts"
+    cols = ", ".join([*columns, scope])
+    new = ", ".join(f"new.{c}" for c in [*columns, scope])
+    old = ", ".join(f"old.{c}" for c in [*columns, scope])
+    bm25 = ", ".join(str(w) for w in [*weights, 0.0])
+    return [
+        # remove_diacritics lets "nhac nho" match "nhắc nhở"
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5(
+            {cols}, content='{table}', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"INSERT INTO {fts} ({fts}, rank) VALUES ('rank', 'bm25({bm25})')",
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN
+            INSERT INTO {fts} ({fts}, rowid, {cols}) VALUES ('delete', old.id, {old});
+            INSERT INTO {fts} (rowid, {cols}) VALUES (new.id, {new});
+        END
+        """,
+        # Index the rows that already exist
+        f"INSERT INTO {fts} ({fts}) VALUES ('rebuild')",
+    ]
+
+# Main database schema, oldest first.  Never edit a released migration;
+# append a new one instead.  (bot_logs and media_shares were dropped from
+# migration 1 when they moved to the telemetry database; the steps touching
+# them below only run for main files that still have them.)
+MIGRATIONS: List[Migration] = [
+    Migration(1, "initial schema", [
+        # Users table
+        """
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            display_name TEXT,
+            join_date TEXT,
+            last_seen TEXT,
+            message_count INTEGER DEFAULT 0,
+            settings TEXT DEFAULT '{}'
+        )
+        """,
+        # Events table
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            creator_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            event_date TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            max_participants INTEGER DEFAULT -1,
+            status TEXT DEFAULT 'active'
+        )
+        """,
+        # Event participants table
+        """
+        CREATE TABLE IF NOT EXISTS event_participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_at TEXT NOT NULL,
+            FOREIGN KEY (event_id) REFERENCES events (id),
+            UNIQUE(event_id, user_id)
+        )
+        """,
+        # Reminders table
+        """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            remind_time TEXT NOT NULL,
+            created_at TEXT NOT NULL,
+            is_recurring BOOLEAN DEFAULT FALSE,
+            recurring_pattern TEXT,
+            status TEXT DEFAULT 'active'
+        )
+        """,
+    ]),
+    Migration(2, "indexes for hot queries", [
+        # Reminder scan: WHERE status = 'active' ORDER BY remind_time
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_status_time
+        ON reminders (status, remind_time)
+        """,
+        # /my_reminders: WHERE user_id = ? AND status = 'active' ORDER BY remind_time
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_user_status_time
+        ON reminders (user_id, status, remind_time)
+        """,
+        # /list_events: WHERE guild_id = ? AND status = ? ORDER BY event_date
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_guild_status_date
+        ON events (guild_id, status, event_date)
+        """,
+        # Recent logs: ORDER BY timestamp DESC LIMIT ?
+        _if_table("bot_logs", ["""
+        CREATE INDEX IF NOT EXISTS idx_bot_logs_timestamp
+        ON bot_logs (timestamp)
+        """]),
+    ]),
+    Migration(3, "media_shares time index for retention", [
+        _if_table("media_shares", ["""
+        CREATE INDEX IF NOT EXISTS idx_media_shares_shared_at
+        ON media_shares (shared_at)
+        """]),
+    ]),
+    Migration(4, "incremental auto-vacuum", [_enable_incremental_vacuum], transactional=False),
+    Migration(5, "events.participant_count", [
+        # Kept in step with event_participants by join_event/leave_event so
+        # the capacity check is a single conditional UPDATE
+        """
+        ALTER TABLE events ADD COLUMN participant_count INTEGER NOT NULL DEFAULT 0
+        """,
+        """
+        UPDATE events SET participant_count = (
+            SELECT COUNT(*) FROM event_participants WHERE event_id = events.id
+        )
+        """,
+    ]),
+    # Time columns become INTEGER UTC epoch seconds (see utils/timeutil.py).
+    # Old values were naive datetime.now() strings, so they are read as the
+    # host's local time; run the upgrade in the timezone the bot ran in.
+    Migration(6, "integer epoch timestamps", [
+        *_rebuild_table("users", """
+            user_id INTEGER PRIMARY KEY,
+            username TEXT NOT NULL,
+            display_name TEXT,
+            join_date INTEGER,
+            last_seen INTEGER,
+            message_count INTEGER DEFAULT 0,
+            settings TEXT DEFAULT '{}'
+        """, f"""
+            user_id, username, display_name, {_epoch('join_date')}, {_epoch('last_seen')},
+            message_count, settings
+        """),
+        *_rebuild_table("events", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            creator_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            event_date INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            max_participants INTEGER DEFAULT -1,
+            status TEXT DEFAULT 'active',
+            participant_count INTEGER NOT NULL DEFAULT 0
+        """, f"""
+            id, title, description, creator_id, guild_id, channel_id,
+            {_epoch('event_date', True)}, {_epoch('created_at', True)},
+            max_participants, status, participant_count
+        """),
+        *_rebuild_table("event_participants", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_at INTEGER NOT NULL,
+            FOREIGN KEY (event_id) REFERENCES events (id),
+            UNIQUE(event_id, user_id)
+        """, f"""
+            id, event_id, user_id, {_epoch('joined_at', True)}
+        """),
+        *_rebuild_table("reminders", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            remind_time INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            is_recurring BOOLEAN DEFAULT FALSE,
+            recurring_pattern TEXT,
+            status TEXT DEFAULT 'active'
+        """, f"""
+            id, user_id, guild_id, channel_id, message,
+            {_epoch('remind_time', True)}, {_epoch('created_at', True)},
+            is_recurring, recurring_pattern, status
+        """),
+        _if_table("media_shares", [*_rebuild_table("media_shares", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            media_type TEXT NOT NULL,
+            media_url TEXT NOT NULL,
+            description TEXT,
+            shared_at INTEGER NOT NULL
+        """, f"""
+            id, user_id, guild_id, channel_id, media_type, media_url, description,
+            {_epoch('shared_at', True)}
+        """), """
+        CREATE INDEX IF NOT EXISTS idx_media_shares_shared_at
+        ON media_shares (shared_at)
+        """]),
+        _if_table("bot_logs", [*_rebuild_table("bot_logs", """
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL,
+            module TEXT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            timestamp INTEGER NOT NULL
+        """, f"""
+            id, level, message, module, user_id, guild_id, {_epoch('timestamp', True)}
+        """), """
+        CREATE INDEX IF NOT EXISTS idx_bot_logs_timestamp
+        ON bot_logs (timestamp)
+        """]),
+        # Dropping the old tables dropped their indexes; recreate them
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_status_time
+        ON reminders (status, remind_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_user_status_time
+        ON reminders (user_id, status, remind_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_guild_status_date
+        ON events (guild_id, status, event_date)
+        """,
+    ]),
+    Migration(7, "full-text search", [
+        *_fts_index("reminders", ["message"], scope="user_id", weights=[1.0]),
+        # A hit in the title counts for more than one in the description
+        *_fts_index("events", ["title", "description"], scope="guild_id", weights=[2.0, 1.0]),
+        # media_shares is searched in the telemetry database
+    ]),
+    Migration(8, "partition layout", [
+        # Bucket count and id floor of guild-scoped storage (see utils/partitions.py);
+        # at most one row, written the first time partitioning is enabled
+        """
+        CREATE TABLE IF NOT EXISTS partition_layout (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            partitions INTEGER NOT NULL,
+            id_floor INTEGER NOT NULL,
+            created_at INTEGER NOT NULL
+        )
+        """,
+    ]),
+]
+
+# Partition databases (events, event_participants, reminders of the guilds
+# hashed to one bucket).  Same tables and indexes as the main database;
+# ids are assigned by DatabaseManager so they encode the bucket.
+PARTITION_MIGRATIONS: List[Migration] = [
+    Migration(1, "partition schema", [
+        """
+        CREATE TABLE IF NOT EXISTS events (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            description TEXT,
+            creator_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            event_date INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            max_participants INTEGER DEFAULT -1,
+            status TEXT DEFAULT 'active',
+            participant_count INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS event_participants (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            event_id INTEGER NOT NULL,
+            user_id INTEGER NOT NULL,
+            joined_at INTEGER NOT NULL,
+            FOREIGN KEY (event_id) REFERENCES events (id),
+            UNIQUE(event_id, user_id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS reminders (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            message TEXT NOT NULL,
+            remind_time INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            is_recurring BOOLEAN DEFAULT FALSE,
+            recurring_pattern TEXT,
+            status TEXT DEFAULT 'active'
+        )
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_status_time
+        ON reminders (status, remind_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_reminders_user_status_time
+        ON reminders (user_id, status, remind_time)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_events_guild_status_date
+        ON events (guild_id, status, event_date)
+        """,
+        *_fts_index("reminders", ["message"], scope="user_id", weights=[1.0]),
+        *_fts_index("events", ["title", "description"], scope="guild_id", weights=[2.0, 1.0]),
+    ]),
+]
+
+# Telemetry database (bot_logs, media_shares).  These append-heavy tables
+# live in their own file so their write bursts never queue behind, or in
+# front of, user-facing writes on the main database.  Main databases created
+# before the split still have them; DatabaseManager moves their rows across once.
+TELEMETRY_MIGRATIONS: List[Migration] = [
+    Migration(1, "telemetry schema", [
+        """
+        CREATE TABLE IF NOT EXISTS bot_logs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            level TEXT NOT NULL,
+            message TEXT NOT NULL,
+            module TEXT,
+            user_id INTEGER,
+            guild_id INTEGER,
+            timestamp INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS media_shares (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            guild_id INTEGER NOT NULL,
+            channel_id INTEGER NOT NULL,
+            media_type TEXT NOT NULL,
+            media_url TEXT NOT NULL,
+            description TEXT,
+            shared_at INTEGER NOT NULL
+        )
+        """,
+        # Recent logs and retention: ORDER BY / WHERE timestamp
+        """
+        CREATE INDEX IF NOT EXISTS idx_bot_logs_timestamp
+        ON bot_logs (timestamp)
+        """,
+        """
+        CREATE INDEX IF NOT EXISTS idx_media_shares_shared_at
+        ON media_shares (shared_at)
+        """,
+        *_fts_index("media_shares", ["description"], scope="guild_id", weights=[1.0]),
+    ]),
+]
+
+# Every kind of database file the bot keeps.  A file's kind shows in the
+# name of its first migration, which is how exports and imports tell a
+# telemetry or partition file from the main one.
+SCHEMAS: Dict[str, List[Migration]] = {
+    'main': MIGRATIONS,
+    'telemetry': TELEMETRY_MIGRATIONS,
+    'partition': PARTITION_MIGRATIONS,
+}
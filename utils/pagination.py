@@ -0,0 +1,58 @@
+import discord
+from typing import Awaitable, Callable
+
+from utils.logging_config import bind_interaction_context
+from utils.records import Page
+
+class PaginatedView(discord.ui.View):
+    """Prev/Next buttons over a keyset-paginated DatabaseManager query.
+
+    fetch_page is called with after= or before= cursors and must return a
+    Page; render turns a Page and its 1-based page number into an embed.
+    Only the page being shown is ever loaded.
+    """
+
+    def __init__(self, fetch_page: Callable[..., Awaitable[Page]],
+                 render: Callable[[Page, int], discord.Embed],
+                 page: Page, owner_id: int, timeout: float = 180):
+        super().__init__(timeout=timeout)
+        self.fetch_page = fetch_page
+        self.render = render
+        self.page = page
+        self.page_number = 1
+        self.owner_id = owner_id
+        self.update_buttons()
+
+    def update_buttons(self):
+        """Enable only the directions that have another page"""
+        self.previous_page.disabled = self.page.prev_cursor is None
+        self.next_page.disabled = self.page.next_cursor is None
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Only the user who ran the command can turn the pages"""
+        bind_interaction_context(interaction)
+        if interaction.user.id != self.owner_id:
+            await interaction.response.send_message(
+                "❌ Chỉ người dùng lệnh mới có thể chuyển trang!",
+                ephemeral=True
+            )
+            return False
+        return True
+
+    async def show(self, interaction: discord.Interaction, page: Page, page_number: int):
+        self.page = page
+        self.page_number = page_number
+        self.update_buttons()
+        await interaction.response.edit_message(embed=self.render(page, page_number), view=self)
+
+    @discord.ui.button(label="Trước", style=discord.ButtonStyle.gray, emoji="◀️")
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the previous page"""
+        page = await self.fetch_page(before=self.page.prev_cursor)
+        await self.show(interaction, page, max(1, self.page_number - 1))
+
+    @discord.ui.button(label="Sau", style=discord.ButtonStyle.gray, emoji="▶️")
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        """Show the next page"""
+        page = await self.fetch_page(after=self.page.next_cursor)
+        await self.show(interaction, page, self.page_number + 1)
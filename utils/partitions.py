@@ -0,0 +1,210 @@
+"""
+Hash-bucketed storage for guild-scoped tables
+
+With DATABASE_PARTITIONS > 0, events, their participants and reminders are
+stored in one of N SQLite files picked by hashing the guild id, so writes
+for guilds in different buckets no longer queue on the same write lock.
+Users, settings and the schema of record stay in the main database.
+
+Row ids encode their bucket, so calls that only know an id (join_event,
+complete_reminder, ...) are routed without a lookup: ids below id_floor
+predate partitioning and still live in the main file; above it, bucket b
+hands out id_floor + b, id_floor + b + N, id_floor + b + 2N and so on.
+The layout (N and id_floor) is stored in the main database and cannot be
+changed once rows have been written with it.
+
+Each bucket file gets its own ConnectionPool, opened on first use.  At
+most max_open pools stay open; the least recently used idle one is closed
+when another is needed.
+"""
+
+import asyncio
+import logging
+import os
+import zlib
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple, TypeVar
+
+from utils.backup import BackupJob
+from utils.migrations import Migration, apply_migrations
+from utils.retention import RetentionJob
+
+logger = logging.getLogger('bot.database')
+
+T = TypeVar('T')
+
+class PartitionLayout(NamedTuple):
+    """How guilds and row ids map to bucket files"""
+    partitions: int
+    id_floor: int
+
+    def bucket_for_guild(self, guild_id: int) -> int:
+        # Snowflakes' low bits are a per-worker counter; hash them so buckets fill evenly
+        return zlib.crc32(int(guild_id).to_bytes(8, 'little', signed=True)) % self.partitions
+
+    def bucket_for_id(self, row_id: int) -> Optional[int]:
+        """Bucket holding the row with this id, or None for a row in the main database"""
+        if row_id < self.id_floor:
+            return None
+        return (row_id - self.id_floor) % self.partitions
+
+    def id_sequence(self, bucket: int) -> Tuple[int, int]:
+        """(value before the first id, step) of the ids bucket hands out"""
+        return self.id_floor + bucket - self.partitions, self.partitions
+
+class _OpenPartition:
+    __slots__ = ('pool', 'users')
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.users = 0
+
+class PartitionPools:
+    """One lazily opened ConnectionPool per bucket file, at most max_open at a time"""
+
+    def __init__(self, directory: str, stem: str, partitions: int, max_open: int,
+                 pool_factory: Callable[[str], Any], migrations: Sequence[Migration],
+                 checkpoint_interval: float, wal_truncate_bytes: int):
+        self.directory = directory
+        self.stem = stem
+        self.partitions = partitions
+        self.max_open = max(1, max_open)
+        self._pool_factory = pool_factory
+        self._migrations = migrations
+        self._checkpoint_interval = checkpoint_interval
+        self._wal_truncate_bytes = wal_truncate_bytes
+        # bucket -> open pool, least recently used first
+        self._open: "OrderedDict[int, _OpenPartition]" = OrderedDict()
+        self._open_lock = asyncio.Lock()
+        self.opens = 0
+        self.evictions = 0
+
+    def path(self, bucket: int) -> str:
+        return os.path.join(self.directory, f"{self.stem}_{bucket:04d}.db")
+
+    def exists(self, bucket: int) -> bool:
+        return bucket in self._open or os.path.exists(self.path(bucket))
+
+    def existing_buckets(self) -> List[int]:
+        """Buckets that have a file, i.e. have ever been written to"""
+        return [bucket for bucket in range(self.partitions) if self.exists(bucket)]
+
+    async def _open_partition(self, bucket: int) -> _OpenPartition:
+        Path(self.directory).mkdir(parents=True, exist_ok=True)
+        pool = self._pool_factory(self.path(bucket))
+        await pool.open()
+        try:
+            await apply_migrations(pool, self._migrations)
+        except BaseException:
+            await pool.close()
+            raise
+        pool.start_checkpointing(self._checkpoint_interval, self._wal_truncate_bytes)
+        entry = _OpenPartition(pool)
+        self._open[bucket] = entry
+        self.opens += 1
+        return entry
+
+    async def _evict(self):
+        """Close least recently used idle pools until at most max_open remain"""
+        while len(self._open) > self.max_open:
+            bucket = next((b for b, entry in self._open.items() if entry.users == 0), None)
+            if bucket is None:
+                # Everything is in use; go over the limit until something is released
+                return
+            entry = self._open.pop(bucket)
+            self.evictions += 1
+            await entry.pool.close()
+
+    @asynccontextmanager
+    async def acquire(self, bucket: int) -> AsyncIterator[Any]:
+        """Use the bucket's pool for the duration of the block (opening it if needed).
+
+        A pool is never closed while a block is using it.
+        """
+        entry = self._open.get(bucket)
+        if entry is None:
+            async with self._open_lock:
+                entry = self._open.get(bucket)
+                if entry is None:
+                    entry = await self._open_partition(bucket)
+        self._open.move_to_end(bucket)
+        entry.users += 1
+        try:
+            yield entry.pool
+        finally:
+            entry.users -= 1
+            await self._evict()
+
+    async def fan_out(self, fn: Callable[[Any], Awaitable[T]], concurrency: Optional[int] = None) -> List[T]:
+        """Run fn(pool) for every existing bucket; results in bucket order.
+
+        At most concurrency buckets (default max_open) are worked on at
+        once, so a fan-out over more buckets than max_open cycles them
+        through the LRU instead of opening every file together.
+        """
+        limit = asyncio.Semaphore(concurrency or self.max_open)
+
+        async def run(bucket: int) -> T:
+            async with limit:
+                async with self.acquire(bucket) as pool:
+                    return await fn(pool)
+
+        return list(await asyncio.gather(*(run(bucket) for bucket in self.existing_buckets())))
+
+    async def close(self):
+        """Close every open pool"""
+        async with self._open_lock:
+            entries, self._open = list(self._open.values()), OrderedDict()
+            for entry in entries:
+                await entry.pool.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            'partitions': self.partitions,
+            'files': len(self.existing_buckets()),
+            'open': len(self._open),
+            'max_open': self.max_open,
+            'opens': self.opens,
+            'evictions': self.evictions
+        }
+
+class PartitionedRetentionJob(RetentionJob):
+    """RetentionJob applied to every bucket file in turn"""
+
+    def __init__(self, partitions: PartitionPools, policies, **kwargs):
+        super().__init__(None, policies, **kwargs)
+        self._partitions = partitions
+        self._options = kwargs
+
+    async def run_once(self) -> Dict[str, Any]:
+        # One bucket at a time: pruning is background work and shouldn't
+        # occupy every bucket's write lock at once
+        reports = await self._partitions.fan_out(
+            lambda pool: RetentionJob(pool, self.policies, **self._options).run_once(),
+            concurrency=1
+        )
+        deleted: Dict[str, int] = {}
+        for report in reports:
+            for table, count in report['deleted'].items():
+                deleted[table] = deleted.get(table, 0) + count
+        report = {
+            'deleted': deleted,
+            'bytes_reclaimed': sum(r['bytes_reclaimed'] for r in reports),
+            'timestamp': datetime.now().isoformat()
+        }
+        self.last_report = report
+        return report
+
+class PartitionedBackupJob(BackupJob):
+    """BackupJob covering every bucket file as well"""
+
+    def __init__(self, db_path: str, partitions: PartitionPools, backup_dir: str, **kwargs):
+        super().__init__(db_path, backup_dir, **kwargs)
+        self._partitions = partitions
+
+    def paths(self) -> List[str]:
+        buckets = self._partitions.existing_buckets()
+        return [*super().paths(), *(self._partitions.path(bucket) for bucket in buckets)]
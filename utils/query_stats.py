@@ -0,0 +1,276 @@
+"""
+Per-statement query instrumentation for the SQLite connection pool
+
+ConnectionPool hands out InstrumentedConnection wrappers that time every
+execute/executemany/executescript call, from the call until the cursor is
+closed (so row fetching is included).  Each distinct SQL text gets a
+readable name taken from the method that issued it, e.g.
+"DatabaseManager.get_user" (further statements in the same method become
+"DatabaseManager.join_event#2" and so on).  Helpers that run SQL for
+several public methods wrap it in statement_name(helper_caller()), so
+their statements carry the public method's name instead of the helper's;
+the name also follows into tasks the helper starts.
+
+QueryStats keeps a latency histogram per name, logs statements slower than
+a threshold together with their parameters, and can optionally record the
+EXPLAIN QUERY PLAN of each distinct statement the first time it runs.
+"""
+
+import bisect
+import logging
+import os
+import re
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import aiosqlite
+
+logger = logging.getLogger('bot.database')
+
+# Histogram bucket upper bounds in milliseconds (the last bucket is open-ended)
+BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+# Frames in these files are skipped when looking for the statement's caller
+_INTERNAL_FILES = (__file__, os.path.dirname(aiosqlite.__file__))
+
+_WHITESPACE = re.compile(r"\s+")
+
+def _normalize(sql: str) -> str:
+    return _WHITESPACE.sub(" ", sql).strip()
+
+# Name set by statement_name() for statements run on behalf of another method
+_statement_name: ContextVar[Optional[str]] = ContextVar('statement_name', default=None)
+
+def helper_caller() -> str:
+    """Qualified name of the function that called the helper calling this"""
+    return sys._getframe(2).f_code.co_qualname
+
+@contextmanager
+def statement_name(name: str) -> Iterator[None]:
+    """Name statements run in this block (and tasks started in it) after name.
+
+    Nested blocks keep the outermost name, so a helper calling another
+    helper still reports the public method.
+    """
+    if _statement_name.get() is not None:
+        yield
+        return
+    token = _statement_name.set(name)
+    try:
+        yield
+    finally:
+        _statement_name.reset(token)
+
+def _caller_name() -> str:
+    """Name given by statement_name(), else the qualified name of the first
+    function outside this module and aiosqlite"""
+    named = _statement_name.get()
+    if named is not None:
+        return named
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_filename.startswith(_INTERNAL_FILES):
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+    return frame.f_code.co_qualname
+
+class StatementStats:
+    """Latency histogram and counters for one named statement"""
+
+    __slots__ = ('name', 'sql', 'count', 'total_ms', 'max_ms', 'slow', 'errors', 'buckets', 'plan')
+
+    def __init__(self, name: str, sql: str):
+        self.name = name
+        self.sql = sql
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.slow = 0
+        self.errors = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.plan: Optional[List[str]] = None
+
+    def add(self, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.buckets[bisect.bisect_left(BUCKETS_MS, elapsed_ms)] += 1
+
+    def percentile(self, fraction: float) -> float:
+        """Upper bound (ms) of the bucket holding the given percentile"""
+        if not self.count:
+            return 0.0
+        target = fraction * self.count
+        seen = 0
+        for index, hits in enumerate(self.buckets):
+            seen += hits
+            if seen >= target:
+                # Never report more than the slowest run actually seen
+                return min(BUCKETS_MS[index], self.max_ms) if index < len(BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'name': self.name,
+            'sql': self.sql,
+            'count': self.count,
+            'total_ms': round(self.total_ms, 3),
+            'mean_ms': round(self.total_ms / self.count, 3) if self.count else 0.0,
+            'p50_ms': self.percentile(0.50),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'max_ms': round(self.max_ms, 3),
+            'slow': self.slow,
+            'errors': self.errors,
+            'histogram': dict(zip([f"<={b}ms" for b in BUCKETS_MS] + ["inf"], self.buckets)),
+            'plan': self.plan
+        }
+
+class QueryStats:
+    """Collects timings for every statement run through the pool"""
+
+    def __init__(self, slow_query_ms: float = 100.0, capture_plans: bool = False,
+                 max_param_chars: int = 200):
+        self.slow_query_ms = slow_query_ms
+        self.capture_plans = capture_plans
+        self.max_param_chars = max_param_chars
+        self.started_at = time.time()
+        # Normalized SQL text -> its stats; names are unique across statements
+        self._by_sql: Dict[str, StatementStats] = {}
+        # Exact SQL string -> stats, so the hot path skips normalizing
+        self._by_raw: Dict[str, StatementStats] = {}
+        self._names: Dict[str, int] = {}
+
+    def statement(self, sql: str, caller: str) -> StatementStats:
+        """Stats entry for this SQL text, creating and naming it on first use"""
+        stats = self._by_raw.get(sql)
+        if stats is not None:
+            return stats
+        key = _normalize(sql)
+        stats = self._by_sql.get(key)
+        if stats is None:
+            seen = self._names.get(caller, 0) + 1
+            self._names[caller] = seen
+            stats = StatementStats(caller if seen == 1 else f"{caller}#{seen}", key)
+            self._by_sql[key] = stats
+        self._by_raw[sql] = stats
+        return stats
+
+    def record(self, stats: StatementStats, elapsed_ms: float, params: Any, failed: bool = False):
+        stats.add(elapsed_ms)
+        if failed:
+            stats.errors += 1
+        if elapsed_ms >= self.slow_query_ms:
+            stats.slow += 1
+            shown = repr(params)
+            if len(shown) > self.max_param_chars:
+                shown = shown[:self.max_param_chars] + "..."
+            logger.warning("Slow query %s took %.1fms: %s params=%s", stats.name, elapsed_ms, stats.sql, shown)
+
+    async def capture_plan(self, db: aiosqlite.Connection, stats: StatementStats, params: Any):
+        """Store EXPLAIN QUERY PLAN output for a statement (first execution only)"""
+        if stats.plan is not None or not stats.sql.upper().startswith(('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH')):
+            return
+        try:
+            async with db.execute(f"EXPLAIN QUERY PLAN {stats.sql}", params or ()) as cursor:
+                stats.plan = [row[3] for row in await cursor.fetchall()]
+        except Exception as e:
+            stats.plan = [f"unavailable: {e}"]
+
+    def reset(self):
+        self._by_sql.clear()
+        self._by_raw.clear()
+        self._names.clear()
+        self.started_at = time.time()
+
+    def snapshot(self, sort_by: str = 'total_ms', limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Per-statement stats as dicts, busiest first"""
+        rows = sorted((s.to_dict() for s in self._by_sql.values()),
+                      key=lambda row: row[sort_by], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def summary(self) -> Dict[str, Any]:
+        statements = list(self._by_sql.values())
+        return {
+            'since': self.started_at,
+            'statements': len(statements),
+            'queries': sum(s.count for s in statements),
+            'total_ms': round(sum(s.total_ms for s in statements), 3),
+            'slow': sum(s.slow for s in statements),
+            'errors': sum(s.errors for s in statements),
+            'slow_query_ms': self.slow_query_ms,
+            'capture_plans': self.capture_plans
+        }
+
+class _TimedCall:
+    """Awaitable / async context manager mirroring aiosqlite's execute() result"""
+
+    def __init__(self, conn: "InstrumentedConnection", method: str, sql: str, params: Any, caller: str):
+        self._conn = conn
+        self._method = method
+        self._sql = sql
+        self._params = params
+        self._stats = conn.stats.statement(sql, caller)
+        self._cursor = None
+        self._start = 0.0
+
+    async def _run(self):
+        qs = self._conn.stats
+        if qs.capture_plans and self._stats.plan is None:
+            plan_params = self._params
+            if self._method == 'executemany':
+                # Materialize so taking the first row doesn't consume a generator
+                self._params = list(self._params)
+                plan_params = self._params[0] if self._params else ()
+            await qs.capture_plan(self._conn.raw, self._stats, plan_params)
+        self._start = time.perf_counter()
+        args = (self._sql,) if self._method == 'executescript' else (self._sql, self._params)
+        try:
+            return await getattr(self._conn.raw, self._method)(*args)
+        except Exception:
+            self._finish(failed=True)
+            raise
+
+    def _finish(self, failed: bool = False):
+        elapsed_ms = (time.perf_counter() - self._start) * 1000
+        params = self._params
+        if self._method == 'executemany':
+            params = f"<{len(params) if hasattr(params, '__len__') else '?'} rows>"
+        self._conn.stats.record(self._stats, elapsed_ms, params, failed)
+
+    def __await__(self):
+        cursor = yield from self._run().__await__()
+        self._finish()
+        return cursor
+
+    async def __aenter__(self):
+        self._cursor = await self._run()
+        return self._cursor
+
+    async def __aexit__(self, exc_type, exc, tb):
+        try:
+            await self._cursor.close()
+        finally:
+            self._finish(failed=exc_type is not None)
+
+class InstrumentedConnection:
+    """Wraps an aiosqlite connection so every statement is timed"""
+
+    def __init__(self, raw: aiosqlite.Connection, stats: QueryStats):
+        self.raw = raw
+        self.stats = stats
+
+    def execute(self, sql: str, parameters: Iterable[Any] = None) -> _TimedCall:
+        return _TimedCall(self, 'execute', sql, parameters, _caller_name())
+
+    def executemany(self, sql: str, parameters: Iterable[Iterable[Any]]) -> _TimedCall:
+        return _TimedCall(self, 'executemany', sql, parameters, _caller_name())
+
+    def executescript(self, sql_script: str) -> _TimedCall:
+        return _TimedCall(self, 'executescript', sql_script, None, _caller_name())
+
+    def __getattr__(self, name: str):
+        return getattr(self.raw, name)
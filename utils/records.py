@@ -0,0 +1,133 @@
+"""
+Typed row records returned by DatabaseManager
+
+Each record is a slotted dataclass built positionally from a plain SQLite
+tuple row, so no per-row dict is allocated.  COLUMNS lists the SELECT
+column order that from_row() expects; queries must select exactly those
+columns (plus any trailing optional fields) in that order.  Time fields are
+UTC epoch seconds (see utils/timeutil.py).
+"""
+
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, ClassVar, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar('T')
+
+@dataclass(slots=True)
+class User:
+    user_id: int
+    username: str
+    display_name: Optional[str]
+    join_date: Optional[int]
+    last_seen: Optional[int]
+    message_count: int
+    settings: str
+
+    COLUMNS: ClassVar[str] = (
+        "user_id, username, display_name, join_date, last_seen, message_count, settings"
+    )
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "User":
+        return cls(*row)
+
+@dataclass(slots=True)
+class Event:
+    id: int
+    title: str
+    description: Optional[str]
+    creator_id: int
+    guild_id: int
+    channel_id: int
+    event_date: int
+    created_at: int
+    max_participants: int
+    status: str
+    # Maintained by join_event/leave_event in the same transaction
+    participant_count: int = 0
+
+    COLUMNS: ClassVar[str] = (
+        "id, title, description, creator_id, guild_id, channel_id, "
+        "event_date, created_at, max_participants, status, participant_count"
+    )
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "Event":
+        return cls(*row)
+
+@dataclass(slots=True)
+class Reminder:
+    id: int
+    user_id: int
+    guild_id: int
+    channel_id: int
+    message: str
+    remind_time: int
+    created_at: int
+    is_recurring: bool
+    recurring_pattern: Optional[str]
+    status: str
+
+    COLUMNS: ClassVar[str] = (
+        "id, user_id, guild_id, channel_id, message, remind_time, "
+        "created_at, is_recurring, recurring_pattern, status"
+    )
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "Reminder":
+        return cls(*row)
+
+@dataclass(slots=True)
+class MediaShare:
+    id: int
+    user_id: int
+    guild_id: int
+    channel_id: int
+    media_type: str
+    media_url: str
+    description: Optional[str]
+    shared_at: int
+
+    COLUMNS: ClassVar[str] = (
+        "id, user_id, guild_id, channel_id, media_type, media_url, description, shared_at"
+    )
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "MediaShare":
+        return cls(*row)
+
+@dataclass(slots=True)
+class LogEntry:
+    id: int
+    level: str
+    message: str
+    module: Optional[str]
+    user_id: Optional[int]
+    guild_id: Optional[int]
+    timestamp: int
+
+    COLUMNS: ClassVar[str] = "id, level, message, module, user_id, guild_id, timestamp"
+
+    @classmethod
+    def from_row(cls, row: Sequence) -> "LogEntry":
+        return cls(*row)
+
+class JoinResult(str, Enum):
+    """Outcome of DatabaseManager.join_event"""
+    JOINED = 'joined'
+    ALREADY_JOINED = 'already_joined'
+    FULL = 'full'
+    NOT_FOUND = 'not_found'
+
+@dataclass(slots=True)
+class Page(Generic[T]):
+    """One page of a keyset-paginated query.
+
+    next_cursor is passed back as after= to fetch the following page and
+    prev_cursor as before= to fetch the preceding one; None means there is
+    no page in that direction.
+    """
+    items: List[T] = field(default_factory=list)
+    next_cursor: Optional[Tuple[Any, int]] = None
+    prev_cursor: Optional[Tuple[Any, int]] = None
@@ -0,0 +1,136 @@
+"""
+Data retention for tables that only ever grow
+
+Old rows are deleted in small batches, each in its own short writer
+transaction, so the job never holds SQLite's write lock long enough to
+stall user-facing writes.  Freed pages are then returned to the OS with
+PRAGMA incremental_vacuum, also in steps.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, NamedTuple, Optional
+
+from utils.timeutil import now_epoch
+
+logger = logging.getLogger('bot.database')
+
+class RetentionPolicy(NamedTuple):
+    """Delete rows of table whose time_column is older than max_age_days"""
+    table: str
+    time_column: str
+    max_age_days: int
+    # Extra SQL condition, e.g. to only prune finished reminders
+    condition: Optional[str] = None
+
+class RetentionJob:
+    """Periodically prunes old rows and reclaims the freed space"""
+
+    def __init__(self, pool, policies: List[RetentionPolicy], batch_size: int = 1000,
+                 batch_pause: float = 0.05, vacuum_step_pages: int = 1024):
+        self._pool = pool
+        self.policies = [p for p in policies if p.max_age_days > 0]
+        self.batch_size = max(1, batch_size)
+        self.batch_pause = batch_pause
+        self.vacuum_step_pages = max(1, vacuum_step_pages)
+        self._task: Optional[asyncio.Task] = None
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def start(self, interval: float, initial_delay: Optional[float] = None):
+        """Run the job every interval seconds in the background
+
+        The first pass waits initial_delay seconds (default: one interval)
+        so a restart doesn't put a full prune on top of startup work.
+        """
+        if not self.policies:
+            return
+        if initial_delay is None:
+            initial_delay = interval
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._loop(interval, initial_delay))
+
+    async def stop(self):
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+    async def _loop(self, interval: float, initial_delay: float):
+        await asyncio.sleep(max(0.0, initial_delay))
+        while True:
+            try:
+                await self.run_once()
+            except Exception as e:
+                logger.error("Retention job failed: %s", e)
+            await asyncio.sleep(interval)
+
+    async def prune(self, policy: RetentionPolicy) -> int:
+        """Delete expired rows for one policy, batch by batch; returns rows deleted"""
+        cutoff = now_epoch() - policy.max_age_days * 86400
+        condition = f" AND ({policy.condition})" if policy.condition else ""
+        sql = f"""
+            DELETE FROM {policy.table} WHERE id IN (
+                SELECT id FROM {policy.table}
+                WHERE {policy.time_column} < ?{condition}
+                LIMIT ?
+            )
+        """
+        deleted = 0
+        while True:
+            async with self._pool.writer() as db:
+                cursor = await db.execute(sql, (cutoff, self.batch_size))
+                batch = cursor.rowcount
+            deleted += batch
+            if batch < self.batch_size:
+                return deleted
+            # Give queued writers a turn at the lock between batches
+            await asyncio.sleep(self.batch_pause)
+
+    async def _page_stats(self) -> Dict[str, int]:
+        async with self._pool.writer(transaction=False) as db:
+            stats = {}
+            for pragma in ('page_size', 'page_count', 'freelist_count'):
+                async with db.execute(f"PRAGMA {pragma}") as cursor:
+                    (stats[pragma],) = await cursor.fetchone()
+            return stats
+
+    async def incremental_vacuum(self) -> int:
+        """Release free pages to the filesystem in steps; returns bytes reclaimed"""
+        before = await self._page_stats()
+        remaining = before['freelist_count']
+        while remaining > 0:
+            async with self._pool.writer(transaction=False) as db:
+                # execute() would only step the pragma once (one page);
+                # executescript runs it to completion
+                await db.executescript(f"PRAGMA incremental_vacuum({self.vacuum_step_pages})")
+                async with db.execute("PRAGMA freelist_count") as cursor:
+                    (left,) = await cursor.fetchone()
+            if left >= remaining:
+                # auto_vacuum is not INCREMENTAL on this file; nothing more to do
+                break
+            remaining = left
+            await asyncio.sleep(self.batch_pause)
+        after = await self._page_stats()
+        return max(0, before['page_count'] - after['page_count']) * after['page_size']
+
+    async def run_once(self) -> Dict[str, Any]:
+        """Apply every policy, vacuum, and return (and log) a report"""
+        deleted = {}
+        for policy in self.policies:
+            deleted[policy.table] = deleted.get(policy.table, 0) + await self.prune(policy)
+        reclaimed = await self.incremental_vacuum()
+
+        report = {
+            'deleted': deleted,
+            'bytes_reclaimed': reclaimed,
+            'timestamp': datetime.now().isoformat()
+        }
+        self.last_report = report
+        summary = ", ".join(f"{table}: {count}" for table, count in deleted.items())
+        logger.info("Retention: deleted %s rows (%s), reclaimed %s bytes",
+                    sum(deleted.values()), summary, reclaimed)
+        return report
@@ -0,0 +1,28 @@
+"""
+Conversions between datetimes and the integer epoch columns in the database
+
+Every time column stores whole seconds since the Unix epoch (UTC), so
+comparisons and range filters happen in SQL on plain integers.  Cogs only
+convert at the edges: user input goes through to_epoch() on the way in,
+and from_epoch() gives back a local datetime for display.
+"""
+
+import time
+from datetime import datetime
+from typing import Optional
+
+def now_epoch() -> int:
+    """Current time as UTC epoch seconds"""
+    return int(time.time())
+
+def to_epoch(dt: datetime) -> int:
+    """Epoch seconds for a datetime; naive datetimes are taken as local time"""
+    return int(dt.timestamp())
+
+def from_epoch(ts: int) -> datetime:
+    """Naive local datetime for display (matches what datetime.now() gives)"""
+    return datetime.fromtimestamp(ts)
+
+def format_epoch(ts: Optional[int], fmt: str = '%d/%m/%Y %H:%M') -> str:
+    """Format an epoch column for embeds; empty string for NULL"""
+    return from_epoch(ts).strftime(fmt) if ts is not None else ''